@@ -3,15 +3,25 @@
 
 Componentes:
 - http_client.py  → Cliente HTTP con curl_cffi + Circuit Breaker + Retry + Async
+- rate_limiter.py → Token bucket por dominio (admisión O(1), sin dormir)
+- shared_state.py → Rate limits + breakers compartidos entre procesos (SQLite WAL)
+- autotuner.py    → Tamaño de página y concurrencia por target (AIMD, persistido)
+- scheduler.py    → Re-scan por volatilidad de cada categoría (dentro del presupuesto)
+- validation_cache.py → Validaciones de stock recientes por SKU + precio (TTL, persistido)
 - base_sniffer.py → Clase abstracta BaseSniffer (fetch, parse, detect, save)
-- database.py     → SQLite wrapper con batch operations + queries de precios
+- runner.py       → Varios targets en un proceso (un event loop, estado por target)
+- database.py     → Unified Ledger (SQLite) con batch operations + queries cross-store
+- price_cache.py  → Último precio por producto en memoria (escrituras solo de cambios)
+- glitch_detector.py → Columnas NumPy para evaluar reglas por página (opcional)
+- glitch_rules.py → Reglas de glitch declarativas (data/glitch_rules.json, hot reload)
 
 Imports rápidos:
     from core import HttpClient, AsyncHttpClient, BaseSniffer, Database
+    from core import DomainRateLimiter
     from core import Product, Glitch, ScrapeResult
     from core import (
         ScrapingError, WAFBlockedError, CircuitBreakerOpenError,
-        NetworkError, ServerError, ParsingError, GlitchDetectedError,
+        NetworkError, ServerError, ClientError, ParsingError, GlitchDetectedError,
     )
 """
 
@@ -23,6 +33,12 @@ from core.http_client import (
     CircuitState,
 )
 
+# Rate limiting
+from core.rate_limiter import DomainRateLimiter, TokenBucket
+from core.shared_state import SharedStateStore, SharedDomainRateLimiter
+from core.autotuner import AutoTuner
+from core.validation_cache import ValidationCache
+
 # Excepciones
 from core.http_client import (
     ScrapingError,
@@ -30,6 +46,7 @@ from core.http_client import (
     CircuitBreakerOpenError,
     NetworkError,
     ServerError,
+    ClientError,
     ParsingError,
     RateLimitError,
     GlitchDetectedError,
@@ -43,8 +60,16 @@ from core.base_sniffer import (
     ScrapeResult,
 )
 
+# Glitch detection vectorizada
+from core.glitch_detector import PriceColumns
+from core.glitch_rules import GlitchRuleEngine, RuleSet
+
+# Scheduling
+from core.scheduler import CategoryScheduler
+
 # Database
 from core.database import Database
+from core.price_cache import PriceCache, PriceDiff
 
 __all__ = [
     # HTTP
@@ -52,12 +77,19 @@ __all__ = [
     "AsyncHttpClient", 
     "CircuitBreaker",
     "CircuitState",
+    "DomainRateLimiter",
+    "TokenBucket",
+    "SharedStateStore",
+    "SharedDomainRateLimiter",
+    "AutoTuner",
+    "ValidationCache",
     # Errors
     "ScrapingError",
     "WAFBlockedError",
     "CircuitBreakerOpenError",
     "NetworkError",
     "ServerError",
+    "ClientError",
     "ParsingError",
     "RateLimitError",
     "GlitchDetectedError",
@@ -65,7 +97,13 @@ __all__ = [
     "BaseSniffer",
     "Product",
     "Glitch",
+    "PriceColumns",
+    "GlitchRuleEngine",
+    "RuleSet",
     "ScrapeResult",
+    "CategoryScheduler",
     # DB
     "Database",
+    "PriceCache",
+    "PriceDiff",
 ]
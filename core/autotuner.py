@@ -0,0 +1,246 @@
+"""
+🎛️ Auto Tuner — Tamaño de página y concurrencia por target
+
+Extraído de:
+- python-performance-optimization skill (medir antes de ajustar)
+- error-handling-patterns skill (backoff ante 429/403)
+
+Cada tienda tolera cosas distintas: VTEX corta en 50 items, Doofinder
+acepta 100, algunas responden lento con páginas grandes y otras tiran 429
+apenas hay 3 requests en vuelo. En vez de constantes fijas, cada target
+tiene un AutoTuner que observa sus requests (latencia, errores, 429/403,
+bytes) y ajusta, dentro de límites seguros, con AIMD:
+
+- 429/403 en la ventana → concurrencia a la mitad y se recuerda el techo
+  (no se vuelve a subir hasta ahí por CEILING_TTL)
+- Errores o latencia alta → páginas 25% más chicas, un request menos en vuelo
+- Todo sano y rápido → un request más en vuelo y páginas 25% más grandes
+  (sin pasar de MAX_RESPONSE_BYTES según los bytes por item medidos)
+
+Si hay ODISEO_SHARED_STATE, lo aprendido se guarda en el SharedStateStore
+(tabla autotune): sobrevive reinicios y lo comparten los procesos del
+mismo target. Sin él, queda en memoria del proceso.
+
+Uso:
+    tuner = AutoTuner.for_target("megatone", page_bounds=(20, 100))
+    client = HttpClient(tuner=tuner)          # registra cada request
+    rpp = tuner.page_size                      # tamaño de página actual
+    tuner.record_items(len(results))           # items de la página (bytes/item)
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from core.shared_state import SharedStateStore
+
+logger = logging.getLogger(__name__)
+
+WINDOW_REQUESTS = 20            # Requests observados antes de cada ajuste
+LATENCY_TARGET = 1.5            # s: por debajo, hay margen para crecer
+LATENCY_SLOW = 5.0              # s: por encima, achicar
+MAX_ERROR_RATE = 0.10           # Errores (5xx/red) tolerados por ventana
+MAX_RESPONSE_BYTES = 2_000_000  # Tope de una respuesta (páginas × bytes/item)
+GROWTH = 1.25                   # Factor de crecimiento de página
+SHRINK = 0.75                   # Factor de reducción de página
+CEILING_TTL = 3600              # s que se respeta el techo de concurrencia aprendido
+
+
+@dataclass
+class TuningWindow:
+    """Contadores de la ventana actual."""
+    requests: int = 0
+    errors: int = 0
+    throttled: int = 0
+    latency: float = 0.0
+    bytes: int = 0
+    items: int = 0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.latency / self.requests if self.requests else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+
+class AutoTuner:
+    """Ajuste AIMD de tamaño de página y requests en vuelo de un target."""
+
+    _instances: dict[str, "AutoTuner"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        target: str,
+        page_bounds: Optional[tuple[int, int]] = None,
+        concurrency_bounds: tuple[int, int] = (1, 4),
+        page_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        store: Optional[SharedStateStore] = None,
+        window: int = WINDOW_REQUESTS,
+    ):
+        """
+        Args:
+            target: Nombre del target (clave de persistencia)
+            page_bounds: (mín, máx) de items por página; None = no paginable
+            concurrency_bounds: (mín, máx) de requests en vuelo
+            page_size / concurrency: Valores iniciales (default: máximo / mínimo)
+            store: Dónde persistir lo aprendido (None = solo en memoria)
+            window: Requests por ventana de ajuste
+        """
+        self.target = target
+        self.page_bounds = page_bounds
+        self.concurrency_bounds = concurrency_bounds
+        self.store = store
+        self.window_size = window
+        self.page_size = page_size or (page_bounds[1] if page_bounds else None)
+        self.concurrency = concurrency or concurrency_bounds[0]
+        self.ceiling: Optional[int] = None
+        self.ceiling_at: Optional[float] = None
+        self.bytes_per_item: Optional[float] = None
+        self._window = TuningWindow()
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def for_target(
+        cls,
+        target: str,
+        page_bounds: Optional[tuple[int, int]] = None,
+        concurrency_bounds: tuple[int, int] = (1, 4),
+        **kwargs,
+    ) -> "AutoTuner":
+        """Tuner del proceso para `target` (persistido si hay estado compartido)."""
+        with cls._instances_lock:
+            if target not in cls._instances:
+                # Sin ODISEO_SHARED_STATE: el tuning queda en memoria
+                store = SharedStateStore.from_env()
+                cls._instances[target] = cls(
+                    target, page_bounds, concurrency_bounds, store=store, **kwargs
+                )
+            return cls._instances[target]
+
+    # --- Persistencia ---
+
+    def _load(self) -> None:
+        if self.store is None:
+            return
+        try:
+            row = self.store.load_tuning(self.target)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo leer el tuning de {self.target}: {e}")
+            return
+        if row is None:
+            return
+        page_size, concurrency, self.ceiling, self.ceiling_at, self.bytes_per_item = row
+        if self.page_bounds and page_size:
+            self.page_size = self._clamp(page_size, self.page_bounds)
+        self.concurrency = self._clamp(concurrency, self.concurrency_bounds)
+        logger.info(
+            f"🎛️ {self.target}: tuning previo — página {self.page_size}, "
+            f"{self.concurrency} en vuelo"
+        )
+
+    def _save(self) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.save_tuning(
+                self.target, self.page_size, self.concurrency,
+                self.ceiling, self.ceiling_at, self.bytes_per_item,
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar el tuning de {self.target}: {e}")
+
+    # --- Observaciones ---
+
+    def record(self, status: int, latency: float, nbytes: int = 0) -> None:
+        """
+        Registrar un request (status 0 = error de red/timeout).
+        Llamado por HttpClient / AsyncHttpClient en cada intento.
+        """
+        with self._lock:
+            w = self._window
+            w.requests += 1
+            w.latency += latency
+            w.bytes += nbytes
+            if status in (403, 429):
+                w.throttled += 1
+            elif status == 0 or status >= 500:
+                w.errors += 1
+            if w.requests >= self.window_size:
+                self._adjust()
+
+    def record_items(self, count: int) -> None:
+        """Items recibidos en una página (para estimar bytes por item)."""
+        with self._lock:
+            self._window.items += count
+
+    # --- Ajuste ---
+
+    @staticmethod
+    def _clamp(value: int, bounds: tuple[int, int]) -> int:
+        return max(bounds[0], min(bounds[1], int(value)))
+
+    def _max_concurrency(self) -> int:
+        top = self.concurrency_bounds[1]
+        if self.ceiling is not None:
+            if self.ceiling_at and time.time() - self.ceiling_at > CEILING_TTL:
+                self.ceiling = self.ceiling_at = None
+            else:
+                top = min(top, max(self.ceiling - 1, self.concurrency_bounds[0]))
+        return top
+
+    def _max_page_size(self) -> int:
+        top = self.page_bounds[1]
+        if self.bytes_per_item:
+            top = min(top, int(MAX_RESPONSE_BYTES / self.bytes_per_item))
+        return max(self.page_bounds[0], top)
+
+    def _adjust(self) -> None:
+        """Aplicar AIMD con la ventana cerrada (llamar con el lock tomado)."""
+        w, self._window = self._window, TuningWindow()
+        if w.items and w.bytes:
+            self.bytes_per_item = w.bytes / w.items
+        before = (self.page_size, self.concurrency)
+
+        if w.throttled:
+            self.ceiling, self.ceiling_at = self.concurrency, time.time()
+            self.concurrency = max(self.concurrency_bounds[0], self.concurrency // 2)
+            reason = f"{w.throttled} respuestas 429/403"
+        elif w.error_rate > MAX_ERROR_RATE or w.avg_latency > LATENCY_SLOW:
+            if self.page_size:
+                self.page_size = self._clamp(self.page_size * SHRINK, self.page_bounds)
+            self.concurrency = max(self.concurrency_bounds[0], self.concurrency - 1)
+            reason = f"{w.error_rate:.0%} errores, latencia {w.avg_latency:.1f}s"
+        elif w.avg_latency < LATENCY_TARGET:
+            self.concurrency = min(self._max_concurrency(), self.concurrency + 1)
+            if self.page_size:
+                self.page_size = min(self._max_page_size(), max(
+                    self.page_size + 1, int(self.page_size * GROWTH)
+                ))
+            reason = f"latencia {w.avg_latency:.1f}s, sin errores"
+        else:
+            return
+
+        if (self.page_size, self.concurrency) != before:
+            logger.info(
+                f"🎛️ {self.target}: página {before[0]}→{self.page_size}, "
+                f"en vuelo {before[1]}→{self.concurrency} ({reason})"
+            )
+            self._save()
+
+    def stats(self) -> dict:
+        return {
+            "target": self.target,
+            "page_size": self.page_size,
+            "concurrency": self.concurrency,
+            "ceiling": self.ceiling,
+            "bytes_per_item": round(self.bytes_per_item) if self.bytes_per_item else None,
+        }
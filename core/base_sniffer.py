@@ -17,21 +17,35 @@ Ejemplo:
         def fetch_products(self, category: str) -> list[dict]:
             ...
         
+        # (o, para targets paginados, un generador de páginas:)
+        # def iter_product_pages(self, category: str) -> Iterator[list[dict]]:
+        #     yield page
+        
         def parse_product(self, raw: dict) -> Product:
             ...
         
-        def detect_glitch(self, product: Product) -> Optional[Glitch]:
-            ...
+        # Umbrales de glitch: data/glitch_rules.json (perfil = TARGET_NAME)
+        # Páginas/concurrencia: PAGE_SIZE_BOUNDS + HttpClient(tuner=self.tuner)
 """
 
 from __future__ import annotations
 
 import logging
+import threading
 import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Callable, Iterator, Optional
+
+from core.autotuner import AutoTuner
+from core.baselines import Baseline
+from core.database import Database
+from core.glitch_detector import HAS_NUMPY, PriceColumns
+from core.glitch_rules import GlitchRuleEngine, RuleSet
+from core.market_index import MarketRef
+from core.scheduler import DEFAULT_BUDGET_PER_HOUR, CategoryScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -104,15 +118,23 @@ class ScrapeResult:
     category: str
     products_found: int = 0
     glitches_found: int = 0
+    prices_changed: int = 0         # productos con precio distinto al del ledger
+    pages: int = 0                  # páginas (≈ requests) del fetch
     errors: list[str] = field(default_factory=list)
     duration_seconds: float = 0.0
     started_at: datetime = field(default_factory=datetime.now)
-    products: list[Product] = field(default_factory=list)
+    discount_sum: float = 0.0       # Suma de discount_pct de los productos con descuento
+    discounted: int = 0             # Productos con descuento (los Product no se retienen)
     glitches: list[Glitch] = field(default_factory=list)
     
     @property
     def success(self) -> bool:
         return len(self.errors) == 0 and self.products_found > 0
+    
+    @property
+    def avg_discount(self) -> float:
+        """Descuento medio de los productos con descuento."""
+        return self.discount_sum / self.discounted if self.discounted else 0.0
 
 
 # ============================================================================
@@ -125,12 +147,16 @@ class BaseSniffer(ABC):
     
     Implementa el patrón Template Method:
     1. fetch_products()    → Obtener datos crudos del target
+       (o iter_product_pages() → mismos datos, página por página)
     2. parse_product()     → Normalizar un producto crudo → Product
     3. detect_glitch()     → Verificar si un producto tiene precio anómalo
     4. on_glitch_found()   → Hook para acciones al encontrar un glitch
     5. save_products()     → Persistir productos en DB
     
-    El método run_cycle() orquesta todo el flujo.
+    El método run_cycle() orquesta todo el flujo en streaming: cada página
+    se parsea, se analiza y se guarda apenas llega. Por defecto recorre las
+    categorías en serie; con `concurrency > 1` las procesa en un pool de
+    threads acotado (el HttpClient del target sigue aplicando sus límites).
     """
     
     # Subclases DEBEN definir estos
@@ -138,23 +164,76 @@ class BaseSniffer(ABC):
     BASE_URL: str = ""
     API_URL: str = ""
     
-    # Umbrales de detección de glitches
-    GLITCH_THRESHOLD_PCT: float = 40.0   # >40% descuento = sospechoso
-    GLITCH_ABS_MIN: float = 1000.0       # Precio < $1000 ARS = sospechoso
+    # Perfil de reglas de glitch en data/glitch_rules.json (default: TARGET_NAME)
+    GLITCH_RULES_PROFILE: Optional[str] = None
+    
+    # Máximo de categorías en vuelo por ciclo (1 = serie, comportamiento clásico)
+    MAX_CONCURRENT_CATEGORIES: int = 4
     
-    def __init__(self, db_path: Optional[str] = None):
+    # Límites del auto-tuner (core/autotuner.py): items por página (None =
+    # el sitio fija la página) y requests en vuelo
+    PAGE_SIZE_BOUNDS: Optional[tuple[int, int]] = None
+    CONCURRENCY_BOUNDS: tuple[int, int] = (1, 4)
+    
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ledger: Optional[Database] = None,
+        rules: Optional[GlitchRuleEngine] = None,
+    ):
+        # DB propia del target (solo para tablas específicas, e.g. oportunidades)
         self.db_path = db_path or f"{self.TARGET_NAME}_monitor.db"
+        # Unified Ledger: products / price_history / alerts de todos los targets
+        self.ledger = ledger or Database.shared()
+        # Reglas de glitch declarativas (hot reload del JSON)
+        self.rules = rules or GlitchRuleEngine.shared()
+        # Tamaño de página / concurrencia aprendidos (pasar a HttpClient(tuner=...))
+        self.tuner = AutoTuner.for_target(
+            self.TARGET_NAME, self.PAGE_SIZE_BOUNDS, self.CONCURRENCY_BOUNDS
+        )
         self.logger = logging.getLogger(f"sniffer.{self.TARGET_NAME}")
+        # SQLite no tolera escrituras concurrentes: un save a la vez por sniffer
+        self._save_lock = threading.Lock()
+        # Pool de categorías de run_cycle: uno por sniffer y de vida larga, así
+        # las sessions HTTP y conexiones SQLite por thread no se multiplican
+        self._cycle_executor: Optional[ThreadPoolExecutor] = None
+        self._cycle_executor_lock = threading.Lock()
     
-    # --- Métodos abstractos (DEBEN ser implementados) ---
+    # --- Fuente de datos (implementar fetch_products O iter_product_pages) ---
     
-    @abstractmethod
     def fetch_products(self, category: str, **kwargs) -> list[dict]:
         """
         Obtener productos crudos del target.
         Retorna lista de dicts con la data raw del API/HTML.
+        
+        Default: junta todas las páginas de iter_product_pages().
         """
-        ...
+        if type(self).iter_product_pages is BaseSniffer.iter_product_pages:
+            raise NotImplementedError(
+                f"{type(self).__name__} debe implementar fetch_products() o iter_product_pages()"
+            )
+        
+        all_products: list[dict] = []
+        for page in self.iter_product_pages(category, **kwargs):
+            all_products.extend(page)
+        return all_products
+    
+    def iter_product_pages(self, category: str, **kwargs) -> Iterator[list[dict]]:
+        """
+        Obtener productos crudos página por página (generador).
+        Permite que run_cycle() procese cada página mientras llega la siguiente.
+        
+        Default (adapter): una sola "página" con todo lo que retorna
+        fetch_products(), para sniffers que solo implementan la versión lista.
+        """
+        yield self.fetch_products(category, **kwargs)
+    
+    @property
+    def page_size(self) -> Optional[int]:
+        """Items por página actuales según el auto-tuner."""
+        return self.tuner.page_size
+    
+    # --- Métodos abstractos (DEBEN ser implementados) ---
     
     @abstractmethod
     def parse_product(self, raw: dict) -> Product:
@@ -166,47 +245,87 @@ class BaseSniffer(ABC):
     
     # --- Métodos con implementación default (pueden sobreescribirse) ---
     
-    def detect_glitch(self, product: Product, previous_price: float = 0.0) -> Optional[Glitch]:
+    def ruleset(self, category: str = "") -> RuleSet:
+        """Reglas compiladas de este target para una categoría."""
+        return self.rules.ruleset(self.GLITCH_RULES_PROFILE or self.TARGET_NAME, category)
+    
+    def detect_glitch(
+        self,
+        product: Product,
+        previous_price: float = 0.0,
+        baseline: Optional[Baseline] = None,
+    ) -> Optional[Glitch]:
         """
         Detectar si un producto tiene un precio anómalo (glitch).
         
-        Heurísticas:
-        1. Descuento > GLITCH_THRESHOLD_PCT → probable glitch
-        2. Precio < GLITCH_ABS_MIN → demasiado barato
-        3. Caída > 50% vs precio anterior → cambio brusco
+        Evalúa las reglas del target/categoría (data/glitch_rules.json)
+        en orden; la primera que dispara define el Glitch. Default:
+        1. Descuento >= 40% vs lista → probable glitch
+        2. Precio < $1000 → demasiado barato (solo sin baseline madura)
+        3. Caída >= 50% vs precio anterior → cambio brusco
+        4. Precio >= 4σ bajo la mediana de su (categoría, marca)
         """
-        # Heurística 1: Descuento excesivo vs precio de lista
-        if product.list_price > 0:
-            discount = product.calculated_discount
-            if discount >= self.GLITCH_THRESHOLD_PCT:
-                return Glitch(
-                    product=product,
-                    reason=f"Descuento extremo: {discount}% off (lista: ${product.list_price:,.0f})",
-                    severity="high" if discount >= 60 else "medium",
-                    drop_pct=discount,
-                )
-        
-        # Heurística 2: Precio absurdamente bajo
-        if 0 < product.current_price < self.GLITCH_ABS_MIN:
-            return Glitch(
-                product=product,
-                reason=f"Precio sospechosamente bajo: ${product.current_price:,.0f}",
-                severity="critical",
-            )
+        return self.ruleset(product.category).evaluate(product, previous_price, baseline)
+    
+    def glitch_candidates(self, cols: PriceColumns, category: str = ""):
+        """
+        Pre-filtro vectorizado (NumPy) de detect_glitch() para una página.
+        Debe devolver un SUPERSET de los productos donde detect_glitch()
+        dispara: cada candidato se confirma con el detector escalar.
+        Override junto con detect_glitch() si se agregan heurísticas en código.
+        """
+        return self.ruleset(category).candidates(cols)
+    
+    def detect_glitches(
+        self,
+        products: list[Product],
+        previous_prices: dict[str, float],
+        baselines: Optional[dict[str, Baseline]] = None,
+    ) -> list[Glitch]:
+        """
+        Detectar glitches de una página/ciclo entero.
         
-        # Heurística 3: Caída brusca vs precio anterior
-        if previous_price > 0 and product.current_price > 0:
-            drop = (1 - product.current_price / previous_price) * 100
-            if drop >= 50:
-                return Glitch(
-                    product=product,
-                    reason=f"Caída del {drop:.0f}% vs precio anterior (${previous_price:,.0f})",
-                    severity="high",
-                    previous_price=previous_price,
-                    drop_pct=drop,
-                )
+        Con NumPy, las reglas se evalúan en una pasada sobre columnas
+        (por categoría) y solo los candidatos pasan por detect_glitch().
+        Si el target sobreescribe detect_glitch() sin su glitch_candidates(),
+        o no hay NumPy, se usa el loop escalar (mismo resultado).
+        """
+        baselines = baselines or {}
+        cls = type(self)
+        vectorized = HAS_NUMPY and products and (
+            cls.detect_glitch is BaseSniffer.detect_glitch
+            or cls.glitch_candidates is not BaseSniffer.glitch_candidates
+        )
+        if vectorized:
+            by_category: dict[str, list[int]] = {}
+            for i, product in enumerate(products):
+                by_category.setdefault(product.category, []).append(i)
+            
+            selected = []
+            for category, indexes in by_category.items():
+                page = products if len(by_category) == 1 else [products[i] for i in indexes]
+                cols = PriceColumns.from_products(page, previous_prices, baselines)
+                mask = self.glitch_candidates(cols, category)
+                selected.extend(indexes[i] for i in mask.nonzero()[0])
+            products = [products[i] for i in sorted(selected)]
         
-        return None
+        glitches = []
+        for product in products:
+            glitch = self.detect_glitch(
+                product, previous_prices.get(product.id, 0.0), baselines.get(product.id)
+            )
+            if glitch:
+                glitches.append(glitch)
+        return glitches
+    
+    def on_page_scanned(
+        self, category: str, products: list[Product], previous: dict[str, float]
+    ) -> None:
+        """
+        Hook: página parseada, con el precio anterior de cada producto
+        (antes de guardarla). Override para decidir qué leer el próximo
+        ciclo (e.g. paginación adaptativa en iter_product_pages).
+        """
     
     def on_glitch_found(self, glitch: Glitch) -> None:
         """
@@ -219,104 +338,263 @@ class BaseSniffer(ABC):
             f"({glitch.reason})"
         )
     
+    def get_previous_prices(self, products: list[Product]) -> dict[str, float]:
+        """
+        Precio anterior (último guardado en el ledger) de una página entera.
+        Un solo lookup batch; si falla, se detecta sin precio anterior.
+        """
+        if not products:
+            return {}
+        try:
+            return self.ledger.get_previous_prices(self.TARGET_NAME, [p.id for p in products])
+        except Exception as e:
+            self.logger.warning(f"⚠️ No se pudieron leer precios anteriores: {e}")
+            return {}
+    
+    def get_baselines(self, products: list[Product]) -> dict[str, Baseline]:
+        """
+        Baseline de precios (categoría/marca) de cada producto de la página.
+        O(1) por producto; si falla, se detecta sin baselines.
+        """
+        if not products:
+            return {}
+        try:
+            return self.ledger.get_baselines(self.TARGET_NAME, products)
+        except Exception as e:
+            self.logger.warning(f"⚠️ No se pudieron leer baselines: {e}")
+            return {}
+    
+    def get_market_refs(self, products: list[Product]) -> dict[str, MarketRef]:
+        """
+        Precio de referencia de mercado (otras tiendas) de cada producto.
+        Hash lookup por producto; si falla, sin referencias.
+        """
+        if not products:
+            return {}
+        try:
+            return self.ledger.get_market_refs(
+                self.TARGET_NAME, products, extras_of=self.ledger_extras
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ No se pudieron leer precios de mercado: {e}")
+            return {}
+    
+    def ledger_extras(self, product: Product) -> dict:
+        """
+        Adapter del target → columnas opcionales del ledger
+        (ean, sku, slug, stock, stock_status).
+        Default: las toma de raw_data con el mismo nombre.
+        """
+        return Database.default_extras(product)
+    
     def save_products(self, products: list[Product]) -> None:
         """
-        Persistir productos en la base de datos.
-        Override para implementar.
+        Persistir productos en el Unified Ledger (solo lo que cambió).
+        Override para filtrar o post-procesar (llamando a super()).
         """
-        self.logger.info(
-            f"💾 {len(products)} productos para guardar (DB: {self.db_path})"
-        )
+        self.ledger.save_products(products, extras_of=self.ledger_extras)
     
     # --- Orquestación ---
     
-    def run_cycle(self, categories: list[str], **kwargs) -> list[ScrapeResult]:
+    def run_cycle(
+        self,
+        categories: list[str],
+        concurrency: int = 1,
+        on_result: Optional[Callable[[ScrapeResult], None]] = None,
+        **kwargs,
+    ) -> list[ScrapeResult]:
         """
         Ejecutar un ciclo completo de scraping.
         
         Ref: systematic-debugging — Multi-Layer Diagnostic
         Logs en cada frontera: fetch → parse → detect → save
         
+        Args:
+            categories: Lista de categorías a scrapear
+            concurrency: Categorías en paralelo (opt-in). Se acota a
+                MAX_CONCURRENT_CATEGORIES y a la concurrencia del auto-tuner.
+                Los resultados respetan el orden de `categories` sin importar
+                cuál termina primero.
+            on_result: Callback con el resultado de cada categoría apenas
+                termina (en el thread que la scrapeó): lo ya scrapeado no se
+                pierde si el ciclo se corta a la mitad.
+        
         Ejemplo:
             sniffer = FravegaSniffer()
             results = sniffer.run_cycle(["celulares", "notebooks", "tvs"])
             for r in results:
                 print(f"{r.category}: {r.products_found} productos, {r.glitches_found} glitches")
+            
+            # Fan-out: 4 categorías en vuelo
+            results = sniffer.run_cycle(categories, concurrency=4)
         """
-        results = []
+        workers = max(1, min(
+            concurrency, self.MAX_CONCURRENT_CATEGORIES, self.tuner.concurrency, len(categories)
+        ))
         
-        for category in categories:
-            start = time.time()
-            result = ScrapeResult(
-                target_name=self.TARGET_NAME,
-                category=category,
-            )
+        def run_one(category: str) -> ScrapeResult:
+            result = self._run_category(category, **kwargs)
+            if on_result is not None:
+                on_result(result)
+            return result
+        
+        if workers == 1:
+            return [run_one(category) for category in categories]
+        
+        self.logger.info(
+            f"⚡ Ciclo concurrente: {len(categories)} categorías, {workers} en vuelo"
+        )
+        # El pool tiene MAX_CONCURRENT_CATEGORIES threads; el gate acota a `workers`
+        gate = threading.Semaphore(workers)
+        
+        def run(category: str) -> ScrapeResult:
+            with gate:
+                return run_one(category)
+        
+        # map() preserva el orden de entrada
+        return list(self._cycle_pool().map(run, categories))
+    
+    def _cycle_pool(self) -> ThreadPoolExecutor:
+        """Executor de run_cycle (se crea una vez; se libera en close())."""
+        with self._cycle_executor_lock:
+            if self._cycle_executor is None:
+                self._cycle_executor = ThreadPoolExecutor(
+                    max_workers=self.MAX_CONCURRENT_CATEGORIES,
+                    thread_name_prefix=f"{self.TARGET_NAME}-cycle",
+                )
+            return self._cycle_executor
+    
+    def close(self) -> None:
+        """Liberar el pool de categorías y el HttpClient del target."""
+        with self._cycle_executor_lock:
+            executor, self._cycle_executor = self._cycle_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        client = getattr(self, "client", None)
+        if client is not None:
+            client.close()
+    
+    def _run_category(self, category: str, **kwargs) -> ScrapeResult:
+        """Pipeline fetch → parse → detect → save para una categoría."""
+        start = time.time()
+        result = ScrapeResult(
+            target_name=self.TARGET_NAME,
+            category=category,
+        )
+        
+        try:
+            # PASO 1: Fetch (streaming, página por página)
+            self.logger.info(f"📡 Fetching {self.TARGET_NAME}/{category}...")
+            for page_no, raw_products in enumerate(
+                self.iter_product_pages(category, **kwargs), start=1
+            ):
+                self.logger.info(f"   → página {page_no}: {len(raw_products)} productos raw")
+                self.tuner.record_items(len(raw_products))
+                result.pages = page_no
+                self._process_page(raw_products, category, result)
+            
+            self.logger.info(f"   → {result.products_found} productos parseados")
             
+        except Exception as e:
+            self.logger.error(f"💥 Error en ciclo {category}: {e}")
+            result.errors.append(str(e))
+        
+        result.duration_seconds = round(time.time() - start, 2)
+        
+        self.logger.info(
+            f"   ✅ {category}: {result.products_found} productos, "
+            f"{result.glitches_found} glitches, {result.duration_seconds}s"
+        )
+        
+        return result
+    
+    def _process_page(self, raw_products: list[dict], category: str, result: ScrapeResult) -> None:
+        """Parse → detect → save de una página, acumulando en `result`."""
+        # PASO 2: Parse
+        products = []
+        for raw in raw_products:
             try:
-                # PASO 1: Fetch
-                self.logger.info(f"📡 Fetching {self.TARGET_NAME}/{category}...")
-                raw_products = self.fetch_products(category, **kwargs)
-                self.logger.info(f"   → {len(raw_products)} productos raw")
-                
-                # PASO 2: Parse
-                products = []
-                for raw in raw_products:
-                    try:
-                        product = self.parse_product(raw)
-                        product.source = self.TARGET_NAME
-                        product.category = category
-                        products.append(product)
-                    except Exception as e:
-                        self.logger.error(f"   ❌ Error parseando producto: {e}")
-                        result.errors.append(f"Parse error: {e}")
-                
-                result.products = products
-                result.products_found = len(products)
-                self.logger.info(f"   → {len(products)} productos parseados")
-                
-                # PASO 3: Detect glitches
-                for product in products:
-                    glitch = self.detect_glitch(product)
-                    if glitch:
-                        result.glitches.append(glitch)
-                        self.on_glitch_found(glitch)
-                
-                result.glitches_found = len(result.glitches)
-                
-                # PASO 4: Save
-                if products:
-                    self.save_products(products)
-                
+                product = self.parse_product(raw)
+                product.source = self.TARGET_NAME
+                product.category = category
+                products.append(product)
             except Exception as e:
-                self.logger.error(f"💥 Error en ciclo {category}: {e}")
-                result.errors.append(str(e))
-            
-            result.duration_seconds = round(time.time() - start, 2)
-            results.append(result)
-            
-            self.logger.info(
-                f"   ✅ {category}: {result.products_found} productos, "
-                f"{result.glitches_found} glitches, {result.duration_seconds}s"
-            )
+                self.logger.error(f"   ❌ Error parseando producto: {e}")
+                result.errors.append(f"Parse error: {e}")
+        
+        # Solo contadores: la página se libera al terminar (memoria acotada por página)
+        result.products_found += len(products)
+        discounts = [p.discount_pct for p in products if p.discount_pct]
+        result.discount_sum += sum(discounts)
+        result.discounted += len(discounts)
+        
+        # PASO 3: Detect glitches (precio anterior + baseline de toda la página
+        # en un lookup, heurísticas vectorizadas sobre la página entera)
+        previous = self.get_previous_prices(products)
+        result.prices_changed += sum(
+            1 for p in products if p.id in previous and previous[p.id] != p.current_price
+        )
+        self.on_page_scanned(category, products, previous)
+        baselines = self.get_baselines(products)
+        for glitch in self.detect_glitches(products, previous, baselines):
+            result.glitches.append(glitch)
+            self.on_glitch_found(glitch)
+        
+        result.glitches_found = len(result.glitches)
         
-        return results
+        # PASO 4: Save
+        if products:
+            with self._save_lock:
+                self.save_products(products)
     
-    def run_forever(self, categories: list[str], interval: int = 60, **kwargs) -> None:
+    def run_forever(
+        self,
+        categories: list[str],
+        interval: int = 60,
+        concurrency: int = 1,
+        scheduler: Optional[CategoryScheduler] = None,
+        **kwargs,
+    ) -> None:
         """
-        Ejecutar ciclos de scraping indefinidamente.
+        Ejecutar scraping indefinidamente, priorizando por volatilidad.
+        
+        Cada vuelta escanea solo las categorías vencidas según el
+        CategoryScheduler (core/scheduler.py): las que cambian de precio
+        vuelven cada `interval` segundos, las estáticas cada hora, sin pasar
+        el presupuesto horario por dominio del HttpClient.
         
         Args:
             categories: Lista de categorías a scrapear
-            interval: Segundos entre ciclos
+            interval: Intervalo mínimo (segundos) de una categoría volátil
+            concurrency: Categorías en paralelo por ciclo (ver run_cycle)
+            scheduler: Scheduler propio (default: uno con estos parámetros)
         """
+        client = getattr(self, "client", None)
+        scheduler = scheduler or CategoryScheduler(
+            categories,
+            min_interval=interval,
+            budget_per_hour=getattr(client, "max_requests_per_hour", DEFAULT_BUDGET_PER_HOUR),
+        )
         cycle = 0
         while True:
+            due = scheduler.due()
+            if not due:
+                wait = scheduler.seconds_until_next()
+                self.logger.info(f"⏳ Próxima categoría en {wait:.0f}s...")
+                time.sleep(wait)
+                continue
+            
             cycle += 1
             self.logger.info(f"\n{'='*60}")
-            self.logger.info(f"🔄 Ciclo #{cycle} — {datetime.now().strftime('%H:%M:%S')}")
+            self.logger.info(
+                f"🔄 Ciclo #{cycle} — {datetime.now().strftime('%H:%M:%S')} "
+                f"({len(due)}/{len(categories)} categorías)"
+            )
             self.logger.info(f"{'='*60}")
             
-            results = self.run_cycle(categories, **kwargs)
+            results = self.run_cycle(due, concurrency=concurrency, **kwargs)
+            for result in results:
+                scheduler.record(result)
             
             total_products = sum(r.products_found for r in results)
             total_glitches = sum(r.glitches_found for r in results)
@@ -328,5 +606,5 @@ class BaseSniffer(ABC):
                 f"{total_errors} errores"
             )
             
-            self.logger.info(f"⏳ Esperando {interval}s...")
-            time.sleep(interval)
+            self.rules.log_stats(self.GLITCH_RULES_PROFILE or self.TARGET_NAME, self.logger)
+            scheduler.log_plan(self.logger)
@@ -0,0 +1,150 @@
+"""
+📏 Baselines — Distribución de precios por (source, categoría, marca)
+
+Los umbrales fijos (precio < $1000, descuento > 40%) marcan como glitch
+precios normales en categorías baratas y no ven glitches reales en las
+caras. Acá se mantiene, por cada (source, categoría, marca), una mediana y
+un MAD (desvío absoluto mediano) de los precios, actualizados en streaming
+en cada save del ledger — sin re-escanear el historial.
+
+Estimador (FAME-style, en log-precio para que sea invariante a escala):
+    mediana += paso · signo(x - mediana)
+    mad     += paso · signo(|x - mediana| - mad)
+con un paso proporcional al MAD actual que decae como 1/√n hasta un piso
+(sigue adaptándose a la inflación). O(1) por observación, 3 floats por
+clave.
+
+Cada producto actualiza dos claves: (categoría, marca) y (categoría, "")
+como fallback cuando la marca tiene pocas muestras.
+
+Uso:
+    baseline = store.lookup("fravega", "computacion/notebooks", "Lenovo")
+    if baseline:
+        z = baseline.score(product.current_price)   # < 0 = más barato que lo normal
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    from core.base_sniffer import Product
+
+MIN_SAMPLES = 30            # Observaciones para considerar una baseline madura
+INITIAL_LOG_MAD = 0.25      # MAD inicial en log-precio (±28%)
+MAD_FLOOR = 0.01            # Piso del MAD (evita z infinitos en precios idénticos)
+MIN_STEP = 0.02             # Piso del paso relativo (sigue la deriva de precios)
+MAD_TO_SIGMA = 1.4826       # MAD → desvío estándar (distribución normal)
+
+
+def baseline_key(category: str, brand: str) -> tuple[str, str]:
+    return (category or "", (brand or "").strip().lower())
+
+
+@dataclass
+class Baseline:
+    """Mediana/MAD de log-precio de una clave."""
+    category: str
+    brand: str
+    n: int = 0
+    log_median: float = 0.0
+    log_mad: float = INITIAL_LOG_MAD
+    updated_at: int = 0
+
+    @property
+    def median(self) -> float:
+        return math.exp(self.log_median)
+
+    @property
+    def scale(self) -> float:
+        """Desvío robusto (en log-precio)."""
+        return MAD_TO_SIGMA * max(self.log_mad, MAD_FLOOR)
+
+    @property
+    def scope(self) -> str:
+        return f"{self.category} / {self.brand}" if self.brand else self.category
+
+    def score(self, price: float) -> float:
+        """z robusto del precio (negativo = más barato que lo normal)."""
+        if price <= 0:
+            return -math.inf
+        return (math.log(price) - self.log_median) / self.scale
+
+    def observe(self, price: float) -> None:
+        """Actualizar con un precio observado (O(1))."""
+        if price <= 0:
+            return
+        x = math.log(price)
+        self.n += 1
+        self.updated_at = int(time.time())
+        if self.n == 1:
+            self.log_median = x
+            self.log_mad = INITIAL_LOG_MAD
+            return
+
+        rate = max(1.0 / math.sqrt(self.n), MIN_STEP)
+        step = rate * max(self.log_mad, MAD_FLOOR)
+
+        dev = x - self.log_median
+        self.log_median += math.copysign(min(step, abs(dev)), dev)
+
+        spread = abs(x - self.log_median) - self.log_mad
+        self.log_mad = max(self.log_mad + math.copysign(min(step, abs(spread)), spread), MAD_FLOOR)
+
+
+class BaselineStore:
+    """
+    Baselines en memoria por source (espejo de la tabla price_baselines).
+
+    Mismo patrón que PriceCache: stage() calcula las baselines nuevas sin
+    tocar el store, el ledger las persiste y recién después del commit se
+    aplican con apply().
+    """
+
+    def __init__(self, min_samples: int = MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._by_source: dict[str, dict[tuple[str, str], Baseline]] = {}
+
+    def is_loaded(self, source: str) -> bool:
+        return source in self._by_source
+
+    def load(self, source: str, rows: Iterable[tuple]) -> int:
+        """Cargar filas (category, brand, n, log_median, log_mad, updated_at)."""
+        baselines = self._by_source.setdefault(source, {})
+        for category, brand, n, log_median, log_mad, updated_at in rows:
+            baselines[(category, brand)] = Baseline(
+                category, brand, n, log_median, log_mad, updated_at
+            )
+        return len(baselines)
+
+    def stage(self, source: str, products: Iterable["Product"]) -> dict[tuple[str, str], Baseline]:
+        """Baselines actualizadas (copias) con los precios de `products`."""
+        current = self._by_source.get(source, {})
+        staged: dict[tuple[str, str], Baseline] = {}
+        for p in products:
+            category, brand = baseline_key(p.category, p.brand)
+            keys = [(category, brand), (category, "")] if brand else [(category, "")]
+            for key in keys:
+                baseline = staged.get(key)
+                if baseline is None:
+                    existing = current.get(key)
+                    baseline = replace(existing) if existing else Baseline(*key)
+                    staged[key] = baseline
+                baseline.observe(p.current_price)
+        return staged
+
+    def apply(self, source: str, staged: dict[tuple[str, str], Baseline]) -> None:
+        self._by_source.setdefault(source, {}).update(staged)
+
+    def lookup(self, source: str, category: str, brand: str = "") -> Optional[Baseline]:
+        """Baseline madura más específica (marca → categoría), o None."""
+        baselines = self._by_source.get(source, {})
+        category, brand = baseline_key(category, brand)
+        for key in ((category, brand), (category, "")) if brand else ((category, ""),):
+            baseline = baselines.get(key)
+            if baseline is not None and baseline.n >= self.min_samples:
+                return baseline
+        return None
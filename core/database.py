@@ -6,59 +6,287 @@ Extraído de:
 - python-testing-patterns skill (fixtures con SQLite in-memory)
 - systematic-debugging skill (logging en cada frontera)
 
+Unified Ledger (ver CORE_STRATEGY.md):
+    Todos los targets persisten en UNA base (data/databases/ledger.db) con
+    el mismo esquema: products con PK (source, product_id), price_history,
+    alerts y glitches. Las columnas propias de cada tienda (ean, sku, slug,
+    stock, stock_status) son columnas opcionales del mismo products; cada
+    sniffer las completa con su adapter (BaseSniffer.ledger_extras).
+
 Uso:
     from core.database import Database
     
-    db = Database("monitor.db")
-    db.save_products(products)
+    db = Database.shared()                 # ledger del proceso
+    db.save_products(products)             # solo escribe lo que cambió
     cheapest = db.get_cheapest_by_category("celulares", limit=10)
+    deals = db.get_best_deals()            # cross-store, una query
+
+Historial de precios (compartido con las DBs de cada target):
+    price_history es append-only, una fila por cambio de precio, con
+    precio en centavos (INTEGER) y timestamp en epoch seconds (INTEGER).
+    La PK (source, product_id, recorded_at) ordena físicamente las filas
+    de cada producto: leer su historial es un range scan del índice.
+
+Baselines (core/baselines.py):
+    price_baselines guarda mediana/MAD de log-precio por (source,
+    categoría, marca), actualizadas en el mismo save que escribe los
+    precios. get_baselines() las sirve desde memoria para el scoring.
+
+Matching (core/matching.py):
+    product_matches asigna a cada (source, product_id) un match_key
+    (EAN, o grupo de productos equivalentes entre tiendas) al guardarlo;
+    los candidatos salen de bloques marca|modelo, nunca de un O(n²).
+
+Market index (core/market_index.py):
+    market_prices guarda el precio actual de cada producto bajo su
+    match_key. get_market_refs() devuelve el mínimo y la mediana de las
+    tiendas competidoras con un hash lookup.
+
+Arbitrage gaps:
+    arbitrage_gaps guarda, por match_key con 2+ tiendas, la tienda más
+    barata y la más cara (mejor precio de cada una) y la brecha. Cada save
+    recalcula solo los grupos que tocó; find_arbitrage() es un range scan
+    del índice por gap_pct.
 """
 
 from __future__ import annotations
 
+import os
 import sqlite3
 import logging
+import threading
+import time
 from contextlib import contextmanager
+from dataclasses import replace
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Callable, Iterable, Optional, Union
+
+from core.baselines import Baseline, BaselineStore
+from core.market_index import MarketIndex, MarketRef
+from core.matching import MatchRecord, ProductMatcher
+from core.price_cache import PriceCache, PriceDiff, chunked
 
 logger = logging.getLogger(__name__)
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Ledger compartido por todos los targets (override: ODISEO_LEDGER)
+LEDGER_ENV = "ODISEO_LEDGER"
+DEFAULT_LEDGER_PATH = os.path.join(PROJECT_ROOT, "data", "databases", "ledger.db")
+
+# Columnas opcionales por tienda (las completa el adapter de cada sniffer)
+LEDGER_EXTRA_COLUMNS = ("ean", "sku", "slug", "stock", "stock_status")
+
+# Caída de precio (%) a partir de la cual se registra una alerta
+ALERT_DROP_PCT = 5.0
+
+# Cada cuánto se leen del ledger los matches/precios de mercado de otros procesos
+MARKET_REFRESH_SECS = 60
+
+# Tuning de conexiones persistentes
+CACHE_SIZE_KB = 20_000               # page cache por conexión (~20 MB)
+MMAP_SIZE = 256 * 1024 * 1024        # lecturas vía mmap (256 MB)
+CACHED_STATEMENTS = 256              # statements preparados por conexión
+BUSY_TIMEOUT = 30.0                  # segundos esperando el lock de escritura
+
+
+# Tablas que otros procesos leen incrementalmente (refresh por número de cambio)
+CHANGE_TRACKED_TABLES = ("market_prices", "product_matches")
+
+# ============================================================================
+# PRICE HISTORY — Esquema normalizado + helpers de codificación
+# ============================================================================
+
+PRICE_HISTORY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS price_history (
+        source TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        recorded_at INTEGER NOT NULL,   -- epoch seconds
+        price_cents INTEGER NOT NULL,   -- precio * 100
+        PRIMARY KEY (source, product_id, recorded_at)
+    ) WITHOUT ROWID;
+"""
+
+
+def to_cents(price: float) -> int:
+    """Precio en pesos → centavos enteros (sin errores de float acumulados)."""
+    return int(round(float(price) * 100))
+
+
+def from_cents(cents: int) -> float:
+    return cents / 100
+
+
+def to_epoch(ts: Union[datetime, str, int, float, None] = None) -> int:
+    """datetime / ISO string / epoch → epoch seconds. None = ahora."""
+    if ts is None:
+        return int(datetime.now().timestamp())
+    if isinstance(ts, (int, float)):
+        return int(ts)
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    return int(ts.timestamp())
+
+
+def ensure_price_history(conn: sqlite3.Connection) -> None:
+    """
+    Crear price_history con el esquema compacto.
+    Si existe con el formato viejo (price REAL, recorded_at TIMESTAMP) la
+    convierte in place.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(price_history)")}
+    if columns and "price_cents" not in columns:
+        conn.execute("ALTER TABLE price_history RENAME TO price_history_legacy")
+        conn.execute("DROP INDEX IF EXISTS idx_price_history_product")
+        conn.execute(PRICE_HISTORY_SCHEMA)
+        rows = conn.execute(
+            "SELECT product_id, source, price, recorded_at FROM price_history_legacy"
+        ).fetchall()
+        append_price_history(
+            conn, ((pid, src, price, ts) for pid, src, price, ts in rows if ts)
+        )
+        conn.execute("DROP TABLE price_history_legacy")
+        logger.info(f"🔄 price_history convertido al formato compacto ({len(rows)} filas)")
+    else:
+        conn.execute(PRICE_HISTORY_SCHEMA)
+
+
+def next_seq(table: str) -> str:
+    """
+    Subquery SQL con el próximo número de cambio de `table`.
+    Se evalúa dentro de la transacción de escritura (un escritor a la vez
+    en SQLite), así que el orden de `seq` es el orden de commit: un lector
+    que ya vio hasta N nunca se pierde una fila commiteada después.
+    """
+    return f"(SELECT COALESCE(MAX(seq), 0) + 1 FROM {table})"
+
+
+def ensure_change_seq(conn: sqlite3.Connection) -> None:
+    """Columna `seq` (+ índice) en las tablas con refresh incremental."""
+    for table in CHANGE_TRACKED_TABLES:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if "seq" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_updated")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_seq ON {table}(seq)")
+
+
+def append_price_history(
+    conn: sqlite3.Connection,
+    rows: Iterable[tuple[str, str, float, Union[datetime, str, int, float, None]]],
+) -> int:
+    """
+    Agregar puntos (product_id, source, price, timestamp) en un executemany.
+    Un mismo producto no puede tener dos precios en el mismo segundo:
+    gana el último.
+    """
+    data = [
+        (source, str(product_id), to_epoch(ts), to_cents(price))
+        for product_id, source, price, ts in rows
+    ]
+    conn.executemany(
+        "INSERT OR REPLACE INTO price_history (source, product_id, recorded_at, price_cents) "
+        "VALUES (?, ?, ?, ?)",
+        data,
+    )
+    return len(data)
+
 
 class Database:
     """
-    SQLite wrapper con operaciones batch optimizadas.
+    SQLite wrapper con operaciones batch optimizadas (Unified Ledger).
     
     Features:
     - executemany para inserts masivos (hasta 100x más rápido que individual)
+    - Escrituras "solo cambios" con un PriceCache por source
+    - Conexión persistente por thread (WAL, synchronous=NORMAL, page cache,
+      mmap y statements preparados cacheados): cada query es un step, no
+      un open de archivo + parse del schema
     - Context manager para transacciones seguras
-    - Queries pre-armadas para operaciones comunes de precio
+    - Queries pre-armadas (también cross-store) para operaciones de precio
     - Compatible con in-memory DB para testing
     """
     
-    def __init__(self, db_path: str = "monitor.db"):
+    _instances: dict[str, "Database"] = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(self, db_path: str = "monitor.db", persistent: bool = True):
+        """
+        Args:
+            db_path: Archivo SQLite (o ":memory:" para tests)
+            persistent: True = una conexión long-lived por thread;
+                False = abrir/cerrar por operación (scripts one-shot)
+        """
         self.db_path = db_path
+        self.persistent = persistent
+        self._memory = db_path == ":memory:"
+        if not self._memory and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._caches: dict[str, PriceCache] = {}
+        self.baselines = BaselineStore()
+        self.market = MarketIndex()
+        self.matcher = ProductMatcher()
+        self._market_checked_at = 0.0
+        self._matcher_checked_at = 0.0
+        self._market_seq = -1           # último seq de market_prices aplicado
+        self._matcher_seq = -1          # último seq de product_matches aplicado
+        self._gaps_ready = False
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._connections: dict[threading.Thread, sqlite3.Connection] = {}
+        self._connections_lock = threading.Lock()
+        # ":memory:" es una DB distinta por conexión: se comparte una sola
+        self._memory_conn: Optional[sqlite3.Connection] = None
+        self._memory_lock = threading.RLock()
         self._init_db()
     
+    @classmethod
+    def shared(cls, db_path: Optional[str] = None) -> "Database":
+        """Ledger del proceso (uno por path), compartido entre sniffers."""
+        path = os.path.abspath(db_path or os.environ.get(LEDGER_ENV) or DEFAULT_LEDGER_PATH)
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+    
     def _init_db(self) -> None:
         """Crear tablas si no existen."""
         with self._connect() as conn:
             conn.executescript("""
                 CREATE TABLE IF NOT EXISTS products (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source TEXT NOT NULL,
                     product_id TEXT NOT NULL,
                     name TEXT NOT NULL,
                     brand TEXT DEFAULT '',
+                    category TEXT DEFAULT '',
                     current_price REAL NOT NULL,
                     list_price REAL DEFAULT 0,
+                    lowest_price REAL,
                     discount_pct REAL DEFAULT 0,
                     url TEXT DEFAULT '',
                     image_url TEXT DEFAULT '',
-                    category TEXT DEFAULT '',
-                    source TEXT NOT NULL,
                     in_stock INTEGER DEFAULT 1,
-                    scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(product_id, source, scraped_at)
+                    ean TEXT,
+                    sku TEXT,
+                    slug TEXT,
+                    stock INTEGER,
+                    stock_status TEXT,
+                    first_seen TEXT,
+                    last_seen TEXT,
+                    PRIMARY KEY (source, product_id)
+                );
+                
+                CREATE TABLE IF NOT EXISTS alerts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source TEXT NOT NULL,
+                    product_id TEXT NOT NULL,
+                    product_name TEXT DEFAULT '',
+                    alert_type TEXT NOT NULL,
+                    old_price REAL,
+                    new_price REAL,
+                    discount_pct REAL,
+                    message TEXT DEFAULT '',
+                    timestamp TEXT NOT NULL
                 );
                 
                 CREATE TABLE IF NOT EXISTS glitches (
@@ -76,32 +304,129 @@ class Database:
                     detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 );
                 
-                CREATE TABLE IF NOT EXISTS price_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                CREATE TABLE IF NOT EXISTS price_baselines (
+                    source TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    brand TEXT NOT NULL,        -- '' = toda la categoría
+                    n INTEGER NOT NULL,
+                    log_median REAL NOT NULL,
+                    log_mad REAL NOT NULL,
+                    updated_at INTEGER NOT NULL,
+                    PRIMARY KEY (source, category, brand)
+                ) WITHOUT ROWID;
+                
+                CREATE TABLE IF NOT EXISTS market_prices (
+                    source TEXT NOT NULL,
                     product_id TEXT NOT NULL,
+                    match_key TEXT NOT NULL,    -- 'ean:...' o 'name:...'
+                    price REAL NOT NULL,        -- 0 = sin stock
+                    updated_at INTEGER NOT NULL,
+                    seq INTEGER NOT NULL DEFAULT 0, -- orden de commit (refresh)
+                    PRIMARY KEY (source, product_id)
+                ) WITHOUT ROWID;
+                
+                CREATE TABLE IF NOT EXISTS product_matches (
                     source TEXT NOT NULL,
-                    price REAL NOT NULL,
-                    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    product_id TEXT NOT NULL,
+                    match_key TEXT NOT NULL,
+                    brand TEXT DEFAULT '',
+                    tokens TEXT DEFAULT '',     -- tokens normalizados (espacio)
+                    method TEXT NOT NULL,       -- 'ean' | 'fuzzy' | 'new'
+                    score REAL DEFAULT 1,
+                    updated_at INTEGER NOT NULL,
+                    seq INTEGER NOT NULL DEFAULT 0, -- orden de commit (refresh)
+                    PRIMARY KEY (source, product_id)
+                ) WITHOUT ROWID;
+                
+                CREATE INDEX IF NOT EXISTS idx_product_matches_key 
+                    ON product_matches(match_key);
+                CREATE INDEX IF NOT EXISTS idx_market_prices_key 
+                    ON market_prices(match_key);
+                
+                CREATE TABLE IF NOT EXISTS arbitrage_gaps (
+                    match_key TEXT PRIMARY KEY,
+                    name TEXT,                  -- nombre del más barato
+                    min_price REAL NOT NULL,
+                    min_source TEXT NOT NULL,
+                    max_price REAL NOT NULL,
+                    max_source TEXT NOT NULL,
+                    diff REAL NOT NULL,
+                    gap_pct REAL NOT NULL,
+                    sources INTEGER NOT NULL,
+                    updated_at INTEGER NOT NULL
                 );
                 
-                CREATE INDEX IF NOT EXISTS idx_products_source 
-                    ON products(source);
+                CREATE INDEX IF NOT EXISTS idx_arbitrage_gaps_gap 
+                    ON arbitrage_gaps(gap_pct DESC);
                 CREATE INDEX IF NOT EXISTS idx_products_category 
-                    ON products(category);
+                    ON products(category, current_price);
                 CREATE INDEX IF NOT EXISTS idx_products_price 
                     ON products(current_price);
-                CREATE INDEX IF NOT EXISTS idx_price_history_product 
-                    ON price_history(product_id, source);
+                CREATE INDEX IF NOT EXISTS idx_products_name_key 
+                    ON products(lower(trim(name)));
+                CREATE INDEX IF NOT EXISTS idx_alerts_timestamp 
+                    ON alerts(timestamp);
                 CREATE INDEX IF NOT EXISTS idx_glitches_severity 
                     ON glitches(severity);
             """)
+            ensure_price_history(conn)
+            ensure_change_seq(conn)
             logger.info(f"✅ Database inicializada: {self.db_path}")
     
+    def _open(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT,
+            cached_statements=CACHED_STATEMENTS,
+            check_same_thread=check_same_thread,
+        )
+        conn.row_factory = sqlite3.Row
+        # WAL: varios procesos (un sniffer por target) escriben el mismo ledger
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Conexión persistente del thread actual (se crea la primera vez)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False solo para poder cerrarla desde close();
+            # cada conexión la usa únicamente su thread
+            conn = self._open(check_same_thread=False)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._prune_connections()
+                self._connections[threading.current_thread()] = conn
+        return conn
+    
+    def _prune_connections(self) -> None:
+        """Cerrar las conexiones de threads que ya terminaron (llamar con el lock)."""
+        for thread in [t for t in self._connections if not t.is_alive()]:
+            try:
+                self._connections.pop(thread).close()
+            except sqlite3.Error:
+                pass
+    
     @contextmanager
     def _connect(self):
-        """Context manager para conexiones seguras."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Context manager para conexiones seguras (commit / rollback)."""
+        if self._memory:
+            with self._memory_lock:
+                if self._memory_conn is None:
+                    self._memory_conn = self._open(check_same_thread=False)
+                conn = self._memory_conn
+                try:
+                    yield conn
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            return
+        
+        conn = self._conn() if self.persistent else self._open()
         try:
             yield conn
             conn.commit()
@@ -109,59 +434,407 @@ class Database:
             conn.rollback()
             raise
         finally:
-            conn.close()
+            if not self.persistent:
+                conn.close()
+    
+    def close(self) -> None:
+        """Cerrar todas las conexiones persistentes (de todos los threads)."""
+        with self._connections_lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+        with self._memory_lock:
+            if self._memory_conn is not None:
+                self._memory_conn.close()
+                self._memory_conn = None
     
     # ========================================================================
     # WRITE OPERATIONS
     # Ref: python-performance-optimization — executemany para batch inserts
     # ========================================================================
     
-    def save_products(self, products: list[Any]) -> int:
+    @staticmethod
+    def default_extras(product: Any) -> dict:
+        """Adapter default: columnas opcionales tomadas de raw_data."""
+        raw = product.raw_data or {}
+        return {col: raw[col] for col in LEDGER_EXTRA_COLUMNS if col in raw}
+    
+    def _price_cache(self, conn: sqlite3.Connection, source: str) -> PriceCache:
+        """PriceCache de un source, cargado de la DB la primera vez."""
+        cache = self._caches.get(source)
+        if cache is None:
+            cache = PriceCache()
+            loaded = cache.load(
+                (row[0], row[1], (bool(row[2]), row[3], row[4]))
+                for row in conn.execute(
+                    "SELECT product_id, current_price, in_stock, stock, stock_status "
+                    "FROM products WHERE source = ?",
+                    (source,),
+                )
+            )
+            self._caches[source] = cache
+            logger.info(f"🧮 Cache de precios {source}: {loaded} productos")
+        return cache
+    
+    def _baseline_store(self, conn: sqlite3.Connection, source: str) -> BaselineStore:
+        """Baselines de un source, cargadas de la DB la primera vez."""
+        if not self.baselines.is_loaded(source):
+            loaded = self.baselines.load(source, conn.execute(
+                "SELECT category, brand, n, log_median, log_mad, updated_at "
+                "FROM price_baselines WHERE source = ?",
+                (source,),
+            ))
+            logger.info(f"📏 Baselines {source}: {loaded} claves")
+        return self.baselines
+    
+    def save_products(
+        self,
+        products: list[Any],
+        extras_of: Optional[Callable[[Any], dict]] = None,
+        alert_drop_pct: float = ALERT_DROP_PCT,
+    ) -> PriceDiff:
         """
-        Guardar productos en batch (hasta 100x más rápido que individual).
+        Guardar productos en batch, escribiendo solo lo que cambió.
+        
+        Nuevos → INSERT; precio/stock distinto → UPDATE + punto en
+        price_history (+ alerta si cayó más de `alert_drop_pct`); sin
+        cambios → solo last_seen. Un executemany por grupo. Cada precio
+        nuevo actualiza la baseline de su (categoría, marca), su match_key,
+        el precio de mercado de ese match_key y la brecha de arbitraje de
+        los grupos afectados.
         
         Args:
-            products: Lista de Product dataclasses
+            products: Lista de Product dataclasses (precio <= 0 se ignora,
+                salvo los agotados ya guardados: quedan con su último precio
+                y sin stock)
+            extras_of: Adapter Product → {ean, sku, slug, stock, stock_status}
+            alert_drop_pct: Caída mínima (%) para registrar alerta
             
         Returns:
-            Cantidad de productos guardados
+            PriceDiff con nuevos / cambiados (y precio anterior) / sin cambios
         """
-        if not products:
-            return 0
+        extras_of = extras_of or self.default_extras
+        extras = {p.id: extras_of(p) for p in products if p.current_price > 0 or not p.in_stock}
         
-        data = [
-            (
-                p.id, p.name, p.brand, p.current_price, p.list_price,
-                p.discount_pct, p.url, p.image_url, p.category, p.source,
-                p.in_stock, p.scraped_at.isoformat() if hasattr(p.scraped_at, 'isoformat') 
-                else str(p.scraped_at)
+        def stock_of(p: Any) -> tuple:
+            e = extras[p.id]
+            return (bool(p.in_stock), e.get("stock"), e.get("stock_status"))
+        
+        by_source: dict[str, list[Any]] = {}
+        sold_out: dict[str, list[Any]] = {}
+        for p in products:
+            if p.current_price > 0:
+                by_source.setdefault(p.source, []).append(p)
+            elif not p.in_stock:
+                sold_out.setdefault(p.source, []).append(p)
+        
+        total = PriceDiff()
+        now = datetime.now().isoformat()
+        # Antes del primer save incremental: las brechas de lo ya guardado
+        self._ensure_gaps()
+        
+        with self._write_lock, self._connect() as conn:
+            # Agotado sin precio publicado: se marca sin stock con el último
+            # precio conocido (si no, el mercado seguiría viendo el precio viejo)
+            for source, items in sold_out.items():
+                cache = self._price_cache(conn, source)
+                by_source.setdefault(source, []).extend(
+                    replace(p, current_price=price) for p in items
+                    if (price := cache.get_price(p.id)) is not None
+                )
+            
+            diffs = []
+            for source, items in by_source.items():
+                diff = self._price_cache(conn, source).split(items, stock_of=stock_of)
+                self._write_diff(conn, source, diff, extras, now, alert_drop_pct)
+                staged = self._baseline_store(conn, source).stage(
+                    source, diff.new + [p for p, _ in diff.repriced]
+                )
+                self._write_baselines(conn, source, staged.values())
+                matches = self._write_matches(conn, source, diff.to_write, extras, now)
+                market_rows, touched = self._write_market_prices(conn, source, diff, matches, now)
+                self._write_gaps(conn, touched, now)
+                diffs.append((source, diff, staged, matches, market_rows))
+            conn.commit()
+            
+            # Recién con el commit hecho el cache refleja la DB
+            for source, diff, staged, matches, market_rows in diffs:
+                self._caches[source].update(diff.to_write, stock_of=stock_of)
+                self.baselines.apply(source, staged)
+                for record in matches.values():
+                    if record is not self.matcher.get(source, record.product_id):
+                        self.matcher.add(record)
+                if self.market.loaded:
+                    self.market.apply(market_rows)
+                total.new.extend(diff.new)
+                total.changed.extend(diff.changed)
+                total.unchanged.extend(diff.unchanged)
+        
+        logger.info(
+            f"💾 {len(total.new)} nuevos, {len(total.changed)} actualizados, "
+            f"{len(total.unchanged)} sin cambios → {self.db_path}"
+        )
+        return total
+    
+    @staticmethod
+    def _write_diff(
+        conn: sqlite3.Connection,
+        source: str,
+        diff: PriceDiff,
+        extras: dict[str, dict],
+        now: str,
+        alert_drop_pct: float,
+    ) -> None:
+        def row(p: Any) -> tuple:
+            e = extras[p.id]
+            return (
+                p.name, p.brand, p.category, p.current_price, p.list_price,
+                p.discount_pct, p.url, p.image_url, int(bool(p.in_stock)),
+                e.get("ean"), e.get("sku"), e.get("slug"), e.get("stock"), e.get("stock_status"),
+            )
+        
+        conn.executemany("""
+            INSERT INTO products
+            (name, brand, category, current_price, list_price, discount_pct,
+             url, image_url, in_stock, ean, sku, slug, stock, stock_status,
+             lowest_price, first_seen, last_seen, source, product_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [row(p) + (p.current_price, now, now, source, p.id) for p in diff.new])
+        
+        conn.executemany("""
+            UPDATE products SET
+                name = ?, brand = ?, category = ?, current_price = ?, list_price = ?,
+                discount_pct = ?, url = ?, image_url = ?, in_stock = ?,
+                ean = COALESCE(?, ean), sku = COALESCE(?, sku), slug = COALESCE(?, slug),
+                stock = ?, stock_status = ?,
+                lowest_price = MIN(?, COALESCE(lowest_price, ?)), last_seen = ?
+            WHERE source = ? AND product_id = ?
+        """, [
+            row(p) + (p.current_price, p.current_price, now, source, p.id)
+            for p, _ in diff.changed
+        ])
+        
+        conn.executemany(
+            "UPDATE products SET last_seen = ? WHERE source = ? AND product_id = ?",
+            [(now, source, p.id) for p in diff.unchanged],
+        )
+        
+        repriced = diff.repriced
+        alerts = []
+        for p, old_price in repriced:
+            if old_price > 0:
+                change_pct = (p.current_price - old_price) / old_price * 100
+                if change_pct < 0 and -change_pct >= alert_drop_pct:
+                    alerts.append((
+                        source, p.id, p.name, old_price, p.current_price,
+                        abs(change_pct), f"Bajó {abs(change_pct):.1f}%", now,
+                    ))
+        conn.executemany("""
+            INSERT INTO alerts (source, product_id, product_name, alert_type,
+                old_price, new_price, discount_pct, message, timestamp)
+            VALUES (?, ?, ?, 'price_drop', ?, ?, ?, ?, ?)
+        """, alerts)
+        
+        append_price_history(conn, (
+            (p.id, source, p.current_price, now)
+            for p in diff.new + [p for p, _ in repriced]
+        ))
+    
+    @staticmethod
+    def _write_baselines(
+        conn: sqlite3.Connection, source: str, baselines: Iterable[Baseline]
+    ) -> None:
+        conn.executemany("""
+            INSERT OR REPLACE INTO price_baselines
+            (source, category, brand, n, log_median, log_mad, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (source, b.category, b.brand, b.n, b.log_median, b.log_mad, b.updated_at)
+            for b in baselines
+        ])
+    
+    def _write_matches(
+        self,
+        conn: sqlite3.Connection,
+        source: str,
+        products: list[Any],
+        extras: dict[str, dict],
+        now: str,
+    ) -> dict[str, MatchRecord]:
+        """match_key de cada producto (persistiendo solo las asignaciones nuevas)."""
+        matcher = self._sync_matcher(conn)
+        updated_at = to_epoch(now)
+        matches = {
+            p.id: matcher.match(
+                source, p.id, p.name, p.brand, extras[p.id].get("ean"), now=updated_at
             )
             for p in products
+        }
+        changed = [
+            record for record in matches.values()
+            if record is not matcher.get(source, record.product_id)
         ]
+        conn.executemany(f"""
+            INSERT OR REPLACE INTO product_matches
+            (source, product_id, match_key, brand, tokens, method, score, updated_at, seq)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, {next_seq("product_matches")})
+        """, [record.as_row() for record in changed])
+        return matches
+    
+    def _sync_matcher(self, conn: sqlite3.Connection, force: bool = False) -> ProductMatcher:
+        """
+        Cargar el índice de matcheo (la primera vez: todo, backfilleando
+        ledgers viejos) y traer cada MARKET_REFRESH_SECS lo que escribieron
+        otros procesos.
+        """
+        matcher = self.matcher
+        if matcher.loaded and not force and (
+            time.monotonic() - self._matcher_checked_at < MARKET_REFRESH_SECS
+        ):
+            return matcher
+        self._matcher_checked_at = time.monotonic()
+        if not matcher.loaded:
+            self._backfill_matches(conn)
+        rows = conn.execute(
+            "SELECT source, product_id, match_key, brand, tokens, method, score, updated_at, seq "
+            "FROM product_matches WHERE seq > ? ORDER BY seq",
+            (self._matcher_seq,),
+        ).fetchall()
+        if rows:
+            self._matcher_seq = rows[-1]["seq"]
+        matcher.load(row[:-1] for row in rows)
+        if not matcher.loaded:
+            matcher.loaded = True
+            logger.info(f"🔗 Matching: {len(matcher)} productos indexados")
+        return matcher
+    
+    def _backfill_matches(self, conn: sqlite3.Connection) -> None:
+        """Ledgers anteriores al matching: asignar match_key a todo products."""
+        if conn.execute("SELECT 1 FROM product_matches LIMIT 1").fetchone():
+            return
+        matcher = self.matcher
+        rows = []
+        for source, pid, name, brand, ean, first_seen in conn.execute(
+            "SELECT source, product_id, name, brand, ean, first_seen FROM products "
+            "ORDER BY first_seen"
+        ):
+            record = matcher.match(source, pid, name, brand, ean, now=to_epoch(first_seen))
+            matcher.add(record)
+            rows.append(record.as_row())
+        conn.executemany(
+            "INSERT OR IGNORE INTO product_matches "
+            "(source, product_id, match_key, brand, tokens, method, score, updated_at, seq) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, {next_seq('product_matches')})",
+            rows,
+        )
+        if rows:
+            logger.info(f"🔗 Matching: {len(rows)} productos matcheados desde products")
+    
+    @staticmethod
+    def _write_market_prices(
+        conn: sqlite3.Connection,
+        source: str,
+        diff: PriceDiff,
+        matches: dict[str, MatchRecord],
+        now: str,
+    ) -> tuple[list[tuple], set[str]]:
+        """
+        Precio de mercado de lo nuevo/cambiado (0 si quedó sin stock).
         
-        with self._connect() as conn:
-            conn.executemany("""
-                INSERT OR REPLACE INTO products 
-                (product_id, name, brand, current_price, list_price,
-                 discount_pct, url, image_url, category, source,
-                 in_stock, scraped_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, data)
-            
-            # También guardar en historial de precios
-            price_data = [
-                (p.id, p.source, p.current_price,
-                 p.scraped_at.isoformat() if hasattr(p.scraped_at, 'isoformat')
-                 else str(p.scraped_at))
-                for p in products
-            ]
-            conn.executemany("""
-                INSERT INTO price_history (product_id, source, price, recorded_at)
-                VALUES (?, ?, ?, ?)
-            """, price_data)
+        Returns:
+            (filas escritas, match_keys afectados: los nuevos y los que
+            dejaron los productos que cambiaron de grupo)
+        """
+        updated_at = to_epoch(now)
+        rows = [
+            (
+                source, p.id, matches[p.id].match_key,
+                p.current_price if p.in_stock else 0.0, updated_at,
+            )
+            for p in diff.to_write
+        ]
+        touched = {row[2] for row in rows}
+        for batch in chunked([row[1] for row in rows]):
+            placeholders = ",".join("?" * len(batch))
+            touched.update(key for (key,) in conn.execute(
+                f"SELECT match_key FROM market_prices "
+                f"WHERE source = ? AND product_id IN ({placeholders})",
+                (source, *batch),
+            ))
+        conn.executemany(f"""
+            INSERT OR REPLACE INTO market_prices
+            (source, product_id, match_key, price, updated_at, seq)
+            VALUES (?, ?, ?, ?, ?, {next_seq("market_prices")})
+        """, rows)
+        return rows, touched
+    
+    @staticmethod
+    def _write_gaps(conn: sqlite3.Connection, keys: Iterable[str], now: str) -> int:
+        """
+        Recalcular la brecha de arbitraje de los grupos `keys` (solo esos).
+        
+        Cada tienda cuenta con su mejor precio del grupo; la brecha es entre
+        la tienda más barata y la más cara. Grupos con una sola tienda (o
+        sin diferencia) salen de arbitrage_gaps.
+        """
+        keys = list(keys)
+        best: dict[str, dict[str, tuple[float, str]]] = {}
+        for batch in chunked(keys):
+            placeholders = ",".join("?" * len(batch))
+            for key, source, price, name in conn.execute(f"""
+                SELECT mp.match_key, mp.source, mp.price, p.name
+                FROM market_prices mp
+                JOIN products p
+                  ON p.source = mp.source AND p.product_id = mp.product_id
+                WHERE mp.match_key IN ({placeholders}) AND mp.price > 0
+            """, batch):
+                by_source = best.setdefault(key, {})
+                if source not in by_source or price < by_source[source][0]:
+                    by_source[source] = (price, name)
+        
+        updated_at = to_epoch(now)
+        rows = []
+        for key, by_source in best.items():
+            if len(by_source) < 2:
+                continue
+            min_source = min(by_source, key=lambda s: by_source[s][0])
+            max_source = max(by_source, key=lambda s: by_source[s][0])
+            (min_price, name), (max_price, _) = by_source[min_source], by_source[max_source]
+            if max_price <= min_price:
+                continue
+            rows.append((
+                key, name, min_price, min_source, max_price, max_source,
+                max_price - min_price, round((max_price / min_price - 1) * 100, 1),
+                len(by_source), updated_at,
+            ))
         
-        logger.info(f"💾 {len(data)} productos guardados en {self.db_path}")
-        return len(data)
+        gapped = {row[0] for row in rows}
+        conn.executemany(
+            "DELETE FROM arbitrage_gaps WHERE match_key = ?",
+            [(key,) for key in keys if key not in gapped],
+        )
+        conn.executemany("""
+            INSERT OR REPLACE INTO arbitrage_gaps
+            (match_key, name, min_price, min_source, max_price, max_source,
+             diff, gap_pct, sources, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        return len(rows)
+    
+    def save_alert(
+        self, source: str, product_id: str, alert_type: str, message: str = "",
+        product_name: str = "", old_price: Optional[float] = None,
+        new_price: Optional[float] = None,
+    ) -> None:
+        """Registrar una alerta puntual (oportunidad, glitch, etc.)."""
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO alerts (source, product_id, product_name, alert_type,
+                    old_price, new_price, message, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (source, product_id, product_name, alert_type,
+                  old_price, new_price, message, datetime.now().isoformat()))
     
     def save_glitch(self, glitch: Any) -> None:
         """Guardar un glitch detectado."""
@@ -189,7 +862,7 @@ class Database:
         """Los N productos más baratos de una categoría."""
         query = """
             SELECT product_id, name, brand, current_price, list_price,
-                   discount_pct, url, source, scraped_at
+                   discount_pct, url, source, last_seen
             FROM products
             WHERE category = ? AND current_price > 0
         """
@@ -244,28 +917,161 @@ class Database:
             """, (product_name_like,)).fetchall()
             return [dict(row) for row in rows]
     
-    def get_price_history(self, product_id: str, source: str) -> list[dict]:
-        """Historial de precios de un producto específico."""
+    def get_price_history(
+        self, product_id: str, source: str, limit: Optional[int] = 100
+    ) -> list[dict]:
+        """Historial de precios de un producto específico (más reciente primero)."""
+        query = """
+            SELECT price_cents / 100.0 AS price,
+                   datetime(recorded_at, 'unixepoch', 'localtime') AS recorded_at
+            FROM price_history
+            WHERE source = ? AND product_id = ?
+            ORDER BY recorded_at DESC
+        """
+        params: list[Any] = [source, product_id]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        
         with self._connect() as conn:
-            rows = conn.execute("""
-                SELECT price, recorded_at
-                FROM price_history
-                WHERE product_id = ? AND source = ?
-                ORDER BY recorded_at DESC
-                LIMIT 100
-            """, (product_id, source)).fetchall()
+            rows = conn.execute(query, params).fetchall()
             return [dict(row) for row in rows]
     
     def get_previous_price(self, product_id: str, source: str) -> Optional[float]:
         """Obtener el precio anterior de un producto (para detectar caídas)."""
         with self._connect() as conn:
             row = conn.execute("""
-                SELECT price FROM price_history
-                WHERE product_id = ? AND source = ?
+                SELECT price_cents FROM price_history
+                WHERE source = ? AND product_id = ?
                 ORDER BY recorded_at DESC
                 LIMIT 1 OFFSET 1
-            """, (product_id, source)).fetchone()
-            return row["price"] if row else None
+            """, (source, product_id)).fetchone()
+            return from_cents(row["price_cents"]) if row else None
+    
+    def get_previous_prices(self, source: str, product_ids: Iterable[str]) -> dict[str, float]:
+        """
+        Último precio guardado de muchos productos de una vez.
+        
+        Pensado para llamarse ANTES de guardar una página: lo que está en el
+        ledger es el precio anterior al que acaba de scrapearse. Sale del
+        PriceCache del source si ya está cargado (sin I/O); si no, de queries
+        `IN (...)` de a SQLITE_MAX_VARS ids. Los productos nuevos no aparecen.
+        """
+        ids = list(dict.fromkeys(str(pid) for pid in product_ids))
+        cache = self._caches.get(source)
+        if cache is not None:
+            return {
+                pid: price for pid in ids
+                if (price := cache.get_price(pid)) is not None
+            }
+        
+        prices: dict[str, float] = {}
+        with self._connect() as conn:
+            for batch in chunked(ids):
+                placeholders = ",".join("?" * len(batch))
+                prices.update(conn.execute(
+                    f"SELECT product_id, current_price FROM products "
+                    f"WHERE source = ? AND product_id IN ({placeholders})",
+                    [source, *batch],
+                ).fetchall())
+        return prices
+    
+    def get_baselines(self, source: str, products: Iterable[Any]) -> dict[str, Baseline]:
+        """
+        Baseline madura de cada producto (marca → categoría), por id.
+        O(1) por producto: sale de memoria (se carga una vez por source).
+        """
+        if not self.baselines.is_loaded(source):
+            with self._write_lock, self._connect() as conn:
+                self._baseline_store(conn, source)
+        baselines = {}
+        for p in products:
+            baseline = self.baselines.lookup(source, p.category, p.brand)
+            if baseline is not None:
+                baselines[p.id] = baseline
+        return baselines
+    
+    def refresh_market(self, force: bool = False) -> int:
+        """
+        Traer al índice en memoria los precios de mercado escritos desde la
+        última lectura (también por otros procesos). La primera vez carga todo.
+        """
+        if not force and self.market.loaded and (
+            time.monotonic() - self._market_checked_at < MARKET_REFRESH_SECS
+        ):
+            return 0
+        with self._write_lock, self._connect() as conn:
+            self._market_checked_at = time.monotonic()
+            self._sync_matcher(conn, force=force)
+            if not self.market.loaded:
+                self._backfill_market(conn)
+            rows = conn.execute(
+                "SELECT source, product_id, match_key, price, updated_at, seq "
+                "FROM market_prices WHERE seq > ? ORDER BY seq",
+                (self._market_seq,),
+            ).fetchall()
+            if rows:
+                self._market_seq = rows[-1]["seq"]
+            applied = self.market.apply(row[:-1] for row in rows)
+            if not self.market.loaded:
+                self.market.loaded = True
+                logger.info(f"🏷️ Market index: {len(self.market)} precios de referencia")
+        return applied
+    
+    @staticmethod
+    def _backfill_market(conn: sqlite3.Connection) -> None:
+        """Ledgers anteriores al market index: poblarlo desde products."""
+        if conn.execute("SELECT 1 FROM market_prices LIMIT 1").fetchone():
+            return
+        rows = [
+            (source, pid, key, price if in_stock else 0.0, to_epoch(last_seen))
+            for source, pid, key, price, in_stock, last_seen in conn.execute(
+                "SELECT p.source, p.product_id, m.match_key, p.current_price, "
+                "       p.in_stock, p.last_seen "
+                "FROM products p JOIN product_matches m "
+                "  ON m.source = p.source AND m.product_id = p.product_id"
+            )
+        ]
+        conn.executemany(
+            "INSERT OR IGNORE INTO market_prices "
+            "(source, product_id, match_key, price, updated_at, seq) "
+            f"VALUES (?, ?, ?, ?, ?, {next_seq('market_prices')})",
+            rows,
+        )
+        if rows:
+            logger.info(f"🏷️ Market index: {len(rows)} precios cargados desde products")
+    
+    def get_market_refs(
+        self,
+        source: str,
+        products: Iterable[Any],
+        extras_of: Optional[Callable[[Any], dict]] = None,
+    ) -> dict[str, MarketRef]:
+        """
+        Referencia de mercado (mínimo/mediana de las otras tiendas) por id.
+        
+        Los productos ya guardados usan su match_key de product_matches;
+        los nuevos se matchean al vuelo (sin persistir) contra el índice.
+        
+        Args:
+            source: Tienda que pregunta (se excluye de la referencia)
+            products: Productos a valuar
+            extras_of: Adapter Product → extras (para el EAN de los nuevos)
+        """
+        # El lock se toma solo para sincronizar los índices con la DB
+        self.refresh_market()
+        extras_of = extras_of or self.default_extras
+        refs = {}
+        # Matcheo sin lock: match() no modifica el índice, y un save
+        # concurrente (add/apply) no rompe estas lecturas (ver ProductMatcher)
+        for p in products:
+            record = self.matcher.get(source, p.id) or self.matcher.match(
+                source, p.id, p.name, p.brand, extras_of(p).get("ean")
+            )
+            ref = self.market.reference(record.match_key, source)
+            if ref is not None:
+                refs[p.id] = ref
+        return refs
     
     def get_recent_glitches(self, hours: int = 24, limit: int = 50) -> list[dict]:
         """Glitches detectados en las últimas N horas."""
@@ -278,6 +1084,85 @@ class Database:
             """, (f"-{hours} hours", limit)).fetchall()
             return [dict(row) for row in rows]
     
+    # ========================================================================
+    # CROSS-STORE — Una query indexada en vez de abrir una DB por tienda
+    # ========================================================================
+    
+    def get_source_stats(self) -> list[dict]:
+        """Productos y descuento máximo por tienda."""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT source, COUNT(*) AS products, MAX(discount_pct) AS max_discount,
+                       MAX(last_seen) AS last_seen
+                FROM products
+                GROUP BY source
+                ORDER BY products DESC
+            """).fetchall()
+            return [dict(row) for row in rows]
+    
+    def get_best_deals(
+        self, min_price: float = 50_000, per_source: int = 10, limit: int = 20
+    ) -> list[dict]:
+        """Los mejores descuentos de cada tienda (top `per_source`), mezclados."""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT source, product_id, name, brand, current_price, list_price,
+                       discount_pct, list_price - current_price AS savings, url
+                FROM (
+                    SELECT *, ROW_NUMBER() OVER (
+                        PARTITION BY source ORDER BY discount_pct DESC
+                    ) AS rank_in_source
+                    FROM products
+                    WHERE current_price > ?
+                )
+                WHERE rank_in_source <= ?
+                ORDER BY discount_pct DESC
+                LIMIT ?
+            """, (min_price, per_source, limit)).fetchall()
+            return [dict(row) for row in rows]
+    
+    def find_arbitrage(
+        self, min_price: float = 100_000, min_gap_pct: float = 5.0, limit: int = 15
+    ) -> list[dict]:
+        """
+        Mismo producto (mismo match_key de product_matches) en 2+ tiendas
+        con precios distintos: la tienda más barata y la más cara de cada
+        grupo, de mayor a menor brecha.
+        
+        Lee arbitrage_gaps (mantenida en cada save): recorre el índice por
+        gap_pct y corta en `limit`, sin re-agrupar el catálogo.
+        """
+        self._ensure_gaps()
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT match_key, name, min_price, min_source, max_price, max_source,
+                       diff, gap_pct, sources, updated_at
+                FROM arbitrage_gaps
+                WHERE gap_pct > ? AND min_price > ?
+                ORDER BY gap_pct DESC
+                LIMIT ?
+            """, (min_gap_pct, min_price, limit)).fetchall()
+            return [dict(row) for row in rows]
+    
+    def _ensure_gaps(self) -> None:
+        """Ledgers anteriores a arbitrage_gaps: calcularla completa una vez."""
+        if self._gaps_ready:
+            return
+        with self._write_lock, self._connect() as conn:
+            if not conn.execute("SELECT 1 FROM arbitrage_gaps LIMIT 1").fetchone():
+                self._sync_matcher(conn)
+                self._backfill_market(conn)
+                keys = [key for (key,) in conn.execute("""
+                    SELECT match_key FROM market_prices
+                    WHERE price > 0
+                    GROUP BY match_key
+                    HAVING COUNT(DISTINCT source) > 1
+                """)]
+                gaps = self._write_gaps(conn, keys, datetime.now().isoformat())
+                if gaps:
+                    logger.info(f"💰 Arbitraje: {gaps} brechas calculadas desde market_prices")
+        self._gaps_ready = True
+    
     def get_stats(self) -> dict:
         """Estadísticas generales de la base de datos."""
         with self._connect() as conn:
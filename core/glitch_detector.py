@@ -0,0 +1,91 @@
+"""
+⚡ Glitch Detector — Detección vectorizada por página/ciclo
+
+Extraído de:
+- python-performance-optimization skill (vectorizar loops numéricos con NumPy)
+
+detect_glitch() evalúa un producto por vez (llamadas Python + f-strings):
+bien para 20 items, caro para barridas de decenas de miles. Acá las
+heurísticas se evalúan sobre columnas (precio actual, lista, descuento,
+anterior) de toda una página en una pasada NumPy.
+
+El resultado es idéntico al camino escalar por construcción: la máscara
+vectorizada es un SUPERSET conservador de los hits (márgenes chicos en los
+bordes de redondeo) y cada candidato se confirma con el detect_glitch()
+escalar, que es quien arma el Glitch. Solo se construyen Glitch para hits.
+
+NumPy es opcional: sin él, BaseSniffer vuelve al loop escalar.
+
+Las máscaras por regla viven en core/glitch_rules.py (candidates()).
+
+Uso:
+    cols = PriceColumns.from_products(products, previous_prices)
+    mask = engine.ruleset("fravega", category).candidates(cols)
+    for i in np.flatnonzero(mask): ...
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy es opcional
+    np = None
+
+if TYPE_CHECKING:
+    from core.base_sniffer import Product
+    from core.baselines import Baseline
+
+HAS_NUMPY = np is not None
+
+# Margen (en puntos %) para no perder candidatos por redondeo:
+# calculated_discount redondea a 1 decimal (±0.05) antes de comparar
+ROUNDING_MARGIN = 0.1
+# Margen para comparaciones sin redondeo (diferencias de orden de operaciones)
+FLOAT_MARGIN = 1e-9
+
+
+@dataclass
+class PriceColumns:
+    """Columnas float64 de una página (mismo orden que `products`)."""
+    current: Any
+    list: Any
+    discount: Any
+    previous: Any
+    # Baseline (core/baselines.py) de cada producto; NaN si no tiene
+    baseline_log_median: Any = None
+    baseline_scale: Any = None
+
+    @property
+    def has_baseline(self):
+        return ~np.isnan(self.baseline_log_median)
+
+    def __len__(self) -> int:
+        return len(self.current)
+
+    @classmethod
+    def from_products(
+        cls,
+        products: list["Product"],
+        previous_prices: dict[str, float],
+        baselines: Optional[dict[str, "Baseline"]] = None,
+    ) -> "PriceColumns":
+        n = len(products)
+        current = np.fromiter((p.current_price for p in products), dtype=np.float64, count=n)
+        list_ = np.fromiter((p.list_price for p in products), dtype=np.float64, count=n)
+        discount = np.fromiter((p.discount_pct for p in products), dtype=np.float64, count=n)
+        previous = np.fromiter(
+            (previous_prices.get(p.id, 0.0) or 0.0 for p in products), dtype=np.float64, count=n
+        )
+        baselines = baselines or {}
+        log_median = np.full(n, np.nan)
+        scale = np.full(n, np.nan)
+        for i, p in enumerate(products):
+            baseline = baselines.get(p.id)
+            if baseline is not None:
+                log_median[i] = baseline.log_median
+                scale[i] = baseline.scale
+        return cls(current, list_, discount, previous, log_median, scale)
+
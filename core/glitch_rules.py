@@ -0,0 +1,608 @@
+"""
+📐 Glitch Rules — Motor de reglas declarativo para detección de glitches
+
+Las heurísticas (umbrales de descuento, precio mínimo, caídas vs precio
+anterior, filtros de oportunidad) viven en data/glitch_rules.json en vez
+de estar hardcodeadas en cada sniffer:
+
+    {
+      "default": {"rules": [ {"name": ..., "type": "discount", "min_pct": 40}, ... ]},
+      "targets": {
+        "fravega": {
+          "prepend": [ ...reglas que corren antes de las default... ],
+          "opportunity": {"gap_min_pct": 18, "margin_min_pct": 10, "cost_pct": 5},
+          "categories": {"computacion": {"rules": {"descuento_extremo": {"min_pct": 50}}}}
+        }
+      }
+    }
+
+- Cada (perfil, categoría) se compila una vez a un RuleSet: tupla de
+  reglas con los parámetros ya resueltos (la categoría matchea por prefijo,
+  gana el más largo).
+- Hot reload: si cambia el mtime del archivo, se recompila sin reiniciar
+  el daemon. Si el archivo nuevo es inválido, se loguea y se siguen usando
+  las reglas anteriores.
+- Stats por regla (evaluados, hits, tiempo) para detectar reglas caras o
+  ruidosas: engine.stats() / engine.log_stats().
+- Baselines (core/baselines.py): la regla "baseline_outlier" compara el
+  precio con la mediana/MAD de su (categoría, marca); cualquier regla con
+  "defer_to_baseline": true se saltea cuando el producto tiene baseline
+  madura (e.g. el mínimo absoluto de $1000 en categorías baratas).
+
+Cada tipo de regla tiene su check() escalar y su candidates() vectorizado
+(superset conservador, ver core/glitch_detector.py).
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+from core.glitch_detector import FLOAT_MARGIN, ROUNDING_MARGIN, PriceColumns, np
+
+if TYPE_CHECKING:
+    from core.base_sniffer import Glitch, Product
+    from core.baselines import Baseline
+
+logger = logging.getLogger("core.glitch_rules")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULES_ENV = "ODISEO_GLITCH_RULES"
+DEFAULT_RULES_PATH = os.path.join(PROJECT_ROOT, "data", "glitch_rules.json")
+RELOAD_INTERVAL = 5.0   # Segundos entre chequeos de mtime
+
+# Reglas si no existe data/glitch_rules.json (las históricas del BaseSniffer)
+DEFAULT_CONFIG: dict = {
+    "default": {
+        "rules": [
+            {"name": "descuento_extremo", "type": "discount", "min_pct": 40,
+             "high_pct": 60, "severity": "medium"},
+            {"name": "precio_absurdo", "type": "price_below", "max_price": 1000,
+             "severity": "critical", "defer_to_baseline": True},
+            {"name": "caida_vs_anterior", "type": "drop_vs_previous", "min_pct": 50,
+             "severity": "high"},
+            {"name": "fuera_de_baseline", "type": "baseline_outlier", "max_z": 4.0,
+             "severity": "high"},
+        ],
+    },
+    "targets": {},
+}
+
+
+# ============================================================================
+# TIPOS DE REGLA
+# ============================================================================
+
+RULE_TYPES: dict[str, type["GlitchRule"]] = {}
+
+
+def rule_type(name: str):
+    """Registrar un tipo de regla para usar en el JSON ("type": name)."""
+    def register(cls):
+        cls.TYPE = name
+        RULE_TYPES[name] = cls
+        return cls
+    return register
+
+
+class GlitchRule:
+    """
+    Regla compilada: parámetros resueltos + check escalar + máscara NumPy.
+
+    `reason` es un template con {price}, {list_price}, {previous},
+    {discount}, {drop}, {rise}, {z}, {median} o {scope} según el tipo.
+    Con `defer_to_baseline`, la regla no corre si el producto tiene
+    baseline madura.
+    """
+    TYPE = ""
+    REASON = ""
+
+    def __init__(
+        self,
+        name: str,
+        severity: str = "high",
+        reason: Optional[str] = None,
+        defer_to_baseline: bool = False,
+        **params,
+    ):
+        self.name = name
+        self.severity = severity
+        self.reason = reason or self.REASON
+        self.defer_to_baseline = bool(defer_to_baseline)
+        self.configure(**params)
+
+    def configure(self, **params) -> None:
+        if params:
+            raise ValueError(f"Parámetros desconocidos para '{self.TYPE}': {sorted(params)}")
+
+    def check(
+        self, product: "Product", previous_price: float, baseline: Optional["Baseline"] = None
+    ) -> Optional["Glitch"]:
+        raise NotImplementedError
+
+    def candidates(self, cols: PriceColumns):
+        raise NotImplementedError
+
+    def _glitch(self, product, previous_price, severity=None, drop_pct=0.0, **values) -> "Glitch":
+        from core.base_sniffer import Glitch
+        return Glitch(
+            product=product,
+            reason=self.reason.format(
+                price=product.current_price,
+                list_price=product.list_price,
+                previous=previous_price,
+                **values,
+            ),
+            severity=severity or self.severity,
+            previous_price=previous_price,
+            drop_pct=drop_pct,
+        )
+
+
+@rule_type("discount")
+class DiscountRule(GlitchRule):
+    """Descuento vs precio de lista >= min_pct (>= high_pct → high)."""
+    REASON = "Descuento extremo: {discount}% off (lista: ${list_price:,.0f})"
+
+    def configure(self, min_pct: float = 40.0, high_pct: Optional[float] = None, **params):
+        super().configure(**params)
+        self.min_pct = float(min_pct)
+        self.high_pct = float(high_pct) if high_pct is not None else None
+
+    def check(self, product, previous_price, baseline=None):
+        if product.list_price > 0:
+            discount = product.calculated_discount
+            if discount >= self.min_pct:
+                escalated = self.high_pct is not None and discount >= self.high_pct
+                return self._glitch(
+                    product, previous_price,
+                    severity="high" if escalated else None,
+                    drop_pct=discount, discount=discount,
+                )
+        return None
+
+    def candidates(self, cols):
+        c, l = cols.current, cols.list
+        with np.errstate(divide="ignore", invalid="ignore"):
+            discount = np.where(c > 0, (1 - c / l) * 100, cols.discount)
+        return (l > 0) & (discount >= self.min_pct - ROUNDING_MARGIN)
+
+
+@rule_type("price_below")
+class PriceBelowRule(GlitchRule):
+    """0 < precio < max_price (opcional: solo si la lista supera min_list)."""
+    REASON = "Precio sospechosamente bajo: ${price:,.0f}"
+
+    def configure(self, max_price: float = 1000.0, min_list: Optional[float] = None, **params):
+        super().configure(**params)
+        self.max_price = float(max_price)
+        self.min_list = float(min_list) if min_list is not None else None
+
+    def check(self, product, previous_price, baseline=None):
+        if not 0 < product.current_price < self.max_price:
+            return None
+        if self.min_list is not None and not product.list_price > self.min_list:
+            return None
+        return self._glitch(product, previous_price)
+
+    def candidates(self, cols):
+        mask = (cols.current > 0) & (cols.current < self.max_price)
+        if self.min_list is not None:
+            mask &= cols.list > self.min_list
+        return mask
+
+
+@rule_type("invalid_price")
+class InvalidPriceRule(GlitchRule):
+    """Precio 0 o negativo."""
+    REASON = "Precio Inválido (0 o menor)"
+
+    def check(self, product, previous_price, baseline=None):
+        if product.current_price <= 0:
+            return self._glitch(product, previous_price)
+        return None
+
+    def candidates(self, cols):
+        return cols.current <= 0
+
+
+@rule_type("above_list")
+class AboveListRule(GlitchRule):
+    """Precio > lista × factor (precio inflado)."""
+    REASON = "Precio Inflado Sospechoso"
+
+    def configure(self, factor: float = 1.5, **params):
+        super().configure(**params)
+        self.factor = float(factor)
+
+    def check(self, product, previous_price, baseline=None):
+        if product.list_price and product.current_price > product.list_price * self.factor:
+            return self._glitch(product, previous_price)
+        return None
+
+    def candidates(self, cols):
+        return (cols.list != 0) & (cols.current > cols.list * self.factor)
+
+
+@rule_type("drop_vs_previous")
+class DropVsPreviousRule(GlitchRule):
+    """Caída vs precio anterior >= min_pct (> si strict)."""
+    REASON = "Caída del {drop:.0f}% vs precio anterior (${previous:,.0f})"
+
+    def configure(self, min_pct: float = 50.0, strict: bool = False, **params):
+        super().configure(**params)
+        self.min_pct = float(min_pct)
+        self.strict = bool(strict)
+
+    def check(self, product, previous_price, baseline=None):
+        if previous_price > 0 and product.current_price > 0:
+            drop = (1 - product.current_price / previous_price) * 100
+            if drop > self.min_pct if self.strict else drop >= self.min_pct:
+                return self._glitch(product, previous_price, drop_pct=drop, drop=drop)
+        return None
+
+    def candidates(self, cols):
+        c, prev = cols.current, cols.previous
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drop = (1 - c / prev) * 100
+        return (prev > 0) & (c > 0) & (drop >= self.min_pct - FLOAT_MARGIN)
+
+
+@rule_type("rise_vs_previous")
+class RiseVsPreviousRule(GlitchRule):
+    """Aumento vs precio anterior > min_pct."""
+    REASON = "Aumento masivo sospechoso: {rise:.1f}%"
+
+    def configure(self, min_pct: float = 400.0, **params):
+        super().configure(**params)
+        self.min_pct = float(min_pct)
+
+    def check(self, product, previous_price, baseline=None):
+        if previous_price > 0:
+            rise = ((product.current_price - previous_price) / previous_price) * 100
+            if rise > self.min_pct:
+                return self._glitch(product, previous_price, rise=rise)
+        return None
+
+    def candidates(self, cols):
+        c, prev = cols.current, cols.previous
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rise = ((c - prev) / prev) * 100
+        return (prev > 0) & (rise > self.min_pct - FLOAT_MARGIN)
+
+
+@rule_type("baseline_outlier")
+class BaselineOutlierRule(GlitchRule):
+    """Precio a >= max_z desvíos robustos por debajo de la mediana de su baseline."""
+    REASON = "Precio {z:.1f}σ bajo la mediana de {scope} (${median:,.0f})"
+
+    def configure(self, max_z: float = 4.0, **params):
+        super().configure(**params)
+        self.max_z = float(max_z)
+
+    def check(self, product, previous_price, baseline=None):
+        if baseline is None or product.current_price <= 0:
+            return None
+        z = baseline.score(product.current_price)
+        if z <= -self.max_z:
+            median = baseline.median
+            return self._glitch(
+                product, previous_price,
+                drop_pct=(1 - product.current_price / median) * 100,
+                z=-z, median=median, scope=baseline.scope,
+            )
+        return None
+
+    def candidates(self, cols):
+        c = cols.current
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = (np.log(np.where(c > 0, c, np.nan)) - cols.baseline_log_median) / cols.baseline_scale
+        return cols.has_baseline & (c > 0) & (z <= -self.max_z + FLOAT_MARGIN)
+
+
+# ============================================================================
+# RULESET COMPILADO
+# ============================================================================
+
+@dataclass
+class RuleStats:
+    """Contadores de una regla (sobreviven a los reloads)."""
+    profile: str
+    rule: str
+    evaluated: int = 0
+    hits: int = 0
+    time_ns: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "profile": self.profile,
+            "rule": self.rule,
+            "evaluated": self.evaluated,
+            "hits": self.hits,
+            "hit_rate_pct": round(self.hits / self.evaluated * 100, 2) if self.evaluated else 0.0,
+            "time_ms": round(self.time_ns / 1e6, 3),
+        }
+
+
+@dataclass
+class OpportunityRules:
+    """Filtros del pipeline de oportunidades (gap vs mercado + margen)."""
+    gap_min_pct: float = 18.0
+    margin_min_pct: float = 10.0
+    cost_pct: float = 5.0
+    gap_stats: Optional[RuleStats] = None
+    margin_stats: Optional[RuleStats] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def margin(self, gap: float) -> float:
+        """Margen Odiseo = gap teórico - costos."""
+        return gap - self.cost_pct
+
+    def gap_ok(self, gap: float) -> bool:
+        return self._record(self.gap_stats, gap >= self.gap_min_pct)
+
+    def margin_ok(self, margin: float) -> bool:
+        return self._record(self.margin_stats, margin >= self.margin_min_pct)
+
+    def _record(self, stats: Optional[RuleStats], hit: bool) -> bool:
+        if stats is not None:
+            with self._lock:
+                stats.evaluated += 1
+                stats.hits += hit
+        return hit
+
+
+OPPORTUNITY_KEYS = {"gap_min_pct", "margin_min_pct", "cost_pct"}
+
+
+class RuleSet:
+    """Reglas compiladas de un (perfil, categoría). La primera que dispara gana."""
+
+    def __init__(
+        self,
+        rules: list[GlitchRule],
+        stats: list[RuleStats],
+        opportunity: OpportunityRules,
+        lock: threading.Lock,
+    ):
+        self.rules = tuple(rules)
+        self.opportunity = opportunity
+        self._pairs = tuple(zip(rules, stats))
+        self._lock = lock
+
+    def evaluate(
+        self,
+        product: "Product",
+        previous_price: float = 0.0,
+        baseline: Optional["Baseline"] = None,
+    ) -> Optional["Glitch"]:
+        """Evaluar un producto (camino escalar)."""
+        timings = []
+        glitch = None
+        for rule, stats in self._pairs:
+            if baseline is not None and rule.defer_to_baseline:
+                continue
+            start = time.perf_counter_ns()
+            glitch = rule.check(product, previous_price, baseline)
+            timings.append((stats, time.perf_counter_ns() - start))
+            if glitch:
+                break
+
+        with self._lock:
+            for stats, elapsed in timings:
+                stats.evaluated += 1
+                stats.time_ns += elapsed
+            if glitch:
+                timings[-1][0].hits += 1
+        return glitch
+
+    def candidates(self, cols: PriceColumns):
+        """Máscara NumPy: OR de los candidatos de cada regla (superset de hits)."""
+        mask = np.zeros(len(cols), dtype=bool)
+        timings = []
+        for rule, stats in self._pairs:
+            start = time.perf_counter_ns()
+            if rule.defer_to_baseline:
+                mask |= rule.candidates(cols) & ~cols.has_baseline
+            else:
+                mask |= rule.candidates(cols)
+            timings.append((stats, time.perf_counter_ns() - start))
+        with self._lock:
+            for stats, elapsed in timings:
+                stats.time_ns += elapsed
+        return mask
+
+
+# ============================================================================
+# ENGINE (carga + compilación + hot reload)
+# ============================================================================
+
+class GlitchRuleEngine:
+    """
+    Reglas de glitch del proceso, compiladas por (perfil, categoría).
+
+    Uso:
+        engine = GlitchRuleEngine.shared()
+        rules = engine.ruleset("fravega", "computacion/notebooks")
+        glitch = rules.evaluate(product, previous_price)
+        engine.log_stats()
+    """
+
+    _instances: dict[str, "GlitchRuleEngine"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: Optional[str] = None, reload_interval: float = RELOAD_INTERVAL):
+        self.path = path or os.environ.get(RULES_ENV) or DEFAULT_RULES_PATH
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats: dict[tuple[str, str], RuleStats] = {}
+        self._compiled: dict[tuple[str, str], RuleSet] = {}
+        self._config: dict = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self.reload(force=True, strict=True)
+
+    @classmethod
+    def shared(cls, path: Optional[str] = None) -> "GlitchRuleEngine":
+        """Engine del proceso (uno por path), compartido entre sniffers."""
+        path = os.path.abspath(path or os.environ.get(RULES_ENV) or DEFAULT_RULES_PATH)
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+
+    # --- Carga / reload ---
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self, force: bool = False, strict: bool = False) -> bool:
+        """
+        Recargar el archivo si cambió su mtime. Retorna True si recompiló.
+        Con strict=False, un archivo inválido se loguea y se mantienen
+        las reglas anteriores.
+        """
+        mtime = self._file_mtime()
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if not force and mtime == self._mtime:
+                return False
+            try:
+                if mtime is None:
+                    config = copy.deepcopy(DEFAULT_CONFIG)
+                else:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        config = json.load(f)
+                self._validate(config)
+            except (OSError, ValueError, TypeError) as e:
+                if strict:
+                    raise ValueError(f"Reglas de glitch inválidas en {self.path}: {e}") from e
+                logger.error(f"❌ Reglas inválidas en {self.path}, se mantienen las anteriores: {e}")
+                self._mtime = mtime
+                return False
+
+            self._config = config
+            self._mtime = mtime
+            self._compiled.clear()
+
+        if mtime is None:
+            logger.info(f"📐 Sin {self.path}: usando reglas default")
+        else:
+            logger.info(f"📐 Reglas de glitch cargadas desde {self.path}")
+        return True
+
+    def _maybe_reload(self) -> None:
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            self.reload()
+
+    def _validate(self, config: dict) -> None:
+        """Compilar todos los perfiles una vez para fallar antes de activar el archivo."""
+        if not isinstance(config.get("default", {}).get("rules", []), list):
+            raise ValueError("'default.rules' debe ser una lista")
+        self._build(config, "default", "")
+        for profile, spec in config.get("targets", {}).items():
+            self._build(config, profile, "")
+            for category in spec.get("categories", {}):
+                self._build(config, profile, category)
+
+    # --- Compilación ---
+
+    def _build(self, config: dict, profile: str, category: str) -> tuple[list[GlitchRule], dict]:
+        """Resolver reglas + oportunidad de un (perfil, categoría)."""
+        target = config.get("targets", {}).get(profile, {})
+        if "rules" in target:
+            specs = target["rules"]
+        else:
+            specs = target.get("prepend", []) + config.get("default", {}).get("rules", [])
+        specs = [dict(spec) for spec in specs]
+        opportunity = dict(target.get("opportunity", {}))
+
+        # Overrides por categoría (prefijo más largo)
+        overrides = target.get("categories", {})
+        matches = [
+            prefix for prefix in overrides
+            if category == prefix or category.startswith(prefix.rstrip("/") + "/")
+        ]
+        if matches:
+            override = overrides[max(matches, key=len)]
+            by_name = {spec.get("name"): spec for spec in specs}
+            for name, params in override.get("rules", {}).items():
+                if name not in by_name:
+                    raise ValueError(f"Override de regla desconocida '{name}' en {profile}")
+                by_name[name].update(params)
+            opportunity.update(override.get("opportunity", {}))
+
+        rules = []
+        for spec in specs:
+            spec = dict(spec)
+            if not spec.pop("enabled", True):
+                continue
+            kind = spec.pop("type", None)
+            if kind not in RULE_TYPES:
+                raise ValueError(f"Tipo de regla desconocido: {kind!r}")
+            if "name" not in spec:
+                raise ValueError(f"Regla '{kind}' sin name")
+            rules.append(RULE_TYPES[kind](**spec))
+
+        unknown = set(opportunity) - OPPORTUNITY_KEYS
+        if unknown:
+            raise ValueError(f"Parámetros de oportunidad desconocidos en {profile}: {sorted(unknown)}")
+        return rules, opportunity
+
+    def _stats_for(self, profile: str, rule: str) -> RuleStats:
+        key = (profile, rule)
+        if key not in self._stats:
+            self._stats[key] = RuleStats(profile=profile, rule=rule)
+        return self._stats[key]
+
+    def ruleset(self, profile: str, category: str = "") -> RuleSet:
+        """RuleSet compilado (cacheado) para un perfil y categoría."""
+        self._maybe_reload()
+        key = (profile, category or "")
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            return compiled
+
+        with self._lock:
+            rules, opportunity = self._build(self._config, profile, category or "")
+            with self._stats_lock:
+                stats = [self._stats_for(profile, rule.name) for rule in rules]
+                opp = OpportunityRules(
+                    **opportunity,
+                    gap_stats=self._stats_for(profile, "oportunidad.gap"),
+                    margin_stats=self._stats_for(profile, "oportunidad.margen"),
+                )
+            compiled = RuleSet(rules, stats, opp, self._stats_lock)
+            self._compiled[key] = compiled
+        return compiled
+
+    # --- Observabilidad ---
+
+    def stats(self, profile: Optional[str] = None) -> list[dict]:
+        """Stats por regla, las más caras primero."""
+        with self._stats_lock:
+            rows = [
+                s.as_dict() for s in self._stats.values()
+                if profile is None or s.profile == profile
+            ]
+        return sorted(rows, key=lambda r: r["time_ms"], reverse=True)
+
+    def log_stats(self, profile: Optional[str] = None, log: Optional[logging.Logger] = None) -> None:
+        log = log or logger
+        for row in self.stats(profile):
+            if not row["evaluated"] and not row["time_ms"]:
+                continue
+            log.info(
+                f"   📐 {row['profile']}/{row['rule']}: {row['hits']} hits "
+                f"de {row['evaluated']} ({row['hit_rate_pct']}%) — {row['time_ms']:.1f}ms"
+            )
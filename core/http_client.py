@@ -21,16 +21,22 @@ NUNCA usar `requests` directamente. SIEMPRE pasar por este módulo.
 
 from __future__ import annotations
 
+import asyncio
 import random
+import threading
 import time
 import logging
-from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from dataclasses import dataclass, field
 from urllib.parse import urlparse
 
+from core.autotuner import AutoTuner
+from core.rate_limiter import DomainRateLimiter
+from core.shared_state import SharedStateStore, SharedDomainRateLimiter
+
 try:
     from curl_cffi import Session, AsyncSession, CurlHttpVersion
 except ImportError:
@@ -78,6 +84,34 @@ DOMAIN_RATE_LIMIT_PER_HOUR = 300
 # Cuánto esperar si recibimos 429 (segundos)
 RATELIMIT_BACKOFF = 60
 
+# Ráfaga máxima de requests por dominio antes de espaciar al ritmo horario
+DOMAIN_RATE_BURST = 10
+
+# Espera máxima por cupo de rate limit antes de abortar con RateLimitError
+# (~un token al ritmo por defecto: 3600 / 300). Quien prefiera bloquear más
+# pasa max_rate_wait explícito; el default es fallar rápido.
+RATE_LIMIT_MAX_WAIT = 15
+
+
+def parse_retry_after(value: Optional[str], default: float = RATELIMIT_BACKOFF) -> float:
+    """
+    Interpretar el header Retry-After (segundos o fecha HTTP).
+    Retorna segundos a esperar; `default` si falta o no se puede parsear.
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
 
 # ============================================================================
 # CIRCUIT BREAKER — Previene bombardear APIs caídas
@@ -104,6 +138,10 @@ class CircuitBreaker:
     por `recovery_timeout` segundos. Luego deja pasar 1 request de prueba.
     Si funciona, cierra el circuito. Si falla, lo abre de nuevo.
     
+    Con `bind(store, name)` el estado vive en un SharedStateStore: todos los
+    procesos que usan el mismo `name` ven el mismo breaker, y sobrevive
+    reinicios.
+    
     Ejemplo:
         cb = CircuitBreaker(failure_threshold=5, recovery_timeout=60)
         if cb.can_execute():
@@ -121,55 +159,133 @@ class CircuitBreaker:
     failure_count: int = field(default=0, init=False)
     success_count: int = field(default=0, init=False)
     last_failure_time: Optional[datetime] = field(default=None, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _store: Optional[SharedStateStore] = field(default=None, init=False, repr=False)
+    _name: str = field(default="", init=False, repr=False)
+    
+    def bind(self, store: SharedStateStore, name: str) -> None:
+        """Persistir el estado en `store` bajo la clave `name` (ej: dominio)."""
+        with self._lock:
+            self._store = store
+            self._name = name
+    
+    @property
+    def is_bound(self) -> bool:
+        return self._store is not None
+    
+    def _load(self, row: Optional[tuple]) -> None:
+        if row:
+            self.state = CircuitState(row[0])
+            self.failure_count, self.success_count = row[1], row[2]
+            self.last_failure_time = datetime.fromtimestamp(row[3]) if row[3] else None
+    
+    def _snapshot(self) -> tuple:
+        return (self.state, self.failure_count, self.success_count, self.last_failure_time)
+    
+    def _apply(self, op: Callable[[], Any]) -> Any:
+        """
+        Correr `op` bajo el lock local. Bindeado: primero contra una lectura
+        simple del store; solo si `op` cambia algo se repite dentro de una
+        transacción (read-modify-write atómico) y se guarda. El caso común
+        (CLOSED, sin fallos) no escribe ni toma el lock de escritura.
+        """
+        with self._lock:
+            previous = self.state
+            if self._store is None:
+                result = op()
+            else:
+                self._load(self._store.load_breaker(self._store.reader(), self._name))
+                previous = self.state
+                before = self._snapshot()
+                result = op()
+                if self._snapshot() != before:
+                    with self._store.transaction() as conn:
+                        self.state, self.failure_count, self.success_count, self.last_failure_time = before
+                        self._load(self._store.load_breaker(conn, self._name))
+                        previous = self.state
+                        result = op()
+                        self._store.save_breaker(
+                            conn, self._name, self.state.value,
+                            self.failure_count, self.success_count,
+                            self.last_failure_time.timestamp() if self.last_failure_time else None,
+                        )
+            if self.state != previous:
+                self._log_transition(previous)
+            return result
+    
+    def _log_transition(self, previous: CircuitState) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            logger.info("⚡ Circuit Breaker → HALF_OPEN (probando...)")
+        elif self.state == CircuitState.CLOSED:
+            logger.info("✅ Circuit Breaker → CLOSED (recuperado)")
+        elif previous == CircuitState.HALF_OPEN:
+            logger.warning("🔴 Circuit Breaker → OPEN (falló en prueba)")
+        else:
+            logger.warning(f"🔴 Circuit Breaker → OPEN (tras {self.failure_count} fallos)")
     
     def can_execute(self) -> bool:
         """¿Se puede ejecutar un request?"""
-        if self.state == CircuitState.CLOSED:
-            return True
-        
-        if self.state == CircuitState.OPEN:
-            # ¿Pasó suficiente tiempo para probar?
-            if self.last_failure_time and \
-               datetime.now() - self.last_failure_time > timedelta(seconds=self.recovery_timeout):
-                self.state = CircuitState.HALF_OPEN
-                self.success_count = 0
-                logger.info("⚡ Circuit Breaker → HALF_OPEN (probando...)")
+        def op() -> bool:
+            if self.state == CircuitState.CLOSED:
                 return True
-            return False
-        
-        # HALF_OPEN: dejar pasar
-        return True
+            
+            if self.state == CircuitState.OPEN:
+                # ¿Pasó suficiente tiempo para probar?
+                if self.last_failure_time and \
+                   datetime.now() - self.last_failure_time > timedelta(seconds=self.recovery_timeout):
+                    self.state = CircuitState.HALF_OPEN
+                    self.success_count = 0
+                    return True
+                return False
+            
+            # HALF_OPEN: dejar pasar
+            return True
+        return self._apply(op)
     
     def record_success(self) -> None:
         """Registrar un request exitoso."""
-        if self.state == CircuitState.HALF_OPEN:
-            self.success_count += 1
-            if self.success_count >= self.success_threshold:
-                self.state = CircuitState.CLOSED
+        def op() -> None:
+            if self.state == CircuitState.HALF_OPEN:
+                self.success_count += 1
+                if self.success_count >= self.success_threshold:
+                    self.state = CircuitState.CLOSED
+                    self.failure_count = 0
+            else:
                 self.failure_count = 0
-                logger.info("✅ Circuit Breaker → CLOSED (recuperado)")
-        else:
-            self.failure_count = 0
+        self._apply(op)
     
     def record_failure(self) -> None:
         """Registrar un request fallido."""
-        self.failure_count += 1
-        self.last_failure_time = datetime.now()
-        
-        if self.state == CircuitState.HALF_OPEN:
-            self.state = CircuitState.OPEN
-            logger.warning("🔴 Circuit Breaker → OPEN (falló en prueba)")
-        elif self.failure_count >= self.failure_threshold:
-            self.state = CircuitState.OPEN
-            logger.warning(
-                f"🔴 Circuit Breaker → OPEN (tras {self.failure_count} fallos)"
-            )
+        def op() -> None:
+            self.failure_count += 1
+            self.last_failure_time = datetime.now()
+            
+            if self.state == CircuitState.HALF_OPEN or self.failure_count >= self.failure_threshold:
+                self.state = CircuitState.OPEN
+        self._apply(op)
     
     @property
     def is_open(self) -> bool:
         return self.state == CircuitState.OPEN
 
 
+def _default_rate_limiter(
+    shared_state: Optional[SharedStateStore], max_requests_per_hour: float, burst: int
+) -> DomainRateLimiter:
+    """Limiter propio del cliente: en memoria, o en el store compartido."""
+    if shared_state is not None:
+        return SharedDomainRateLimiter(shared_state, max_requests_per_hour, burst)
+    return DomainRateLimiter(max_requests_per_hour, burst)
+
+
+def _bind_circuit_breaker(
+    breaker: CircuitBreaker, shared_state: Optional[SharedStateStore], url: str
+) -> None:
+    """Compartir el breaker entre procesos, keyed por el primer dominio usado."""
+    if shared_state is not None and not breaker.is_bound:
+        breaker.bind(shared_state, f"breaker:{urlparse(url).netloc}")
+
+
 # ============================================================================
 # HTTP CLIENT — Wrapper Sincrónico de curl_cffi
 # ============================================================================
@@ -186,9 +302,12 @@ class HttpClient:
     - Cookies persistentes (simula navegación real)
     - HTTP/2 por defecto, HTTP/3 disponible
     - 🛡️ Stealth: delays aleatorios entre requests
-    - 🛡️ Rate limiting por dominio (max requests/hora)
+    - 🛡️ Rate limiting por dominio (token bucket compartible, ver rate_limiter.py)
     - 🛡️ Manejo automático de 429 (Too Many Requests)
     - 🛡️ Session warming (visita homepage como humano)
+    - 🎛️ Auto-tuning opcional (core/autotuner.py): informa cada intento
+    - Thread-safe: una Session curl_cffi por thread, delay y rate limit
+      compartidos (se puede usar desde un ThreadPoolExecutor)
     
     Ejemplo:
         client = HttpClient()
@@ -220,6 +339,11 @@ class HttpClient:
         stealth_mode: bool = True,
         delay_range: tuple[float, float] = (STEALTH_DELAY_MIN, STEALTH_DELAY_MAX),
         max_requests_per_hour: int = DOMAIN_RATE_LIMIT_PER_HOUR,
+        burst: int = DOMAIN_RATE_BURST,
+        rate_limiter: Optional[DomainRateLimiter] = None,
+        max_rate_wait: float = RATE_LIMIT_MAX_WAIT,
+        shared_state: Optional[SharedStateStore] = None,
+        tuner: Optional[AutoTuner] = None,
     ):
         self.impersonate = impersonate
         self.timeout = timeout
@@ -232,9 +356,22 @@ class HttpClient:
         self.stealth_mode = stealth_mode
         self.delay_range = delay_range
         self.max_requests_per_hour = max_requests_per_hour
+        self.max_rate_wait = max_rate_wait
+        # Pasar un limiter compartido (DomainRateLimiter.shared()) para que
+        # varios clientes/threads respeten un único presupuesto por dominio.
+        # Con shared_state (o ODISEO_SHARED_STATE) el presupuesto y el breaker
+        # se comparten entre procesos y sobreviven reinicios.
+        self.shared_state = shared_state or SharedStateStore.from_env()
+        self.rate_limiter = rate_limiter or _default_rate_limiter(
+            self.shared_state, max_requests_per_hour, burst
+        )
+        # Auto-tuner del target: recibe latencia/status/bytes de cada intento
+        self.tuner = tuner
         self._last_request_time: float = 0
-        self._domain_request_counts: dict[str, list[float]] = defaultdict(list)
         self._warmed_domains: set[str] = set()
+        # Serializa el stealth delay entre threads
+        self._pacing_lock = threading.Lock()
+        self._warm_lock = threading.Lock()
         
         # Retry config (manual, ya que RetryStrategy no existe en v0.14)
         self.retry_count = retry_count
@@ -247,8 +384,12 @@ class HttpClient:
         if extra_headers:
             self.headers.update(extra_headers)
         
-        # Session con cookies persistentes
-        self._session: Optional[Session] = None
+        # Session con cookies persistentes (curl_cffi Session no es thread-safe:
+        # cada thread usa la suya, sembrada con las cookies de otra viva).
+        # Las de threads terminados se cierran al crear la próxima.
+        self._local = threading.local()
+        self._sessions: dict[threading.Thread, Session] = {}
+        self._sessions_lock = threading.Lock()
     
     def _get_browser(self) -> str:
         """Obtener browser para impersonar (fijo o rotado)."""
@@ -257,8 +398,9 @@ class HttpClient:
         return self.impersonate
     
     def _ensure_session(self) -> Session:
-        """Crear session si no existe."""
-        if self._session is None:
+        """Crear session para el thread actual si no existe."""
+        session = getattr(self._local, "session", None)
+        if session is None:
             kwargs: dict[str, Any] = {
                 "impersonate": self._get_browser(),
                 "headers": self.headers,
@@ -266,13 +408,35 @@ class HttpClient:
             }
             if self.proxy:
                 kwargs["proxy"] = self.proxy
-            self._session = Session(**kwargs)
-        return self._session
+            with self._sessions_lock:
+                # Heredar cookies de warming de una session existente
+                if self._sessions:
+                    kwargs["cookies"] = next(iter(self._sessions.values())).cookies
+                self._prune_sessions()
+                session = Session(**kwargs)
+                self._sessions[threading.current_thread()] = session
+            self._local.session = session
+        return session
+    
+    def _prune_sessions(self) -> None:
+        """Cerrar las sessions de threads que ya terminaron (llamar con el lock)."""
+        for thread in [t for t in self._sessions if not t.is_alive()]:
+            session = self._sessions.pop(thread)
+            try:
+                session.close()
+            except Exception:
+                pass
     
     def _get_domain(self, url: str) -> str:
         """Extraer dominio de una URL."""
         return urlparse(url).netloc
     
+    def _pace(self, url: str) -> None:
+        """Aplicar rate limit (por dominio) + stealth delay (atómico entre threads)."""
+        self._check_rate_limit(url)
+        with self._pacing_lock:
+            self._stealth_delay()
+    
     def _stealth_delay(self) -> None:
         """Esperar un tiempo aleatorio entre requests (anti-detección)."""
         if not self.stealth_mode:
@@ -293,32 +457,33 @@ class HttpClient:
         self._last_request_time = time.time()
     
     def _check_rate_limit(self, url: str) -> None:
-        """Verificar que no excedimos el rate limit por dominio."""
+        """
+        Tomar un slot del token bucket del dominio.
+        Espera como máximo `max_rate_wait`; si hace falta más, lanza
+        RateLimitError para que el caller haga otra cosa en vez de dormir.
+        """
         if not self.stealth_mode:
             return
         
         domain = self._get_domain(url)
-        now = time.time()
-        one_hour_ago = now - 3600
-        
-        # Limpiar requests viejas (más de 1 hora)
-        self._domain_request_counts[domain] = [
-            t for t in self._domain_request_counts[domain] if t > one_hour_ago
-        ]
-        
-        # Verificar límite
-        count = len(self._domain_request_counts[domain])
-        if count >= self.max_requests_per_hour:
-            wait_time = 3600 - (now - self._domain_request_counts[domain][0])
+        wait = self.rate_limiter.time_until_ready(domain)
+        if 0 < wait <= self.max_rate_wait:
             logger.warning(
                 f"🛡️ Rate limit alcanzado para {domain} "
-                f"({count}/{self.max_requests_per_hour} req/hora). "
-                f"Esperando {wait_time:.0f}s..."
+                f"({self.rate_limiter.max_requests_per_hour:.0f} req/hora). Esperando {wait:.0f}s..."
             )
-            time.sleep(min(wait_time, 300))  # Max 5 min de espera
-        
-        # Registrar request
-        self._domain_request_counts[domain].append(now)
+        if not self.rate_limiter.acquire(domain, timeout=self.max_rate_wait):
+            retry_after = self.rate_limiter.time_until_ready(domain)
+            raise RateLimitError(
+                f"Presupuesto agotado para {domain}: próximo slot en {retry_after:.0f}s",
+                retry_after=retry_after,
+            )
+    
+    def time_until_ready(self, url: str) -> float:
+        """Segundos hasta que el dominio de `url` tenga cupo (0 = ya)."""
+        if not self.stealth_mode:
+            return 0.0
+        return self.rate_limiter.time_until_ready(self._get_domain(url))
     
     def warm_session(self, base_url: str) -> None:
         """
@@ -335,14 +500,19 @@ class HttpClient:
         if domain in self._warmed_domains:
             return  # Ya calentada
         
-        logger.info(f"🔥 Warming session para {domain}...")
-        try:
-            self.get(base_url)
-            self._warmed_domains.add(domain)
-            # Pausa extra después de warming (humano mirando la página)
-            time.sleep(random.uniform(1.0, 3.0))
-        except Exception as e:
-            logger.warning(f"⚠️ Error warming {domain}: {e}")
+        # Un solo thread calienta; el resto espera y hereda las cookies
+        with self._warm_lock:
+            if domain in self._warmed_domains:
+                return
+            
+            logger.info(f"🔥 Warming session para {domain}...")
+            try:
+                self.get(base_url)
+                self._warmed_domains.add(domain)
+                # Pausa extra después de warming (humano mirando la página)
+                time.sleep(random.uniform(1.0, 3.0))
+            except Exception as e:
+                logger.warning(f"⚠️ Error warming {domain}: {e}")
     
     def reset_session(self) -> None:
         """🛡️ Rotar sesión: cerrar la actual y crear una nueva con otro browser."""
@@ -359,8 +529,17 @@ class HttpClient:
         """POST request con impersonación + retry + circuit breaker."""
         return self._request("POST", url, **kwargs)
     
+    def put(self, url: str, **kwargs) -> Any:
+        """PUT request con impersonación + retry + circuit breaker."""
+        return self._request("PUT", url, **kwargs)
+    
+    def get_cookie(self, name: str) -> Optional[str]:
+        """Valor de una cookie de la session (p.ej. la que dejó el warming)."""
+        return self._ensure_session().cookies.get(name)
+    
     def _request(self, method: str, url: str, **kwargs) -> Any:
         """Request interno con Stealth + Circuit Breaker + Retry manual."""
+        _bind_circuit_breaker(self.circuit_breaker, self.shared_state, url)
         if not self.circuit_breaker.can_execute():
             raise CircuitBreakerOpenError(
                 f"Circuit Breaker OPEN — API {url} está caída. "
@@ -368,8 +547,7 @@ class HttpClient:
             )
         
         # 🛡️ Anti-detección: delay + rate limit check
-        self._stealth_delay()
-        self._check_rate_limit(url)
+        self._pace(url)
         
         session = self._ensure_session()
         
@@ -379,13 +557,18 @@ class HttpClient:
         
         last_exception = None
         for attempt in range(self.retry_count + 1):
+            response = None
+            started = time.monotonic()
             try:
                 if method == "GET":
                     response = session.get(url, **kwargs)
                 elif method == "POST":
                     response = session.post(url, **kwargs)
+                elif method == "PUT":
+                    response = session.put(url, **kwargs)
                 else:
                     raise ValueError(f"Método HTTP no soportado: {method}")
+                self._observe(response, started)
                 
                 # Verificar status
                 if response.status_code == 403:
@@ -396,24 +579,33 @@ class HttpClient:
                     )
                 
                 if response.status_code == 429:
-                    # 🛡️ Rate limited — esperar y reintentar
-                    retry_after = int(response.headers.get("Retry-After", RATELIMIT_BACKOFF))
-                    logger.warning(f"🛡️ 429 Rate Limited en {url}. Esperando {retry_after}s...")
-                    time.sleep(retry_after)
-                    raise RateLimitError(f"429 en {url} — Rate limited")
+                    # 🛡️ Rate limited — esperar lo que pide el server y reintentar
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    logger.warning(f"🛡️ 429 Rate Limited en {url}. Esperando {retry_after:.0f}s...")
+                    if attempt < self.retry_count:
+                        time.sleep(retry_after)
+                        continue
+                    raise RateLimitError(f"429 en {url} — Rate limited", retry_after=retry_after)
                 
                 if response.status_code >= 500:
                     self.circuit_breaker.record_failure()
                     raise ServerError(f"Error {response.status_code} en {url}")
                 
-                response.raise_for_status()
+                if response.status_code >= 400:
+                    # El server respondió: la request es la que está mal (sin retry ni breaker)
+                    raise ClientError(
+                        f"Error {response.status_code} en {url}", status_code=response.status_code
+                    )
+                
                 self.circuit_breaker.record_success()
                 return response
                 
-            except (WAFBlockedError,):
-                raise  # No retry on WAF block
+            except (WAFBlockedError, RateLimitError, ClientError):
+                raise  # No retry on WAF block / presupuesto de 429 agotado / 4xx
             except Exception as e:
                 last_exception = e
+                if response is None:
+                    self._observe(None, started)
                 if attempt < self.retry_count:
                     delay = self.retry_delay * (2 ** attempt) + random.uniform(0, self.retry_jitter)
                     logger.warning(f"Retry {attempt+1}/{self.retry_count} para {url} en {delay:.1f}s...")
@@ -422,6 +614,14 @@ class HttpClient:
                     self.circuit_breaker.record_failure()
                     raise NetworkError(f"Error de red en {url}: {e}") from e
     
+    def _observe(self, response: Any, started: float) -> None:
+        """Informar el intento al auto-tuner (response None = error de red)."""
+        if self.tuner is None:
+            return
+        status = response.status_code if response is not None else 0
+        nbytes = len(response.content or b"") if response is not None else 0
+        self.tuner.record(status, time.monotonic() - started, nbytes)
+    
     def get_json(self, url: str, **kwargs) -> dict:
         """GET y parsear JSON directamente."""
         return self.get(url, **kwargs).json()
@@ -460,10 +660,13 @@ class HttpClient:
         return data
     
     def close(self) -> None:
-        """Cerrar session y liberar recursos."""
-        if self._session:
-            self._session.close()
-            self._session = None
+        """Cerrar sessions (de todos los threads) y liberar recursos."""
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            # Invalidar sessions thread-local: se recrean en el próximo request
+            self._local = threading.local()
     
     def __enter__(self):
         return self
@@ -481,13 +684,23 @@ class AsyncHttpClient:
     """
     Cliente HTTP Asincrónico con curl_cffi.
     
+    Paridad con HttpClient, sin bloquear el event loop:
+    - Impersonación TLS/JA3 + rotación de browser
+    - Retry con exponential backoff + jitter (asyncio.sleep)
+    - Circuit Breaker para APIs caídas
+    - 🛡️ Stealth: delays aleatorios no bloqueantes entre requests
+    - 🛡️ Rate limiting por dominio con token bucket (burst + presupuesto horario)
+    - 🛡️ 429 con backoff según Retry-After
+    - 🛡️ Session warming (visita homepage como humano)
+    
     Features adicionales sobre HttpClient:
     - Semaphore para rate limiting (max N requests paralelos)
     - asyncio.gather() para batch processing
-    - Ideal para scrapear múltiples categorías/páginas en paralelo
+    - Ideal para scrapear múltiples categorías/páginas/targets en un solo loop
     
     Ejemplo:
         async with AsyncHttpClient(max_concurrent=3) as client:
+            await client.warm_session("https://www.fravega.com")
             urls = ["https://fravega.com/cat1", "https://fravega.com/cat2"]
             results = await client.gather_get(urls)
     """
@@ -498,80 +711,289 @@ class AsyncHttpClient:
         max_concurrent: int = 3,
         timeout: float = 30.0,
         retry_count: int = 3,
+        retry_delay: float = 0.5,
+        retry_jitter: float = 0.2,
         circuit_breaker: Optional[CircuitBreaker] = None,
         extra_headers: Optional[dict] = None,
         proxy: Optional[str] = None,
+        http_version: Optional[str] = None,
+        rotate_browser: bool = False,
+        stealth_mode: bool = True,
+        delay_range: tuple[float, float] = (STEALTH_DELAY_MIN, STEALTH_DELAY_MAX),
+        max_requests_per_hour: int = DOMAIN_RATE_LIMIT_PER_HOUR,
+        burst: int = DOMAIN_RATE_BURST,
+        rate_limiter: Optional[DomainRateLimiter] = None,
+        max_rate_wait: float = RATE_LIMIT_MAX_WAIT,
+        shared_state: Optional[SharedStateStore] = None,
+        tuner: Optional[AutoTuner] = None,
     ):
         self.impersonate = impersonate
         self.max_concurrent = max_concurrent
         self.timeout = timeout
         self.circuit_breaker = circuit_breaker or CircuitBreaker()
         self.proxy = proxy
+        self.http_version = http_version
+        self.rotate_browser = rotate_browser
+        
+        # 🛡️ Stealth config
+        self.stealth_mode = stealth_mode
+        self.delay_range = delay_range
+        self.max_requests_per_hour = max_requests_per_hour
+        self.max_rate_wait = max_rate_wait
+        self.shared_state = shared_state or SharedStateStore.from_env()
+        self.rate_limiter = rate_limiter or _default_rate_limiter(
+            self.shared_state, max_requests_per_hour, burst
+        )
+        # Auto-tuner: observa cada intento y fija max_concurrent (semaphore)
+        self.tuner = tuner
+        if tuner is not None:
+            self.max_concurrent = tuner.concurrency
+        self._last_request_time: float = 0
+        self._warmed_domains: set[str] = set()
         
         self.retry_count = retry_count
+        self.retry_delay = retry_delay
+        self.retry_jitter = retry_jitter
         
         self.headers = {**ARGENTINA_HEADERS}
         if extra_headers:
             self.headers.update(extra_headers)
         
+        # Se crean en el loop activo (__aenter__ o primer request)
         self._session: Optional[AsyncSession] = None
-        self._semaphore: Optional[Any] = None  # Se crea en __aenter__
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pacing_lock: Optional[asyncio.Lock] = None
+        self._warm_lock: Optional[asyncio.Lock] = None
     
     async def __aenter__(self):
-        import asyncio
-        self._semaphore = asyncio.Semaphore(self.max_concurrent)
-        
-        kwargs: dict[str, Any] = {
-            "impersonate": self.impersonate,
-            "headers": self.headers,
-            "timeout": self.timeout,
-        }
-        if self.proxy:
-            kwargs["proxy"] = self.proxy
-        self._session = AsyncSession(**kwargs)
+        self._ensure_session()
         return self
     
     async def __aexit__(self, *args):
-        if self._session:
-            await self._session.close()
+        await self.close()
     
-    async def get(self, url: str, **kwargs) -> Any:
-        """GET con semaphore (rate limited)."""
-        async with self._semaphore:
-            if not self.circuit_breaker.can_execute():
-                raise CircuitBreakerOpenError(f"Circuit Breaker OPEN para {url}")
+    def _get_browser(self) -> str:
+        """Obtener browser para impersonar (fijo o rotado)."""
+        if self.rotate_browser:
+            return random.choice(CHROME_VERSIONS)
+        return self.impersonate
+    
+    def _ensure_session(self) -> AsyncSession:
+        """Crear session + primitivas de sincronización si no existen."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._pacing_lock = asyncio.Lock()
+            self._warm_lock = asyncio.Lock()
+        
+        if self._session is None:
+            kwargs: dict[str, Any] = {
+                "impersonate": self._get_browser(),
+                "headers": self.headers,
+                "timeout": self.timeout,
+            }
+            if self.proxy:
+                kwargs["proxy"] = self.proxy
+            self._session = AsyncSession(**kwargs)
+        return self._session
+    
+    def _get_domain(self, url: str) -> str:
+        """Extraer dominio de una URL."""
+        return urlparse(url).netloc
+    
+    async def _stealth_delay(self) -> None:
+        """Delay aleatorio entre requests sin bloquear el event loop."""
+        if not self.stealth_mode:
+            return
+        
+        # El lock espacia los *inicios* de request; las respuestas se solapan
+        async with self._pacing_lock:
+            elapsed = time.time() - self._last_request_time
+            min_delay, max_delay = self.delay_range
+            if elapsed < min_delay:
+                wait = random.uniform(min_delay, max_delay) - elapsed
+                if wait > 0:
+                    logger.debug(f"🛡️ Stealth delay: {wait:.1f}s")
+                    await asyncio.sleep(wait)
+            self._last_request_time = time.time()
+    
+    async def _check_rate_limit(self, url: str) -> None:
+        """Esperar (sin bloquear) a que el token bucket del dominio tenga cupo."""
+        if not self.stealth_mode:
+            return
+        
+        domain = self._get_domain(url)
+        wait = await self.rate_limiter.time_until_ready_async(domain)
+        if 0 < wait <= self.max_rate_wait:
+            log = logger.warning if wait >= 1 else logger.debug
+            log(
+                f"🛡️ Rate limit alcanzado para {domain} "
+                f"({self.rate_limiter.max_requests_per_hour:.0f} req/hora). Esperando {wait:.1f}s..."
+            )
+        if not await self.rate_limiter.acquire_async(domain, timeout=self.max_rate_wait):
+            retry_after = await self.rate_limiter.time_until_ready_async(domain)
+            raise RateLimitError(
+                f"Presupuesto agotado para {domain}: próximo slot en {retry_after:.0f}s",
+                retry_after=retry_after,
+            )
+    
+    def time_until_ready(self, url: str) -> float:
+        """Segundos hasta que el dominio de `url` tenga cupo (0 = ya)."""
+        if not self.stealth_mode:
+            return 0.0
+        return self.rate_limiter.time_until_ready(self._get_domain(url))
+    
+    async def warm_session(self, base_url: str) -> None:
+        """
+        🛡️ Calentar la sesión visitando la homepage primero (ver HttpClient).
+        
+        Ejemplo:
+            await client.warm_session("https://www.oncity.com")
+            r = await client.get("https://www.oncity.com/api/...")
+        """
+        domain = self._get_domain(base_url)
+        if domain in self._warmed_domains:
+            return
+        
+        self._ensure_session()
+        async with self._warm_lock:
+            if domain in self._warmed_domains:
+                return
             
+            logger.info(f"🔥 Warming session para {domain}...")
             try:
-                response = await self._session.get(url, **kwargs)
-                
-                if response.status_code == 403:
-                    self.circuit_breaker.record_failure()
-                    raise WAFBlockedError(f"403 en {url}")
-                
-                response.raise_for_status()
-                self.circuit_breaker.record_success()
-                return response
-                
-            except (WAFBlockedError,):
-                raise
+                await self.get(base_url)
+                self._warmed_domains.add(domain)
+                # Pausa extra después de warming (humano mirando la página)
+                await asyncio.sleep(random.uniform(1.0, 3.0))
             except Exception as e:
-                self.circuit_breaker.record_failure()
-                raise NetworkError(f"Error en {url}: {e}") from e
+                logger.warning(f"⚠️ Error warming {domain}: {e}")
+    
+    async def reset_session(self) -> None:
+        """🛡️ Rotar sesión: cerrar la actual y crear una nueva con otro browser."""
+        await self.close()
+        self._warmed_domains.clear()
+        if self.rotate_browser:
+            logger.info(f"🔄 Sesión rotada, nuevo browser: {self._get_browser()}")
+    
+    async def get(self, url: str, **kwargs) -> Any:
+        """GET con semaphore + stealth + retry + circuit breaker."""
+        return await self._request("GET", url, **kwargs)
     
     async def post(self, url: str, **kwargs) -> Any:
-        """POST con semaphore (rate limited)."""
+        """POST con semaphore + stealth + retry + circuit breaker."""
+        return await self._request("POST", url, **kwargs)
+    
+    async def _request(self, method: str, url: str, **kwargs) -> Any:
+        """Request interno: misma política que HttpClient._request, pero async."""
+        session = self._ensure_session()
+        _bind_circuit_breaker(self.circuit_breaker, self.shared_state, url)
+        
+        if self.http_version and "http_version" not in kwargs:
+            kwargs["http_version"] = self.http_version
+        
+        self._sync_concurrency()
         async with self._semaphore:
-            if not self.circuit_breaker.can_execute():
-                raise CircuitBreakerOpenError(f"Circuit Breaker OPEN para {url}")
+            if not await self._breaker(self.circuit_breaker.can_execute):
+                raise CircuitBreakerOpenError(
+                    f"Circuit Breaker OPEN — API {url} está caída. "
+                    f"Reintentando en {self.circuit_breaker.recovery_timeout}s"
+                )
             
-            try:
-                response = await self._session.post(url, **kwargs)
-                response.raise_for_status()
-                self.circuit_breaker.record_success()
-                return response
-            except Exception as e:
-                self.circuit_breaker.record_failure()
-                raise NetworkError(f"Error en {url}: {e}") from e
+            # 🛡️ Anti-detección: delay + rate limit check
+            await self._stealth_delay()
+            await self._check_rate_limit(url)
+            
+            for attempt in range(self.retry_count + 1):
+                response = None
+                started = time.monotonic()
+                try:
+                    if method == "GET":
+                        response = await session.get(url, **kwargs)
+                    elif method == "POST":
+                        response = await session.post(url, **kwargs)
+                    else:
+                        raise ValueError(f"Método HTTP no soportado: {method}")
+                    self._observe(response, started)
+                    
+                    if response.status_code == 403:
+                        await self._breaker(self.circuit_breaker.record_failure)
+                        raise WAFBlockedError(
+                            f"403 Forbidden en {url} — WAF detectó la request. "
+                            "Intentar: rotar browser, usar proxy, o esperar."
+                        )
+                    
+                    if response.status_code == 429:
+                        # 🛡️ Rate limited — esperar lo que pide el server y reintentar
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        logger.warning(f"🛡️ 429 Rate Limited en {url}. Esperando {retry_after:.0f}s...")
+                        if attempt < self.retry_count:
+                            await asyncio.sleep(retry_after)
+                            continue
+                        raise RateLimitError(f"429 en {url} — Rate limited", retry_after=retry_after)
+                    
+                    if response.status_code >= 500:
+                        await self._breaker(self.circuit_breaker.record_failure)
+                        raise ServerError(f"Error {response.status_code} en {url}")
+                    
+                    if response.status_code >= 400:
+                        raise ClientError(
+                            f"Error {response.status_code} en {url}", status_code=response.status_code
+                        )
+                    
+                    await self._breaker(self.circuit_breaker.record_success)
+                    return response
+                
+                except (WAFBlockedError, RateLimitError, ClientError):
+                    raise  # No retry on WAF block / presupuesto de 429 agotado / 4xx
+                except Exception as e:
+                    if response is None:
+                        self._observe(None, started)
+                    if attempt < self.retry_count:
+                        delay = self.retry_delay * (2 ** attempt) + random.uniform(0, self.retry_jitter)
+                        logger.warning(f"Retry {attempt+1}/{self.retry_count} para {url} en {delay:.1f}s...")
+                        await asyncio.sleep(delay)
+                    else:
+                        await self._breaker(self.circuit_breaker.record_failure)
+                        raise NetworkError(f"Error de red en {url}: {e}") from e
+    
+    async def _breaker(self, call: Callable[[], Any]) -> Any:
+        """Llamada al circuit breaker: bindeado al store (SQLite), en un thread."""
+        if self.circuit_breaker.is_bound:
+            return await asyncio.to_thread(call)
+        return call()
+    
+    def _observe(self, response: Any, started: float) -> None:
+        """Informar el intento al auto-tuner (response None = error de red)."""
+        if self.tuner is None:
+            return
+        status = response.status_code if response is not None else 0
+        nbytes = len(response.content or b"") if response is not None else 0
+        self.tuner.record(status, time.monotonic() - started, nbytes)
+    
+    def _sync_concurrency(self) -> None:
+        """
+        Llevar el semaphore a la concurrencia del tuner. Los requests en
+        vuelo terminan con el semaphore anterior (exceso transitorio acotado).
+        """
+        if self.tuner is None or self.tuner.concurrency == self.max_concurrent:
+            return
+        self.max_concurrent = self.tuner.concurrency
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+    
+    async def get_json(self, url: str, **kwargs) -> dict:
+        """GET y parsear JSON directamente."""
+        return (await self.get(url, **kwargs)).json()
+    
+    async def post_json(self, url: str, **kwargs) -> dict:
+        """POST y parsear JSON directamente."""
+        return (await self.post(url, **kwargs)).json()
+    
+    async def graphql(self, url: str, query: str, variables: Optional[dict] = None) -> dict:
+        """Ejecutar query GraphQL (ver HttpClient.graphql)."""
+        payload: dict[str, Any] = {"query": query}
+        if variables:
+            payload["variables"] = variables
+        return await self.post_json(url, json=payload)
     
     async def gather_get(
         self,
@@ -594,7 +1016,6 @@ class AsyncHttpClient:
                 if not isinstance(r, Exception):
                     print(r.json())
         """
-        import asyncio
         tasks = [self.get(url, **kwargs) for url in urls]
         return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
     
@@ -614,9 +1035,14 @@ class AsyncHttpClient:
             ]
             results = await client.graphql_batch(fravega_url, queries)
         """
-        import asyncio
         tasks = [self.post(url, json=q) for q in queries]
         return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+    
+    async def close(self) -> None:
+        """Cerrar session y liberar recursos."""
+        if self._session:
+            await self._session.close()
+            self._session = None
 
 
 # ============================================================================
@@ -644,13 +1070,23 @@ class ServerError(ScrapingError):
     """Error 5xx del servidor."""
     pass
 
+class ClientError(NetworkError):
+    """4xx (salvo 403 y 429): la request es inválida, reintentar no sirve."""
+    
+    def __init__(self, message: str, status_code: int = 0):
+        super().__init__(message)
+        self.status_code = status_code
+
 class ParsingError(ScrapingError):
     """Error al parsear la respuesta (JSON inválido, estructura inesperada)."""
     pass
 
 class RateLimitError(ScrapingError):
     """429 Too Many Requests — Rate limit excedido."""
-    pass
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after  # Segundos pedidos por el server (Retry-After)
 
 class GlitchDetectedError(ScrapingError):
     """Precio anormalmente bajo detectado — posible glitch."""
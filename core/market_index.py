@@ -0,0 +1,94 @@
+"""
+🏷️ Market Index — Precio de referencia de mercado por producto
+
+Reemplaza los precios de "mercado mínimo" hardcodeados por marca: cada
+save del ledger registra el precio de cada producto bajo su match_key
+(core/matching.py: EAN, o grupo de productos equivalentes), y el
+índice responde, para una clave y una tienda, el mínimo y la mediana de
+los precios de las OTRAS tiendas.
+
+- Tabla market_prices en el ledger: una fila por (source, product_id)
+  con su clave y precio (0 = sin stock, no cuenta como referencia).
+- En memoria: clave → {(source, product_id): precio}. La referencia es
+  un hash lookup + min/mediana sobre un puñado de tiendas.
+- Incremental: otros procesos que escriben el mismo ledger se ven con
+  refresh() (filas con seq > el último número de cambio aplicado).
+
+Uso:
+    refs = db.get_market_refs("fravega", products)
+    if product.id in refs: gap = (ref.min_price - product.current_price) / product.current_price * 100
+"""
+
+from __future__ import annotations
+
+import statistics
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+
+@dataclass
+class MarketRef:
+    """Referencia de mercado de un producto (solo tiendas competidoras)."""
+    min_price: float
+    median_price: float
+    min_source: str
+    sources: int
+
+
+class MarketIndex:
+    """Precios actuales por clave de matcheo, en memoria."""
+
+    def __init__(self):
+        self._prices: dict[str, dict[tuple[str, str], float]] = {}
+        self._keys: dict[tuple[str, str], str] = {}
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def apply(self, rows: Iterable[tuple]) -> int:
+        """Aplicar filas (source, product_id, match_key, price, updated_at)."""
+        count = 0
+        for source, product_id, key, price, _ in rows:
+            ident = (source, product_id)
+            old_key = self._keys.get(ident)
+            if old_key is not None and old_key != key:
+                bucket = self._prices.get(old_key)
+                if bucket is not None:
+                    bucket.pop(ident, None)
+                    if not bucket:
+                        del self._prices[old_key]
+
+            if price and price > 0:
+                self._prices.setdefault(key, {})[ident] = price
+                self._keys[ident] = key
+            else:
+                bucket = self._prices.get(key)
+                if bucket is not None:
+                    bucket.pop(ident, None)
+                    if not bucket:
+                        del self._prices[key]
+                self._keys.pop(ident, None)
+
+            count += 1
+        return count
+
+    def reference(self, key: str, exclude_source: str) -> Optional[MarketRef]:
+        """Mínimo y mediana (por tienda) de los competidores de `exclude_source`."""
+        bucket = self._prices.get(key)
+        if not bucket:
+            return None
+        best: dict[str, float] = {}
+        # Copia atómica: un apply() concurrente puede estar mutando el bucket
+        for (source, _), price in tuple(bucket.items()):
+            if source != exclude_source and (source not in best or price < best[source]):
+                best[source] = price
+        if not best:
+            return None
+        min_source = min(best, key=best.get)
+        return MarketRef(
+            min_price=best[min_source],
+            median_price=statistics.median(best.values()),
+            min_source=min_source,
+            sources=len(best),
+        )
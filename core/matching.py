@@ -0,0 +1,275 @@
+"""
+🔗 Matching — El mismo producto en distintas tiendas (match_key)
+
+Cada tienda titula distinto ("Notebook Lenovo IdeaPad 3 15\"" vs
+"NOTEBOOK LENOVO IDEAPAD 3 15.6 I5"), así que comparar nombres exactos
+casi nunca matchea. Pipeline:
+
+1. Normalización: minúsculas, sin acentos ni puntuación, sin ruido
+   comercial ("smart", "oferta", "pulgadas"...).
+2. Tokens: marca (la del producto o detectada en el nombre) + tokens de
+   modelo (los que tienen dígitos: "a54", "128gb", "55").
+3. EAN: si la tienda lo expone, manda (match_key = "ean:...").
+4. Blocking: cada producto cae en los bloques marca|token_de_modelo; los
+   candidatos salen solo de sus bloques (nunca O(n²)), y solo se
+   comparan con productos de OTRAS tiendas.
+5. Score: Jaccard de tokens, con veto si los modelos no comparten nada,
+   si una misma medida difiere (55" vs 50", 128gb vs 256gb) o si los
+   códigos de modelo no coinciden (a54 vs a34).
+   Si supera MATCH_THRESHOLD, el producto adopta el match_key del
+   candidato; si no, abre un grupo nuevo ("name:<nombre normalizado>").
+
+ProductMatcher mantiene el índice en memoria; el ledger persiste cada
+asignación en product_matches (core/database.py), incremental en cada save.
+
+Uso:
+    record = matcher.match("fravega", product.id, product.name, product.brand, ean)
+    record.match_key   # 'ean:7791234567890' / 'name:notebook lenovo ideapad 3 15'
+"""
+
+from __future__ import annotations
+
+import re
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+MATCH_THRESHOLD = 0.6       # Jaccard mínimo para considerar mismo producto
+MAX_BLOCK_SIZE = 100        # Bloques más grandes son tokens genéricos: se ignoran
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_UNITS = r"gb|tb|mb|hz|w|kg|lts?|l|pulgadas|mah|mp"
+# "128 gb" → "128gb", "55 pulgadas" → "55pulgadas" (unidad pegada al número)
+_NUMBER_UNIT = re.compile(rf"\b(\d+)\s+({_UNITS})\b")
+# Medida: número suelto o con unidad ("55", "128gb")
+_MEASURE = re.compile(rf"(\d+)({_UNITS})?")
+
+# Ruido comercial / de categoría que no identifica al producto
+NOISE_TOKENS = frozenset({
+    "celular", "celulares", "smartphone", "smart", "tv", "led", "oled", "qled",
+    "pulgadas", "monitor", "notebook", "nuevo", "nueva", "oferta", "de", "con",
+    "para", "el", "la", "y", "en", "color", "negro", "negra", "blanco", "blanca",
+    "gris", "azul", "plata", "libre", "liberado", "original", "garantia",
+})
+
+# Marcas frecuentes (para detectarla en el nombre cuando el target no la expone)
+KNOWN_BRANDS = frozenset({
+    "samsung", "lg", "motorola", "xiaomi", "apple", "iphone", "lenovo", "hp",
+    "acer", "asus", "dell", "noblex", "philips", "tcl", "hisense", "sony",
+    "bgh", "whirlpool", "drean", "gafa", "electrolux", "patrick", "atma",
+    "liliana", "peabody", "oster", "philco", "jbl", "huawei", "nokia",
+    "alcatel", "tp", "xbox", "nintendo", "playstation", "kanji", "exo",
+})
+
+
+def normalize_name(name: str) -> str:
+    """'Smart TV Samsung 55" UHD' → 'smart tv samsung 55 uhd'."""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = text.encode("ascii", "ignore").decode("ascii").lower()
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def tokenize(name: str) -> frozenset[str]:
+    """Tokens significativos del nombre (sin ruido comercial)."""
+    text = _NUMBER_UNIT.sub(r"\1\2", normalize_name(name))
+    return frozenset(t for t in text.split() if t not in NOISE_TOKENS)
+
+
+def model_tokens(tokens: Iterable[str]) -> frozenset[str]:
+    """Tokens de modelo: los que tienen dígitos ('a54', '128gb', '55')."""
+    return frozenset(t for t in tokens if any(ch.isdigit() for ch in t) and len(t) >= 2)
+
+
+def detect_brand(brand: str, tokens: Iterable[str]) -> str:
+    """Marca normalizada: la del target, o la primera marca conocida del nombre."""
+    brand = normalize_name(brand)
+    if brand:
+        return brand.split()[0]
+    return next((t for t in sorted(tokens) if t in KNOWN_BRANDS), "")
+
+
+def normalize_ean(ean) -> str:
+    ean = str(ean).strip() if ean else ""
+    return ean.lstrip("0") if ean.isdigit() and len(ean) >= 8 else ""
+
+
+def block_keys(brand: str, models: Iterable[str]) -> tuple[str, ...]:
+    """Bloques de candidatos: marca + cada token de modelo."""
+    return tuple(f"{brand}|{m}" for m in sorted(models))
+
+
+def size_tokens(models: Iterable[str]) -> frozenset[str]:
+    """Medidas (tamaños/capacidades): números sueltos o con unidad ('55', '128gb')."""
+    return frozenset(t for t in models if _MEASURE.fullmatch(t))
+
+
+def _measures_conflict(sizes_a: frozenset[str], sizes_b: frozenset[str]) -> bool:
+    """¿Alguna unidad presente en ambos sin ningún valor en común? (50 vs 55, 128gb vs 256gb)"""
+    by_unit: dict[str, tuple[set[str], set[str]]] = {}
+    for side, sizes in enumerate((sizes_a, sizes_b)):
+        for token in sizes:
+            number, unit = _MEASURE.fullmatch(token).groups()
+            by_unit.setdefault(unit or "", (set(), set()))[side].add(number)
+    return any(a and b and not (a & b) for a, b in by_unit.values())
+
+
+def similarity(a: frozenset[str], b: frozenset[str], models_a: frozenset[str],
+               models_b: frozenset[str], sizes_a: Optional[frozenset[str]] = None,
+               sizes_b: Optional[frozenset[str]] = None) -> float:
+    """
+    Jaccard de tokens, con veto cuando los modelos se contradicen:
+    no comparten ningún token de modelo, ambos tienen una misma medida
+    con valores distintos (50 vs 55, 128gb vs 256gb), o ambos tienen
+    códigos de modelo (a54, g34) y ninguno en común.
+    """
+    if models_a and models_b:
+        if not (models_a & models_b):
+            return 0.0
+        sizes_a = size_tokens(models_a) if sizes_a is None else sizes_a
+        sizes_b = size_tokens(models_b) if sizes_b is None else sizes_b
+        if sizes_a and sizes_b and _measures_conflict(sizes_a, sizes_b):
+            return 0.0
+        codes_a, codes_b = models_a - sizes_a, models_b - sizes_b
+        if codes_a and codes_b and not (codes_a & codes_b):
+            return 0.0
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+@dataclass
+class MatchRecord:
+    """Asignación de un producto a un grupo de matcheo."""
+    source: str
+    product_id: str
+    match_key: str
+    brand: str
+    tokens: frozenset[str]
+    method: str = "new"        # 'ean' | 'fuzzy' | 'new'
+    score: float = 1.0
+    updated_at: int = 0
+    models: frozenset[str] = field(init=False, repr=False, compare=False)
+    sizes: frozenset[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.models = model_tokens(self.tokens)
+        self.sizes = size_tokens(self.models)
+
+    @property
+    def blocks(self) -> tuple[str, ...]:
+        return block_keys(self.brand, self.models)
+
+    def as_row(self) -> tuple:
+        return (
+            self.source, self.product_id, self.match_key, self.brand,
+            " ".join(sorted(self.tokens)), self.method, self.score, self.updated_at,
+        )
+
+
+class ProductMatcher:
+    """
+    Índice de matcheo en memoria (espejo de product_matches).
+    
+    Un solo escritor (add/load, bajo el lock del ledger) y lectores sin
+    lock (get/match): los lectores solo hacen operaciones que el GIL
+    vuelve atómicas (dict.get, set.update de un bloque), así que un add
+    concurrente a lo sumo deja ver el bloque de antes o el de después.
+    """
+
+    def __init__(self, threshold: float = MATCH_THRESHOLD, max_block_size: int = MAX_BLOCK_SIZE):
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self._records: dict[tuple[str, str], MatchRecord] = {}
+        self._blocks: dict[str, set[tuple[str, str]]] = {}
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, source: str, product_id: str) -> Optional[MatchRecord]:
+        return self._records.get((source, product_id))
+
+    def load(self, rows: Iterable[tuple]) -> int:
+        """Aplicar filas (source, product_id, match_key, brand, tokens, method, score, updated_at)."""
+        count = 0
+        for source, product_id, key, brand, tokens, method, score, updated_at in rows:
+            self.add(MatchRecord(
+                source, product_id, key, brand or "",
+                frozenset((tokens or "").split()), method, score, updated_at,
+            ))
+            count += 1
+        return count
+
+    def add(self, record: MatchRecord) -> None:
+        ident = (record.source, record.product_id)
+        old = self._records.get(ident)
+        if old is not None:
+            for block in old.blocks:
+                members = self._blocks.get(block)
+                if members is not None:
+                    members.discard(ident)
+        self._records[ident] = record
+        for block in record.blocks:
+            self._blocks.setdefault(block, set()).add(ident)
+
+    def match(
+        self,
+        source: str,
+        product_id: str,
+        name: str,
+        brand: str = "",
+        ean=None,
+        now: Optional[int] = None,
+    ) -> MatchRecord:
+        """
+        Asignar match_key a un producto (no modifica el índice: ver add()).
+        Si ya estaba indexado con los mismos tokens, se reutiliza.
+        """
+        tokens = tokenize(name)
+        brand = detect_brand(brand, tokens)
+        ean = normalize_ean(ean)
+        now = now or int(time.time())
+
+        existing = self._records.get((source, product_id))
+        if existing is not None and existing.tokens == tokens and (
+            not ean or existing.match_key == f"ean:{ean}"
+        ):
+            return existing
+
+        if ean:
+            return MatchRecord(source, product_id, f"ean:{ean}", brand, tokens, "ean", 1.0, now)
+
+        best, best_score = self._best_candidate(source, brand, tokens)
+        if best is not None:
+            return MatchRecord(source, product_id, best.match_key, brand, tokens,
+                               "fuzzy", round(best_score, 3), now)
+
+        return MatchRecord(source, product_id, f"name:{normalize_name(name)}", brand,
+                           tokens, "new", 1.0, now)
+
+    def _best_candidate(
+        self, source: str, brand: str, tokens: frozenset[str]
+    ) -> tuple[Optional[MatchRecord], float]:
+        models = model_tokens(tokens)
+        sizes = size_tokens(models)
+        candidates: set[tuple[str, str]] = set()
+        for block in block_keys(brand, models):
+            members = self._blocks.get(block)
+            if members and len(members) <= self.max_block_size:
+                candidates.update(members)  # atómico: add() puede estar mutando el bloque
+
+        best, best_score = None, 0.0
+        for ident in candidates:
+            if ident[0] == source:
+                continue
+            other = self._records[ident]
+            score = similarity(tokens, other.tokens, models, other.models, sizes, other.sizes)
+            if score < self.threshold:
+                continue
+            # Empate: gana el grupo con EAN (más confiable)
+            if best is None or score > best_score or (
+                score == best_score
+                and other.match_key.startswith("ean:") and not best.match_key.startswith("ean:")
+            ):
+                best, best_score = other, score
+        return best, best_score
@@ -1,80 +1,340 @@
+"""
+📣 Telegram Notifier — Alertas sin bloquear al sniffer ni al flood control
+
+Entrega en tres partes:
+1. Una session larga: un AsyncHttpClient por notifier (sin stealth ni
+   retries propios: el reintento lo decide la cola), cerrada con close().
+2. Cola de salida: un sender en background respeta el límite global del
+   bot (~30 msg/s) y el de cada chat (1 msg/s privado, 20/min en grupos y
+   canales). Un 429 congela el envío los `retry_after` segundos que pide
+   Telegram y el mensaje vuelve al frente; errores de red y 5xx reintentan
+   con backoff hasta MAX_ATTEMPTS; otros 4xx (token, chat o HTML
+   inválidos) se descartan de una. Si la cola se llena se descartan los
+   más viejos: encolar nunca espera.
+3. Digest: las alertas de un mismo grupo (tienda + categoría) se juntan
+   durante DIGEST_WINDOW segundos; una sola sale como alerta completa,
+   varias salen como un resumen, partido por largo renderizado (cada parte
+   entra en MAX_MESSAGE_CHARS; el HTML nunca se corta).
+
+Uso:
+    notifier = TelegramNotifier()
+    await notifier.send_opportunity(opp, group="celulares")   # encola y vuelve
+    await notifier.close()                                     # drena y cierra
+"""
+
 import os
 import asyncio
+import html
 import logging
+import time
+from collections import deque
+from dataclasses import dataclass
 from typing import Optional
-from core.http_client import AsyncHttpClient
+
+from core.http_client import AsyncHttpClient, ClientError, RateLimitError, WAFBlockedError
 
 logger = logging.getLogger("notifier")
 
+TELEGRAM_API = "https://api.telegram.org/bot{token}/{method}"
+
+GLOBAL_INTERVAL = 1 / 30        # s entre mensajes del bot (límite global)
+CHAT_INTERVAL = 1.0             # s entre mensajes a un chat privado
+GROUP_INTERVAL = 3.0            # s entre mensajes a un grupo/canal (20/min)
+DEFAULT_RETRY_AFTER = 30.0      # s si un 429 no dice cuánto esperar
+MAX_ATTEMPTS = 5                # Intentos por mensaje (errores de red / 5xx)
+MAX_QUEUE = 500                 # Mensajes en cola antes de descartar los más viejos
+DIGEST_WINDOW = 5.0             # s que se acumulan alertas de un grupo
+MAX_MESSAGE_CHARS = 4096        # Límite de Telegram por mensaje
+
+
+@dataclass
+class OutboundMessage:
+    """Mensaje en la cola de salida."""
+    chat_id: str
+    text: str
+    parse_mode: str = "HTML"
+    attempts: int = 0
+
+
+def _ars(value: float) -> str:
+    """Formato AR: 1234567 → '1.234.567'."""
+    return f"{value:,.0f}".replace(",", ".")
+
+
 class TelegramNotifier:
     """
     Sistema de notificaciones para Telegram.
     Permite enviar alertas de oportunidades confirmadas a canales VIP.
     """
-    
-    def __init__(self, token: Optional[str] = None, chat_id: Optional[str] = None):
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        chat_id: Optional[str] = None,
+        digest_window: float = DIGEST_WINDOW,
+        max_queue: int = MAX_QUEUE,
+    ):
         self.token = token or os.environ.get("TELEGRAM_BOT_TOKEN")
         self.chat_id = chat_id or os.environ.get("TELEGRAM_CHAT_ID")
-        self.client = AsyncHttpClient()
-        
-    async def send_message(self, text: str, parse_mode: str = "HTML") -> bool:
-        """Envía un mensaje de texto simple."""
-        if not self.token or not self.chat_id:
+        self.digest_window = digest_window
+        self.max_queue = max_queue
+        self.client = AsyncHttpClient(stealth_mode=False, retry_count=0, max_concurrent=1)
+        self.stats = {"sent": 0, "digests": 0, "failed": 0, "dropped": 0, "rate_limited": 0}
+
+        # Cola de salida + pacing (se crean en el loop activo)
+        self._outbox: deque[OutboundMessage] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._sender: Optional[asyncio.Task] = None
+        self._blocked_until = 0.0
+        self._next_global = 0.0
+        self._next_chat: dict[str, float] = {}
+
+        # Digest: grupo → alertas acumuladas
+        self._digests: dict[str, list[dict]] = {}
+        self._digest_tasks: dict[str, asyncio.Task] = {}
+        self._warned = False
+
+    def _configured(self) -> bool:
+        if self.token and self.chat_id:
+            return True
+        if not self._warned:
             logger.warning("⚠️ Telegram Notifier no configurado (falta TOKEN o CHAT_ID)")
+            self._warned = True
+        return False
+
+    # --- Cola de salida ---
+
+    async def send_message(self, text: str, parse_mode: str = "HTML") -> bool:
+        """Encolar un mensaje de texto simple (vuelve enseguida; si es largo, en partes)."""
+        if not self._configured():
             return False
-            
-        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
+        for part in self._split_text(text):
+            self._enqueue(OutboundMessage(str(self.chat_id), part, parse_mode))
+        return True
+
+    @staticmethod
+    def _split_text(text: str, limit: int = MAX_MESSAGE_CHARS) -> list[str]:
+        """
+        Partir en mensajes de hasta `limit` caracteres por saltos de línea
+        (los tags HTML no cruzan líneas: cada parte sigue siendo válida).
+        Una sola línea más larga que `limit` sale entera y Telegram la rechaza.
+        """
+        parts: list[str] = []
+        current: Optional[str] = None
+        for line in text.split("\n"):
+            if current is None:
+                current = line
+            elif len(current) + 1 + len(line) <= limit:
+                current += "\n" + line
+            else:
+                parts.append(current)
+                current = line
+        parts.append(current)
+        return parts
+
+    def _enqueue(self, msg: OutboundMessage) -> None:
+        self._ensure_sender()
+        if len(self._outbox) >= self.max_queue:
+            self._outbox.popleft()
+            self.stats["dropped"] += 1
+            logger.warning(f"⚠️ Cola de Telegram llena ({self.max_queue}): se descartó el mensaje más viejo")
+        self._outbox.append(msg)
+        self._idle.clear()
+        self._wakeup.set()
+
+    def _ensure_sender(self) -> None:
+        if self._sender is None or self._sender.done():
+            self._wakeup = self._wakeup or asyncio.Event()
+            self._idle = self._idle or asyncio.Event()
+            self._sender = asyncio.create_task(self._send_loop())
+
+    @staticmethod
+    def _chat_interval(chat_id: str) -> float:
+        # Grupos y canales tienen ids negativos (o @username de canal)
+        return GROUP_INTERVAL if chat_id.startswith(("-", "@")) else CHAT_INTERVAL
+
+    async def _send_loop(self) -> None:
+        while True:
+            if not self._outbox:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            msg = self._outbox[0]
+            now = time.monotonic()
+            ready_at = max(self._blocked_until, self._next_global, self._next_chat.get(msg.chat_id, 0.0))
+            if ready_at > now:
+                await asyncio.sleep(ready_at - now)
+                continue
+
+            self._outbox.popleft()
+            self._next_global = now + GLOBAL_INTERVAL
+            self._next_chat[msg.chat_id] = now + self._chat_interval(msg.chat_id)
+            try:
+                await self._deliver(msg)
+                self.stats["sent"] += 1
+            except RateLimitError as e:
+                wait = e.retry_after or DEFAULT_RETRY_AFTER
+                self._blocked_until = time.monotonic() + wait
+                self._outbox.appendleft(msg)
+                self.stats["rate_limited"] += 1
+                logger.warning(f"🛡️ Flood control de Telegram: pausa de {wait:.0f}s ({len(self._outbox)} en cola)")
+            except (ClientError, WAFBlockedError) as e:
+                # 400/401/403/404: reintentar no lo arregla (ni frena a los demás)
+                self.stats["failed"] += 1
+                logger.error(f"❌ Telegram rechazó el mensaje (descartado): {e}")
+            except Exception as e:
+                msg.attempts += 1
+                if msg.attempts >= MAX_ATTEMPTS:
+                    self.stats["failed"] += 1
+                    logger.error(f"❌ Error enviando a Telegram (descartado tras {msg.attempts} intentos): {e}")
+                else:
+                    self._blocked_until = time.monotonic() + min(60.0, 2.0 ** msg.attempts)
+                    self._outbox.appendleft(msg)
+                    logger.warning(f"⚠️ Error enviando a Telegram, reintento {msg.attempts}/{MAX_ATTEMPTS}: {e}")
+
+    async def _deliver(self, msg: OutboundMessage) -> None:
+        url = TELEGRAM_API.format(token=self.token, method="sendMessage")
         payload = {
-            "chat_id": self.chat_id,
-            "text": text,
-            "parse_mode": parse_mode,
+            "chat_id": msg.chat_id,
+            "text": msg.text,
+            "parse_mode": msg.parse_mode,
             "disable_web_page_preview": False
         }
-        
-        try:
-            resp = await self.client.post(url, json=payload)
-            if resp.status_code == 200:
-                logger.info("✅ Alerta enviada a Telegram")
-                return True
-            else:
-                logger.error(f"❌ Error enviando a Telegram: {resp.status_code} - {resp.text}")
-                return False
-        except Exception as e:
-            logger.error(f"💥 Error en TelegramNotifier: {e}")
-            return False
+        await self.client.post(url, json=payload)
+        logger.info("✅ Alerta enviada a Telegram")
 
-    async def send_opportunity(self, opp) -> bool:
-        """
-        Envía una alerta formateada de una oportunidad de Odiseo.
-        'opp' debe ser una instancia de OdiseoOpportunity o un dict similar.
-        """
-        # Formatear el mensaje
+    # --- Oportunidades + digest ---
+
+    @staticmethod
+    def _opportunity_fields(opp) -> dict:
         # Si es un objeto (dataclass)
         if hasattr(opp, "name"):
-            name = opp.name
-            price = opp.current_price
-            gap = opp.gap_teorico
-            margin = opp.margen_odiseo
-            url = opp.url
-            store = "Frávega" # Hardcoded por ahora o derivado
-        else:
-            name = opp.get("name", "Producto")
-            price = opp.get("current_price", 0)
-            gap = opp.get("gap_teorico", 0)
-            margin = opp.get("margen_odiseo", 0)
-            url = opp.get("url", "#")
-            store = opp.get("store", "Tienda")
-
-        msg = (
+            return {
+                "name": opp.name,
+                "price": opp.current_price,
+                "gap": opp.gap_teorico,
+                "margin": opp.margen_odiseo,
+                "url": opp.url,
+                "store": "Frávega",  # Hardcoded por ahora o derivado
+            }
+        return {
+            "name": opp.get("name", "Producto"),
+            "price": opp.get("current_price", 0),
+            "gap": opp.get("gap_teorico", 0),
+            "margin": opp.get("margen_odiseo", 0),
+            "url": opp.get("url", "#"),
+            "store": opp.get("store", "Tienda"),
+        }
+
+    @staticmethod
+    def _format_opportunity(item: dict) -> str:
+        return (
             f"🚀 <b>¡OPORTUNIDAD CONFIRMADA!</b>\n\n"
-            f"📦 <b>{name}</b>\n"
-            f"🏪 Tienda: {store}\n\n"
-            f"💰 Precio: <b>${price:,.0f}</b>\n"
-            f"📉 Gap: {gap:.1f}%\n"
-            f"💸 <b>Margen Neto: {margin:.1f}%</b>\n\n"
+            f"📦 <b>{html.escape(item['name'])}</b>\n"
+            f"🏪 Tienda: {html.escape(item['store'])}\n\n"
+            f"💰 Precio: <b>${_ars(item['price'])}</b>\n"
+            f"📉 Gap: {item['gap']:.1f}%\n"
+            f"💸 <b>Margen Neto: {item['margin']:.1f}%</b>\n\n"
             f"✅ Stock Validado (Real-time)\n"
-            f"🔗 <a href='{url}'>VER PRODUCTO EN TIENDA</a>\n\n"
+            f"🔗 <a href='{html.escape(item['url'])}'>VER PRODUCTO EN TIENDA</a>\n\n"
             f"🛰 <i>Enviado por Odiseo Bot v2.0</i>"
-        ).replace(",", ".") # Formato AR: $1.234
-        
-        return await self.send_message(msg)
+        )
+
+    @staticmethod
+    def _format_digest(group: str, items: list[dict], part: int, parts: int) -> str:
+        title = f"🚀 <b>{len(items)} OPORTUNIDADES CONFIRMADAS</b>"
+        if group:
+            title += f" — {html.escape(group)}"
+        if parts > 1:
+            title += f" ({part}/{parts})"
+        lines = [
+            f"• <a href='{html.escape(i['url'])}'>{html.escape(i['name'][:60])}</a>\n"
+            f"   ${_ars(i['price'])} | Gap {i['gap']:.1f}% | <b>Margen {i['margin']:.1f}%</b>"
+            for i in items
+        ]
+        return f"{title}\n\n" + "\n".join(lines) + "\n\n🛰 <i>Enviado por Odiseo Bot v2.0</i>"
+
+    @classmethod
+    def _digest_chunks(cls, group: str, items: list[dict]) -> list[list[dict]]:
+        """
+        Partes del resumen: se agregan items mientras el mensaje renderizado
+        entre en MAX_MESSAGE_CHARS (el "(n/N)" del título se mide con el peor caso).
+        """
+        worst = len(items)
+        chunks: list[list[dict]] = []
+        current: list[dict] = []
+        for item in items:
+            rendered = cls._format_digest(group, current + [item], worst, worst)
+            if current and len(rendered) > MAX_MESSAGE_CHARS:
+                chunks.append(current)
+                current = []
+            current.append(item)
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def send_opportunity(self, opp, group: Optional[str] = None) -> bool:
+        """
+        Encola una alerta de una oportunidad de Odiseo (vuelve enseguida).
+        'opp' debe ser una instancia de OdiseoOpportunity o un dict similar.
+        Las del mismo `group` en DIGEST_WINDOW segundos salen en un resumen.
+        """
+        if not self._configured():
+            return False
+        item = self._opportunity_fields(opp)
+        key = f"{item['store']} · {group}" if group else item["store"]
+        self._digests.setdefault(key, []).append(item)
+        if key not in self._digest_tasks:
+            self._digest_tasks[key] = asyncio.create_task(self._flush_digest_later(key))
+        return True
+
+    async def _flush_digest_later(self, key: str) -> None:
+        await asyncio.sleep(self.digest_window)
+        self._flush_digest(key)
+
+    def _flush_digest(self, key: str) -> None:
+        self._digest_tasks.pop(key, None)
+        items = self._digests.pop(key, [])
+        if len(items) == 1:
+            self._enqueue(OutboundMessage(str(self.chat_id), self._format_opportunity(items[0])))
+            return
+        # Mejores márgenes primero
+        items.sort(key=lambda i: -i["margin"])
+        chunks = self._digest_chunks(key, items)
+        for n, chunk in enumerate(chunks, 1):
+            text = self._format_digest(key, chunk, n, len(chunks))
+            self._enqueue(OutboundMessage(str(self.chat_id), text))
+            self.stats["digests"] += 1
+        logger.info(f"📦 Digest de {len(items)} alertas para {key} ({len(chunks)} mensajes)")
+
+    # --- Ciclo de vida ---
+
+    def pending(self) -> int:
+        """Alertas y mensajes todavía sin enviar."""
+        return len(self._outbox) + sum(len(items) for items in self._digests.values())
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Enviar ya los digests abiertos y esperar que se vacíe la cola. True = sin fallos."""
+        failed = self.stats["failed"] + self.stats["dropped"]
+        for key in list(self._digest_tasks):
+            self._digest_tasks[key].cancel()
+            self._flush_digest(key)
+        if self._sender is not None and not self._idle.is_set():
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ Quedaron {len(self._outbox)} mensajes de Telegram sin enviar")
+                return False
+        return self.stats["failed"] + self.stats["dropped"] == failed
+
+    async def close(self, timeout: float = 30.0) -> None:
+        """Drenar la cola (hasta `timeout`) y cerrar la session."""
+        await self.flush(timeout)
+        if self._sender is not None:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+            self._sender = None
+        await self.client.close()
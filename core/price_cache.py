@@ -0,0 +1,128 @@
+"""
+🧮 Price Cache — Último precio/stock visto por producto (en memoria)
+
+Extraído de:
+- python-performance-optimization skill (evitar round-trips, batch writes)
+
+Cada sniffer hacía un SELECT por producto para comparar contra el último
+precio y después un UPDATE, aunque nada hubiera cambiado. Con el cache
+(cargado una vez al arrancar) cada batch se divide en:
+
+- new       → INSERT (un executemany)
+- changed   → UPDATE completo + historial/alertas (un executemany)
+- unchanged → solo "touch" de last_seen (un executemany barato)
+
+Uso:
+    cache = PriceCache()
+    cache.load(conn.execute("SELECT id, last_price, stock FROM products"))
+
+    diff = cache.split(products, stock_of=lambda p: p.raw_data.get("stock", 0))
+    ... escribir diff.new / diff.changed / diff.unchanged ...
+    cache.update(diff.new + [p for p, _ in diff.changed], stock_of=...)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
+
+if TYPE_CHECKING:
+    from core.base_sniffer import Product
+
+# Diferencia mínima de precio (ARS) para considerar que cambió
+PRICE_EPSILON = 0.01
+
+# Máximo de parámetros por "WHERE id IN (...)" (SQLite limita a 999 en builds viejos)
+SQLITE_MAX_VARS = 500
+
+
+def chunked(items: list, size: int = SQLITE_MAX_VARS) -> Iterable[list]:
+    """Partir una lista en trozos de a lo sumo `size` (para queries IN)."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+@dataclass
+class PriceDiff:
+    """Resultado de comparar un batch contra el cache."""
+    new: list[Product] = field(default_factory=list)
+    changed: list[tuple[Product, float]] = field(default_factory=list)  # (producto, precio anterior)
+    unchanged: list[Product] = field(default_factory=list)
+
+    @property
+    def to_write(self) -> list[Product]:
+        """Productos que requieren escritura completa (nuevos + cambiados)."""
+        return self.new + [p for p, _ in self.changed]
+
+    @property
+    def repriced(self) -> list[tuple[Product, float]]:
+        """Cambiados cuyo precio (no solo el stock) se movió."""
+        return [
+            (p, old) for p, old in self.changed
+            if abs(old - p.current_price) > PRICE_EPSILON
+        ]
+
+
+class PriceCache:
+    """
+    Mapa product_id → (último precio, último stock) de un target.
+
+    No es thread-safe por sí mismo: BaseSniffer ya serializa save_products().
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._entries
+
+    def load(self, rows: Iterable[tuple]) -> int:
+        """Cargar desde filas (id, price[, stock]). Retorna cantidad cargada."""
+        for row in rows:
+            stock = row[2] if len(row) > 2 else None
+            self._entries[str(row[0])] = (float(row[1] or 0), stock)
+        return len(self._entries)
+
+    def get_price(self, product_id: str) -> Optional[float]:
+        entry = self._entries.get(product_id)
+        return entry[0] if entry else None
+
+    def split(
+        self,
+        products: Iterable[Product],
+        stock_of: Optional[Callable[[Product], Any]] = None,
+    ) -> PriceDiff:
+        """
+        Dividir un batch en nuevos / con cambio de precio o stock / sin cambios.
+        Si un id aparece repetido en el batch, gana la última aparición.
+        """
+        latest: dict[str, Product] = {}
+        for p in products:
+            latest[p.id] = p
+
+        diff = PriceDiff()
+        for p in latest.values():
+            entry = self._entries.get(p.id)
+            if entry is None:
+                diff.new.append(p)
+                continue
+
+            old_price, old_stock = entry
+            stock = stock_of(p) if stock_of else None
+            if abs(old_price - p.current_price) > PRICE_EPSILON or stock != old_stock:
+                diff.changed.append((p, old_price))
+            else:
+                diff.unchanged.append(p)
+        return diff
+
+    def update(
+        self,
+        products: Iterable[Product],
+        stock_of: Optional[Callable[[Product], Any]] = None,
+    ) -> None:
+        """Reflejar en el cache lo que ya se escribió en la DB."""
+        for p in products:
+            self._entries[p.id] = (p.current_price, stock_of(p) if stock_of else None)
@@ -0,0 +1,158 @@
+"""
+⏱️ Rate Limiter — Token Bucket por dominio
+
+Extraído de:
+- error-handling-patterns skill (backoff + presupuesto de requests)
+- async-python-patterns skill (esperas no bloqueantes)
+
+Un token bucket admite ráfagas de hasta `capacity` requests y después
+repone `rate` tokens por segundo. Admisión O(1): no guarda timestamps.
+
+Uso:
+    from core.rate_limiter import DomainRateLimiter
+
+    limiter = DomainRateLimiter(max_requests_per_hour=300, burst=10)
+    wait = limiter.try_acquire("www.fravega.com")
+    if wait > 0:
+        ...  # dormir, o hacer otra cosa mientras tanto
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class TokenBucket:
+    """
+    Token bucket clásico.
+
+    `try_consume()` nunca duerme: consume un token y retorna 0.0, o no
+    consume nada y retorna los segundos que faltan para que haya uno.
+    """
+    rate: float                      # tokens repuestos por segundo
+    capacity: float                  # burst máximo
+    tokens: float = field(default=-1.0)
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        if self.tokens < 0:
+            self.tokens = self.capacity
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def time_until(self, tokens: float = 1.0, now: float | None = None) -> float:
+        """Segundos hasta que haya `tokens` disponibles (sin consumir)."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= tokens:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (tokens - self.tokens) / self.rate
+
+    def try_consume(self, tokens: float = 1.0, now: float | None = None) -> float:
+        """Consumir `tokens` si hay. Retorna 0.0 o segundos de espera."""
+        wait = self.time_until(tokens, now)
+        if wait <= 0:
+            self.tokens -= tokens
+        return wait
+
+
+class DomainRateLimiter:
+    """
+    Rate limiter por clave (dominio), thread-safe y compartible.
+
+    Un TokenBucket por dominio, creado on-demand. Todas las operaciones son
+    O(1) y se hacen bajo un lock corto; las esperas ocurren FUERA del lock,
+    así un thread que espera no frena a los que van a otros dominios.
+
+    - try_acquire()      → consume o dice cuánto falta (nunca duerme)
+    - time_until_ready() → consulta sin consumir (para schedulers)
+    - acquire()          → espera bloqueante con timeout (clientes sync)
+    - acquire_async()    → espera con asyncio.sleep (clientes async)
+    - *_async()          → variantes para el event loop (SharedDomainRateLimiter
+                           las corre en un thread)
+
+    Ejemplo:
+        limiter = DomainRateLimiter.shared()          # uno por proceso
+        a = HttpClient(rate_limiter=limiter)
+        b = HttpClient(rate_limiter=limiter)          # mismo presupuesto
+        
+        if limiter.time_until_ready("www.fravega.com") > 30:
+            ...  # hacer otra cosa en vez de dormir
+    """
+
+    _shared: Optional["DomainRateLimiter"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_requests_per_hour: float = 300, burst: int = 10):
+        self.max_requests_per_hour = max_requests_per_hour
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "DomainRateLimiter":
+        """Limiter por defecto del proceso (compartido entre clientes)."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate=self.max_requests_per_hour / 3600, capacity=self.burst)
+            self._buckets[key] = bucket
+        return bucket
+
+    def try_acquire(self, key: str, tokens: float = 1.0) -> float:
+        """Consumir un slot para `key`. Retorna 0.0 o segundos a esperar."""
+        with self._lock:
+            return self._bucket(key).try_consume(tokens)
+
+    def time_until_ready(self, key: str, tokens: float = 1.0) -> float:
+        """Segundos hasta que haya un slot para `key` (sin consumir)."""
+        with self._lock:
+            return self._bucket(key).time_until(tokens)
+
+    async def try_acquire_async(self, key: str, tokens: float = 1.0) -> float:
+        """try_acquire() para clientes async (en memoria: no bloquea)."""
+        return self.try_acquire(key, tokens)
+
+    async def time_until_ready_async(self, key: str, tokens: float = 1.0) -> float:
+        """time_until_ready() para clientes async (en memoria: no bloquea)."""
+        return self.time_until_ready(key, tokens)
+
+    def acquire(self, key: str, timeout: Optional[float] = None) -> bool:
+        """
+        Esperar (bloqueante) hasta obtener un slot.
+        Retorna False sin consumir si la espera superaría `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(key)
+            if wait <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, key: str, timeout: Optional[float] = None) -> bool:
+        """Como acquire(), pero cediendo el event loop mientras espera."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = await self.try_acquire_async(key)
+            if wait <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
@@ -0,0 +1,350 @@
+"""
+🏃 Runner — Todos los targets en un solo proceso
+
+El bridge (web/bridge_v2.py) lanza un intérprete por tienda: cinco
+tiendas = cinco copias de los imports, de las sessions curl_cffi, del
+ledger y de las reglas. Este runner carga cualquier conjunto de
+BaseSniffer en UN proceso y los corre concurrentemente desde un único
+event loop asyncio:
+
+- Cada target es una task que pide al CategoryScheduler sus categorías
+  vencidas y corre run_cycle() en un pool chico de threads (los sniffers
+  son sincrónicos: curl_cffi + SQLite).
+- Se comparte lo que es del proceso: Database.shared() (ledger),
+  GlitchRuleEngine.shared(), imports. Cada target conserva su HttpClient,
+  su rate limit por dominio y su circuit breaker: un 403 en una tienda no
+  frena a las otras.
+- Un target que falla al iniciar o en un ciclo queda en estado "error" y
+  reintenta con backoff, sin tirar al resto.
+- status() expone el estado por target (y --status-file lo vuelca a JSON
+  para el dashboard).
+
+Uso:
+    python core/runner.py --targets fravega,oncity,cetrogar --daemon
+    python core/runner.py --targets megatone --categories celulares tv
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.base_sniffer import BaseSniffer, ScrapeResult
+from core.scheduler import DEFAULT_BUDGET_PER_HOUR, CategoryScheduler
+
+logger = logging.getLogger("runner")
+
+# name → (módulo, clase, categorías por defecto: dict/list del módulo o función)
+# Frávega corre el v1: el v2 valida stock en su propio daemon asyncio (pool
+# de Playwright + ValidationQueue) que run_cycle() no maneja, y sin
+# Playwright instalado hace sys.exit() al importarse (tumbaría el runner).
+TARGETS = {
+    "fravega": ("targets.fravega.sniffer_fravega", "FravegaSniffer", "load_categories"),
+    "oncity": ("targets.oncity.sniffer_oncity", "OnCitySniffer", "ONCITY_CATEGORIES"),
+    "cetrogar": ("targets.cetrogar.sniffer_cetrogar", "CetrogarSniffer", "CETROGAR_CATEGORIES"),
+    "megatone": ("targets.megatone.sniffer_megatone", "MegatoneSniffer", "MEGATONE_CATEGORIES"),
+    "newsan": ("targets.newsan.sniffer_newsan", "NewsanSniffer", "NEWSAN_CATEGORIES"),
+    "casadelaudio": (
+        "targets.casadelaudio.sniffer_casadelaudio", "CasaDelAudioSniffer", "CASADELAUDIO_CATEGORIES",
+    ),
+}
+
+ERROR_BACKOFF = 60          # s de espera tras un error (se duplica hasta MAX_ERROR_BACKOFF)
+MAX_ERROR_BACKOFF = 900
+STATUS_LOG_INTERVAL = 300   # s entre logs de estado
+
+
+@dataclass
+class TargetStatus:
+    """Estado expuesto de un target."""
+    name: str
+    state: str = "pending"          # pending | starting | idle | scanning | error | stopped
+    categories: int = 0
+    cycles: int = 0
+    products: int = 0
+    glitches: int = 0
+    errors: int = 0
+    last_error: str = ""
+    last_scan_at: Optional[str] = None
+    next_scan_in: float = 0.0
+    circuit: str = ""
+
+
+def load_target(name: str) -> tuple[type[BaseSniffer], list[str]]:
+    """Importar la clase de un target y sus categorías por defecto."""
+    if name not in TARGETS:
+        raise ValueError(f"Target desconocido: {name} (disponibles: {', '.join(TARGETS)})")
+    module_name, class_name, categories_attr = TARGETS[name]
+    module = importlib.import_module(module_name)
+    categories = getattr(module, categories_attr)
+    if callable(categories):
+        categories = categories()
+    return getattr(module, class_name), list(categories)
+
+
+class TargetRunner:
+    """Loop de un target dentro del runner (una task del event loop)."""
+
+    def __init__(
+        self,
+        name: str,
+        categories: Optional[list[str]] = None,
+        interval: int = 120,
+        concurrency: int = 1,
+    ):
+        self.name = name
+        self.categories = categories
+        self.interval = interval
+        self.concurrency = concurrency
+        self.sniffer: Optional[BaseSniffer] = None
+        self.scheduler: Optional[CategoryScheduler] = None
+        self.status = TargetStatus(name)
+        self._backoff = ERROR_BACKOFF
+
+    def _start(self) -> None:
+        """Importar + instanciar el sniffer (bloqueante: corre en el pool)."""
+        sniffer_cls, default_categories = load_target(self.name)
+        self.categories = self.categories or default_categories
+        self.sniffer = sniffer_cls()
+        client = getattr(self.sniffer, "client", None)
+        self.scheduler = CategoryScheduler(
+            self.categories,
+            min_interval=self.interval,
+            budget_per_hour=getattr(client, "max_requests_per_hour", DEFAULT_BUDGET_PER_HOUR),
+        )
+        self.status.categories = len(self.categories)
+
+    def _fail(self, e: Exception) -> float:
+        self.status.state = "error"
+        self.status.errors += 1
+        self.status.last_error = str(e)[:200]
+        wait, self._backoff = self._backoff, min(self._backoff * 2, MAX_ERROR_BACKOFF)
+        logger.error(f"💥 {self.name}: {e} — reintento en {wait}s")
+        return wait
+
+    async def run(self, executor: ThreadPoolExecutor, stop: asyncio.Event, once: bool = False) -> None:
+        loop = asyncio.get_running_loop()
+
+        while self.sniffer is None and not stop.is_set():
+            self.status.state = "starting"
+            try:
+                await loop.run_in_executor(executor, self._start)
+                logger.info(f"🚀 {self.name}: {len(self.categories)} categorías")
+            except Exception as e:
+                if once:
+                    self._fail(e)
+                    return
+                await self._sleep(stop, self._fail(e))
+
+        while not stop.is_set():
+            # También con once: las categorías vencidas (presupuesto del scheduler)
+            due = self.scheduler.due()
+            if not due:
+                self.status.state = "idle"
+                self.status.next_scan_in = round(self.scheduler.seconds_until_next())
+                if once:
+                    return
+                await self._sleep(stop, self.status.next_scan_in)
+                continue
+
+            self.status.state = "scanning"
+            done: list[ScrapeResult] = []
+            try:
+                await loop.run_in_executor(
+                    executor,
+                    lambda: self.sniffer.run_cycle(
+                        due, concurrency=self.concurrency, on_result=done.append
+                    ),
+                )
+            except Exception as e:
+                self._record(done, due, e)
+                if once:
+                    self._fail(e)
+                    return
+                await self._sleep(stop, self._fail(e))
+                continue
+
+            self._backoff = ERROR_BACKOFF
+            self._record(done, due)
+            self.status.cycles += 1
+            self.status.last_scan_at = datetime.now().isoformat(timespec="seconds")
+            self.status.state = "idle"
+            if once:
+                return
+
+    def _record(
+        self, results: list[ScrapeResult], due: list[str], error: Optional[Exception] = None
+    ) -> None:
+        """
+        Pasar al scheduler lo scrapeado. Si el ciclo se cortó, las categorías
+        sin resultado cuentan como scan fallido: vuelven a su intervalo en vez
+        de quedar vencidas y repetirse enteras tras el backoff.
+        """
+        scanned = {result.category for result in results}
+        if error is not None:
+            results = results + [
+                ScrapeResult(target_name=self.name, category=category, errors=[str(error)])
+                for category in due if category not in scanned
+            ]
+        for result in results:
+            self.scheduler.record(result)
+            if result.category not in scanned:
+                continue
+            self.status.products += result.products_found
+            self.status.glitches += result.glitches_found
+            if result.errors:
+                self.status.errors += len(result.errors)
+                self.status.last_error = result.errors[-1][:200]
+
+    @staticmethod
+    async def _sleep(stop: asyncio.Event, seconds: float) -> None:
+        """Dormir `seconds` o hasta que se pida parar."""
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=max(seconds, 0.1))
+        except asyncio.TimeoutError:
+            pass
+
+    def snapshot(self) -> dict:
+        client = getattr(self.sniffer, "client", None)
+        breaker = getattr(client, "circuit_breaker", None)
+        if breaker is not None:
+            self.status.circuit = breaker.state.value
+        if self.scheduler is not None and self.status.state == "idle":
+            self.status.next_scan_in = round(self.scheduler.seconds_until_next())
+        return asdict(self.status)
+
+
+class MultiTargetRunner:
+    """Varios targets, un proceso, un event loop."""
+
+    def __init__(
+        self,
+        targets: dict[str, Optional[list[str]]],
+        interval: int = 120,
+        concurrency: int = 1,
+        max_workers: Optional[int] = None,
+        status_file: Optional[str] = None,
+    ):
+        """
+        Args:
+            targets: name → categorías (None = las del target)
+            interval: Intervalo mínimo de una categoría volátil (scheduler)
+            concurrency: Categorías en paralelo dentro de cada target
+            max_workers: Threads del pool (default: uno por target)
+            status_file: JSON donde volcar status() periódicamente
+        """
+        self.runners = [
+            TargetRunner(name, categories, interval, concurrency)
+            for name, categories in targets.items()
+        ]
+        self.max_workers = max_workers or len(self.runners)
+        self.status_file = status_file
+        self._stop: Optional[asyncio.Event] = None
+
+    def status(self) -> list[dict]:
+        return [runner.snapshot() for runner in self.runners]
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self, once: bool = False) -> list[dict]:
+        """Correr todos los targets (once = un scan de las categorías vencidas de cada uno)."""
+        self._stop = asyncio.Event()
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="runner"
+        ) as executor:
+            tasks = [
+                asyncio.create_task(runner.run(executor, self._stop, once=once))
+                for runner in self.runners
+            ]
+            reporter = asyncio.create_task(self._report())
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                self._stop.set()
+                await reporter
+                for runner in self.runners:
+                    if runner.sniffer is not None:
+                        runner.sniffer.close()
+                    if runner.status.state != "error":
+                        runner.status.state = "stopped"
+        self._write_status()
+        return self.status()
+
+    async def _report(self) -> None:
+        """Loguear (y volcar a status_file) el estado de cada target."""
+        while not self._stop.is_set():
+            await TargetRunner._sleep(self._stop, STATUS_LOG_INTERVAL)
+            for s in self.status():
+                logger.info(
+                    f"📊 {s['name']}: {s['state']} | {s['cycles']} ciclos, "
+                    f"{s['products']} productos, {s['glitches']} glitches, "
+                    f"{s['errors']} errores | breaker {s['circuit'] or '-'}"
+                )
+            self._write_status()
+
+    def _write_status(self) -> None:
+        if not self.status_file:
+            return
+        payload = {"updated_at": time.time(), "targets": self.status()}
+        tmp = f"{self.status_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp, self.status_file)
+
+
+def main() -> None:
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(name)s] %(message)s",
+        datefmt="%H:%M:%S",
+    )
+
+    parser = argparse.ArgumentParser(description="Odiseo — todos los targets en un proceso")
+    parser.add_argument("--targets", default=",".join(TARGETS),
+                        help=f"Targets separados por coma ({', '.join(TARGETS)})")
+    parser.add_argument("--categories", nargs="+", help="Categorías (solo con un target)")
+    parser.add_argument("--daemon", action="store_true", help="Correr en loop infinito")
+    parser.add_argument("--interval", type=int, default=120,
+                        help="Segundos entre scans de una categoría volátil (las estáticas: 1h)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Categorías en paralelo por target")
+    parser.add_argument("--workers", type=int, help="Threads del pool (default: uno por target)")
+    parser.add_argument("--status-file", help="JSON con el estado por target")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.targets.split(",") if n.strip()]
+    if args.categories and len(names) != 1:
+        parser.error("--categories requiere un solo target")
+
+    runner = MultiTargetRunner(
+        {name: args.categories for name in names},
+        interval=args.interval,
+        concurrency=args.concurrency,
+        max_workers=args.workers,
+        status_file=args.status_file,
+    )
+    try:
+        asyncio.run(runner.run(once=not args.daemon))
+    except KeyboardInterrupt:
+        logger.info("🛑 Runner detenido")
+    for s in runner.status():
+        logger.info(f"   {s['name']}: {s['state']}, {s['products']} productos, {s['errors']} errores")
+
+
+if __name__ == "__main__":
+    main()
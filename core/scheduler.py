@@ -0,0 +1,174 @@
+"""
+🗓️ Category Scheduler — Más visitas a las categorías que se mueven
+
+Re-escanear todo cada `interval` gasta el mismo presupuesto en una
+categoría que cambió 50 precios en la última hora que en una que no se
+movió en una semana. Acá cada categoría tiene una volatilidad (0-1) que
+combina, como promedios móviles (EWMA) por scan:
+
+- Tasa de cambio: fracción de productos con precio nuevo
+- Glitches detectados
+- Profundidad de descuento media
+
+y su intervalo se interpola (en escala logarítmica) entre min_interval
+(volátil: minutos) y max_interval (estática: una hora). Antes de fijar
+los intervalos se estima la demanda (requests por scan × scans por hora);
+si pasa la fracción BUDGET_SHARE del presupuesto horario por dominio del
+HttpClient, todos los intervalos se estiran en la misma proporción.
+
+Uso:
+    scheduler = CategoryScheduler(categories, min_interval=300, budget_per_hour=300)
+    while True:
+        for result in sniffer.run_cycle(scheduler.due()):
+            scheduler.record(result)
+        time.sleep(scheduler.seconds_until_next())
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from core.base_sniffer import ScrapeResult
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = 300                  # s: categorías volátiles
+MAX_INTERVAL = 3600                 # s: categorías estáticas
+DEFAULT_BUDGET_PER_HOUR = 300       # = DOMAIN_RATE_LIMIT_PER_HOUR (core/http_client.py)
+BUDGET_SHARE = 0.8                  # Fracción del presupuesto horario que planifica el scheduler
+EWMA_ALPHA = 0.3                    # Peso del último scan en los promedios
+
+# Saturación de cada señal (a partir de acá cuenta como 1.0) y su peso
+HOT_CHANGE_RATE = 0.05              # 5% de la categoría cambió de precio en un scan
+HOT_GLITCHES = 1.0                  # 1 glitch por scan
+HOT_DISCOUNT = 40.0                 # 40% de descuento medio
+WEIGHTS = {"changes": 0.6, "glitches": 0.3, "discount": 0.1}
+
+
+@dataclass
+class CategoryStats:
+    """Volatilidad observada de una categoría (EWMA por scan)."""
+    category: str
+    change_rate: float = 0.0
+    glitches: float = 0.0
+    discount: float = 0.0
+    requests: float = 1.0
+    scans: int = 0
+    interval: float = MAX_INTERVAL
+    next_due: float = 0.0           # 0 = nunca escaneada (va primero)
+
+    @property
+    def volatility(self) -> float:
+        return (
+            WEIGHTS["changes"] * min(1.0, self.change_rate / HOT_CHANGE_RATE)
+            + WEIGHTS["glitches"] * min(1.0, self.glitches / HOT_GLITCHES)
+            + WEIGHTS["discount"] * min(1.0, self.discount / HOT_DISCOUNT)
+        )
+
+    def observe(
+        self, products: int, changed: int, glitches: int, requests: int, avg_discount: float
+    ) -> None:
+        def ewma(old: float, new: float) -> float:
+            return new if self.scans == 0 else old + EWMA_ALPHA * (new - old)
+
+        self.change_rate = ewma(self.change_rate, changed / products if products else 0.0)
+        self.glitches = ewma(self.glitches, float(glitches))
+        self.discount = ewma(self.discount, avg_discount)
+        self.requests = ewma(self.requests, float(max(1, requests)))
+        self.scans += 1
+
+
+class CategoryScheduler:
+    """Próximo scan de cada categoría según su volatilidad y el presupuesto."""
+
+    def __init__(
+        self,
+        categories: list[str],
+        min_interval: float = MIN_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+        budget_per_hour: float = DEFAULT_BUDGET_PER_HOUR,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.budget_per_hour = budget_per_hour * BUDGET_SHARE
+        self.stats = {c: CategoryStats(c, interval=self.max_interval) for c in categories}
+
+    def due(self, now: Optional[float] = None) -> list[str]:
+        """Categorías vencidas, las más volátiles primero."""
+        now = time.time() if now is None else now
+        due = [s for s in self.stats.values() if s.next_due <= now]
+        due.sort(key=lambda s: (s.next_due > 0, -s.volatility, s.next_due))
+        return [s.category for s in due]
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        if not self.stats:
+            return self.max_interval
+        return max(0.0, min(s.next_due for s in self.stats.values()) - now)
+
+    def record(self, result: "ScrapeResult", now: Optional[float] = None) -> None:
+        """Registrar el scan de una categoría (ScrapeResult de run_cycle)."""
+        self.observe(
+            result.category,
+            products=result.products_found,
+            changed=result.prices_changed,
+            glitches=result.glitches_found,
+            requests=result.pages,
+            avg_discount=result.avg_discount,
+            failed=bool(result.errors) and not result.products_found,
+            now=now,
+        )
+
+    def observe(
+        self,
+        category: str,
+        products: int,
+        changed: int,
+        glitches: int = 0,
+        requests: int = 1,
+        avg_discount: float = 0.0,
+        failed: bool = False,
+        now: Optional[float] = None,
+    ) -> None:
+        """
+        Registrar un scan con contadores sueltos (para loops propios).
+        Un scan fallido no actualiza la volatilidad: se reintenta a su
+        intervalo actual.
+        """
+        now = time.time() if now is None else now
+        stats = self.stats.setdefault(category, CategoryStats(category, interval=self.max_interval))
+        if not failed:
+            stats.observe(products, changed, glitches, requests, avg_discount)
+            self._plan()
+        stats.next_due = now + stats.interval
+
+    def _plan(self) -> None:
+        """Intervalos por volatilidad, estirados si la demanda pasa el presupuesto."""
+        ratio = self.max_interval / self.min_interval
+        for s in self.stats.values():
+            s.interval = self.max_interval / ratio ** s.volatility
+
+        demand = sum(s.requests * 3600 / s.interval for s in self.stats.values())
+        if demand > self.budget_per_hour > 0:
+            stretch = demand / self.budget_per_hour
+            for s in self.stats.values():
+                s.interval *= stretch
+
+    def log_plan(self, log: logging.Logger = logger, top: int = 5) -> None:
+        """Loguear las categorías más volátiles y la demanda estimada."""
+        ranked = sorted(self.stats.values(), key=lambda s: -s.volatility)
+        demand = sum(s.requests * 3600 / s.interval for s in self.stats.values())
+        log.info(
+            f"🗓️ Scheduler: {len(ranked)} categorías, ~{demand:.0f} req/h "
+            f"(presupuesto {self.budget_per_hour:.0f})"
+        )
+        for s in ranked[:top]:
+            log.info(
+                f"   {s.category}: volatilidad {s.volatility:.2f}, cada "
+                f"{math.ceil(s.interval / 60)} min ({s.change_rate:.1%} cambios/scan)"
+            )
@@ -0,0 +1,351 @@
+"""
+🔗 Shared State — Rate limits y Circuit Breakers compartidos entre procesos
+
+El bridge (web/bridge_v2.py) lanza cada sniffer como subproceso. Sin estado
+compartido, cada proceso arranca con presupuesto lleno y breaker cerrado:
+un reinicio "resetea" el límite y dos procesos contra el mismo host duplican
+la tasa de requests.
+
+Este módulo guarda ese estado en un archivo SQLite en modo WAL, con
+transacciones BEGIN IMMEDIATE (un escritor a la vez, lectores sin bloqueo).
+Sobrevive reinicios y lo respetan todos los procesos de la máquina.
+También persiste lo que aprende el auto-tuner de cada target
+(core/autotuner.py: tamaño de página y concurrencia) y las validaciones
+de stock recientes (core/validation_cache.py).
+
+Activación (la hace el bridge para sus subprocesos):
+    export ODISEO_SHARED_STATE=data/shared_state.db
+
+Uso directo:
+    from core.shared_state import SharedStateStore, SharedDomainRateLimiter
+
+    store = SharedStateStore("data/shared_state.db")
+    limiter = SharedDomainRateLimiter(store, max_requests_per_hour=300)
+    client = HttpClient(shared_state=store)   # limiter + breaker compartidos
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from core.rate_limiter import DomainRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Variable de entorno con el path del archivo de estado compartido
+SHARED_STATE_ENV = "ODISEO_SHARED_STATE"
+
+
+def _first(cursor: sqlite3.Cursor) -> Optional[tuple]:
+    """
+    Primera fila, cerrando el statement: en autocommit, un SELECT sin
+    terminar deja abierta la transacción de lectura y la conexión sigue
+    viendo ese snapshot viejo.
+    """
+    row = cursor.fetchone()
+    cursor.close()
+    return row
+
+
+class SharedStateStore:
+    """
+    Archivo SQLite (WAL) con el estado de rate limit y circuit breakers.
+
+    Una conexión por thread; todas las mutaciones dentro de
+    `transaction()` (BEGIN IMMEDIATE) para que el read-modify-write sea
+    atómico también entre procesos.
+    """
+
+    _instances: dict[str, "SharedStateStore"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str, busy_timeout: float = 10.0):
+        self.path = os.path.abspath(path)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._init_db()
+
+    @classmethod
+    def from_env(cls) -> Optional["SharedStateStore"]:
+        """Store del path en ODISEO_SHARED_STATE (uno por proceso), o None."""
+        path = os.environ.get(SHARED_STATE_ENV)
+        if not path:
+            return None
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path: str) -> "SharedStateStore":
+        """Store de `path` (una instancia por proceso y archivo)."""
+        path = os.path.abspath(path)
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+                logger.info(f"🔗 Estado compartido entre procesos: {path}")
+            return cls._instances[path]
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS circuit_breakers (
+                name TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                failure_count INTEGER NOT NULL DEFAULT 0,
+                success_count INTEGER NOT NULL DEFAULT 0,
+                last_failure_at REAL
+            );
+
+            CREATE TABLE IF NOT EXISTS autotune (
+                target TEXT PRIMARY KEY,
+                page_size INTEGER,
+                concurrency INTEGER NOT NULL,
+                ceiling INTEGER,
+                ceiling_at REAL,
+                bytes_per_item REAL,
+                updated_at REAL NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS validation_cache (
+                source TEXT NOT NULL,
+                sku TEXT NOT NULL,
+                price REAL NOT NULL,
+                ok INTEGER NOT NULL,
+                reason TEXT NOT NULL,
+                tier TEXT NOT NULL,
+                checked_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (source, sku)
+            );
+        """)
+
+    def reader(self) -> sqlite3.Connection:
+        """Conexión del thread para lecturas simples (autocommit: sin lock de escritura)."""
+        return self._conn()
+
+    @contextmanager
+    def transaction(self):
+        """Transacción de escritura exclusiva (entre threads y procesos)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ========================================================================
+    # TOKEN BUCKETS
+    # ========================================================================
+
+    @staticmethod
+    def _bucket_state(
+        conn: sqlite3.Connection, key: str, rate: float, capacity: float, tokens: float, now: float
+    ) -> tuple[float, float]:
+        """(tokens disponibles a `now`, segundos hasta tener `tokens`)."""
+        row = _first(conn.execute(
+            "SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)
+        ))
+        if row is None:
+            available = capacity
+        else:
+            elapsed = max(0.0, now - row[1])
+            available = min(capacity, row[0] + elapsed * rate)
+
+        if available >= tokens:
+            wait = 0.0
+        elif rate <= 0:
+            wait = float("inf")
+        else:
+            wait = (tokens - available) / rate
+        return available, wait
+
+    def take_token(self, key: str, rate: float, capacity: float, tokens: float = 1.0) -> float:
+        """
+        Token bucket atómico sobre el archivo compartido.
+        Retorna 0.0 si hay cupo (y lo consume) o segundos de espera.
+        """
+        now = time.time()  # reloj de pared: válido entre procesos
+        with self.transaction() as conn:
+            available, wait = self._bucket_state(conn, key, rate, capacity, tokens, now)
+            if wait <= 0:
+                available -= tokens
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, available, now),
+            )
+        return wait
+
+    def peek_token(self, key: str, rate: float, capacity: float, tokens: float = 1.0) -> float:
+        """
+        Como take_token() pero sin consumir: lectura simple (WAL, no toma
+        el lock de escritura ni espera busy_timeout).
+        """
+        _, wait = self._bucket_state(self.reader(), key, rate, capacity, tokens, time.time())
+        return wait
+
+    # ========================================================================
+    # CIRCUIT BREAKERS
+    # ========================================================================
+
+    @staticmethod
+    def load_breaker(conn: sqlite3.Connection, name: str) -> Optional[tuple]:
+        """(state, failure_count, success_count, last_failure_at) o None."""
+        return _first(conn.execute(
+            "SELECT state, failure_count, success_count, last_failure_at "
+            "FROM circuit_breakers WHERE name = ?",
+            (name,),
+        ))
+
+    @staticmethod
+    def save_breaker(
+        conn: sqlite3.Connection,
+        name: str,
+        state: str,
+        failure_count: int,
+        success_count: int,
+        last_failure_at: Optional[float],
+    ) -> None:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO circuit_breakers
+                (name, state, failure_count, success_count, last_failure_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (name, state, failure_count, success_count, last_failure_at),
+        )
+
+
+    # ========================================================================
+    # AUTOTUNE (core/autotuner.py)
+    # ========================================================================
+
+    def load_tuning(self, target: str) -> Optional[tuple]:
+        """(page_size, concurrency, ceiling, ceiling_at, bytes_per_item) o None."""
+        return _first(self._conn().execute(
+            "SELECT page_size, concurrency, ceiling, ceiling_at, bytes_per_item "
+            "FROM autotune WHERE target = ?",
+            (target,),
+        ))
+
+    def save_tuning(
+        self,
+        target: str,
+        page_size: Optional[int],
+        concurrency: int,
+        ceiling: Optional[int],
+        ceiling_at: Optional[float],
+        bytes_per_item: Optional[float],
+    ) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO autotune
+                    (target, page_size, concurrency, ceiling, ceiling_at,
+                     bytes_per_item, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (target, page_size, concurrency, ceiling, ceiling_at,
+                 bytes_per_item, time.time()),
+            )
+
+    # ========================================================================
+    # VALIDATION CACHE (core/validation_cache.py)
+    # ========================================================================
+
+    def load_validations(self, source: str, now: Optional[float] = None) -> list[tuple]:
+        """Vigentes de `source`: (sku, price, ok, reason, tier, checked_at, expires_at)."""
+        return self._conn().execute(
+            "SELECT sku, price, ok, reason, tier, checked_at, expires_at "
+            "FROM validation_cache WHERE source = ? AND expires_at > ?",
+            (source, time.time() if now is None else now),
+        ).fetchall()
+
+    def save_validation(
+        self,
+        source: str,
+        sku: str,
+        price: float,
+        ok: bool,
+        reason: str,
+        tier: str,
+        checked_at: float,
+        expires_at: float,
+    ) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO validation_cache
+                    (source, sku, price, ok, reason, tier, checked_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (source, sku, price, int(ok), reason, tier, checked_at, expires_at),
+            )
+
+    def delete_validations(self, source: str, skus: list[str]) -> None:
+        """Borrar entradas (y de paso las vencidas de `source`)."""
+        with self.transaction() as conn:
+            conn.executemany(
+                "DELETE FROM validation_cache WHERE source = ? AND sku = ?",
+                [(source, sku) for sku in skus],
+            )
+            conn.execute(
+                "DELETE FROM validation_cache WHERE source = ? AND expires_at <= ?",
+                (source, time.time()),
+            )
+
+
+class SharedDomainRateLimiter(DomainRateLimiter):
+    """
+    DomainRateLimiter cuyo presupuesto vive en un SharedStateStore.
+    Misma interfaz (try_acquire / time_until_ready / acquire / acquire_async).
+
+    Las variantes async corren el SQL en un thread (asyncio.to_thread):
+    BEGIN IMMEDIATE puede esperar hasta busy_timeout y no debe frenar el
+    event loop.
+    """
+
+    def __init__(
+        self, store: SharedStateStore, max_requests_per_hour: float = 300, burst: int = 10
+    ):
+        super().__init__(max_requests_per_hour, burst)
+        self.store = store
+
+    def try_acquire(self, key: str, tokens: float = 1.0) -> float:
+        return self.store.take_token(
+            key, self.max_requests_per_hour / 3600, self.burst, tokens
+        )
+
+    def time_until_ready(self, key: str, tokens: float = 1.0) -> float:
+        return self.store.peek_token(
+            key, self.max_requests_per_hour / 3600, self.burst, tokens
+        )
+
+    async def try_acquire_async(self, key: str, tokens: float = 1.0) -> float:
+        return await asyncio.to_thread(self.try_acquire, key, tokens)
+
+    async def time_until_ready_async(self, key: str, tokens: float = 1.0) -> float:
+        return await asyncio.to_thread(self.time_until_ready, key, tokens)
@@ -0,0 +1,170 @@
+"""
+🧾 Validation Cache — No re-validar el mismo SKU al mismo precio
+
+Mientras un producto siga arriba del umbral de gap, cada ciclo lo vuelve
+a proponer como candidato, y validar stock cuesta un probe al checkout o
+una página de Chromium. Acá se recuerda el resultado por
+(source, sku, precio):
+
+- Positivos (validado_ok) viven `ttl` segundos.
+- Negativos estables (stock_agotado, precio_carrito_mayor) viven
+  `negative_ttl`: el SKU no vuelve a validarse hasta que cambie algo.
+- Errores y resultados no concluyentes no se guardan.
+- Invalidación automática: un precio distinto es un miss (y la entrada
+  se reemplaza al validar); invalidate() borra los SKUs que el catálogo
+  muestra sin stock, así al volver se validan de nuevo.
+
+Lookup en un dict en memoria; con ODISEO_SHARED_STATE, escritura a
+través al SharedStateStore (tabla validation_cache): sobrevive reinicios
+y lo ven los otros procesos al arrancar.
+
+Uso:
+    cache = ValidationCache.for_source("fravega", ttl=1800)
+    hit = cache.get(sku, product.current_price)
+    if hit is None:
+        ok, reason = validar(...)
+        cache.put(sku, product.current_price, ok, reason, tier="browser")
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from core.shared_state import SharedStateStore
+
+logger = logging.getLogger(__name__)
+
+VALIDATION_TTL = 1800                   # s: stock validado
+NEGATIVE_TTL = 6 * 3600                 # s: sin stock / precio de carrito mayor
+NEGATIVE_REASONS = frozenset({"stock_agotado", "precio_carrito_mayor"})
+
+
+@dataclass
+class CachedValidation:
+    """Resultado guardado de una validación."""
+    price: float
+    ok: bool
+    reason: str
+    tier: str
+    checked_at: float
+    expires_at: float
+
+
+class ValidationCache:
+    """Validaciones de stock recientes de un source, por SKU y precio."""
+
+    _instances: dict[str, "ValidationCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        source: str,
+        ttl: float = VALIDATION_TTL,
+        negative_ttl: float = NEGATIVE_TTL,
+        store: Optional[SharedStateStore] = None,
+    ):
+        """
+        Args:
+            source: Tienda (clave de persistencia)
+            ttl: Segundos que vale un "validado_ok"
+            negative_ttl: Segundos que vale un negativo estable (NEGATIVE_REASONS)
+            store: Dónde persistir (None = solo en memoria)
+        """
+        self.source = source
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, CachedValidation] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def for_source(cls, source: str, **kwargs) -> "ValidationCache":
+        """Cache del proceso para `source` (persistido si hay estado compartido)."""
+        with cls._instances_lock:
+            if source not in cls._instances:
+                # Sin ODISEO_SHARED_STATE: el cache queda en memoria
+                store = SharedStateStore.from_env()
+                cls._instances[source] = cls(source, store=store, **kwargs)
+            return cls._instances[source]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self) -> None:
+        if self.store is None:
+            return
+        try:
+            rows = self.store.load_validations(self.source)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo leer el cache de validación de {self.source}: {e}")
+            return
+        for sku, price, ok, reason, tier, checked_at, expires_at in rows:
+            self._entries[sku] = CachedValidation(price, bool(ok), reason, tier, checked_at, expires_at)
+        if rows:
+            logger.info(f"🧾 {self.source}: {len(rows)} validaciones vigentes en cache")
+
+    def get(self, sku: str, price: float, now: Optional[float] = None) -> Optional[CachedValidation]:
+        """Resultado vigente para `sku` a `price`, o None (miss)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(sku)
+            if entry is not None and (entry.expires_at <= now or entry.price != round(price, 2)):
+                del self._entries[sku]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(
+        self, sku: str, price: float, ok: bool, reason: str, tier: str,
+        now: Optional[float] = None,
+    ) -> bool:
+        """Guardar un resultado (False = no cacheable: error o no concluyente)."""
+        if ok:
+            ttl = self.ttl
+        elif reason in NEGATIVE_REASONS:
+            ttl = self.negative_ttl
+        else:
+            return False
+        now = time.time() if now is None else now
+        entry = CachedValidation(round(price, 2), ok, reason, tier, now, now + ttl)
+        with self._lock:
+            self._entries[sku] = entry
+        if self.store is not None:
+            try:
+                self.store.save_validation(
+                    self.source, sku, entry.price, ok, reason, tier, now, entry.expires_at
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo guardar la validación de {sku}: {e}")
+        return True
+
+    def invalidate(self, skus: Iterable[str]) -> int:
+        """Olvidar SKUs (p.ej. los que el catálogo muestra sin stock)."""
+        with self._lock:
+            dropped = [sku for sku in skus if self._entries.pop(sku, None) is not None]
+        if dropped and self.store is not None:
+            try:
+                self.store.delete_validations(self.source, dropped)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo invalidar el cache de {self.source}: {e}")
+        return len(dropped)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "source": self.source,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -13,13 +13,12 @@ Descubierto en recon del 2026-02-21:
 from __future__ import annotations
 
 import logging
-import sqlite3
 import re
 import html
-from datetime import datetime
-from typing import Optional
+from typing import Iterator, Optional
 
 from core.base_sniffer import BaseSniffer, Product, Glitch
+from core.database import Database
 from core.http_client import HttpClient
 
 logger = logging.getLogger(__name__)
@@ -52,10 +51,10 @@ class CasaDelAudioSniffer(BaseSniffer):
     TARGET_NAME = "casadelaudio"
     BASE_URL = "https://casadelaudio.com"
     
-    def __init__(self, db_path: Optional[str] = None):
-        super().__init__(db_path or "casadelaudio_monitor.db")
+    def __init__(self, ledger: Optional[Database] = None):
+        super().__init__(ledger=ledger)
         
-        self.client = HttpClient(stealth_mode=True)
+        self.client = HttpClient(stealth_mode=True, tuner=self.tuner)
         
         # --- CREDENCIALES (Actualizadas al 2026-02-21 22:46) ---
         self.cookies = {
@@ -69,38 +68,14 @@ class CasaDelAudioSniffer(BaseSniffer):
             'accept-language': 'es-ES,es;q=0.9',
             'referer': 'https://casadelaudio.com/'
         }
-        
-        self._init_db()
-
-    def _init_db(self):
-        """Crear tablas si no existen."""
-        import sqlite3
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id TEXT PRIMARY KEY,
-                name TEXT,
-                brand TEXT,
-                category TEXT,
-                last_price REAL,
-                list_price REAL,
-                discount_pct REAL DEFAULT 0,
-                url TEXT,
-                image_url TEXT,
-                source TEXT DEFAULT 'casadelaudio',
-                last_seen TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
 
-    def fetch_products(self, category: str, size: int = 24, **kwargs) -> list[dict]:
+    def iter_product_pages(self, category: str, size: int = 24, **kwargs) -> Iterator[list[dict]]:
         """
-        Fetch productos con paginación real.
+        Fetch productos con paginación real, una página por vez (generador).
         size en Casa del Audio suele ser fijo por página (24).
         """
         cat_suffix = CASADELAUDIO_CATEGORIES.get(category, f"catalogsearch/result/?q={category}")
-        all_found = []
+        fetched = 0
         
         # Iterar páginas hasta encontrar lo solicitado o quedarnos sin productos
         for page in range(1, 10): # Limite de 10 paginas por seguridad
@@ -158,16 +133,15 @@ class CasaDelAudioSniffer(BaseSniffer):
                     except: continue
                 
                 if not page_prods: break
-                all_found.extend(page_prods)
+                fetched += len(page_prods)
                 self.logger.info(f"   → P{page}: {len(page_prods)} productos")
+                yield page_prods
                 
-                if len(all_found) >= size: break
+                if fetched >= size: break
                 
             except Exception as e:
                 self.logger.error(f"Error en P{page}: {e}")
                 break
-                
-        return all_found
 
     def parse_product(self, raw: dict) -> Product:
         """Convertir dict de fetch -> Product normalizado."""
@@ -199,19 +173,3 @@ class CasaDelAudioSniffer(BaseSniffer):
             source=self.TARGET_NAME,
             in_stock=True
         )
-
-    def save_products(self, products: list[Product]) -> None:
-        """Guardar en SQLite."""
-        conn = sqlite3.connect(self.db_path)
-        now = datetime.now().isoformat()
-        for p in products:
-            conn.execute("""
-                INSERT OR REPLACE INTO products 
-                (id, name, brand, category, last_price, list_price, discount_pct, url, image_url, last_seen)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (p.id, p.name, p.brand, p.category, p.current_price, p.list_price, p.discount_pct, p.url, p.image_url, now))
-        conn.commit()
-        conn.close()
-
-    def close(self):
-        self.client.close()
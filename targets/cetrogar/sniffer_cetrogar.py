@@ -20,10 +20,7 @@ from __future__ import annotations
 import os
 import sys
 import logging
-import sqlite3
-import json
-from datetime import datetime
-from typing import Optional
+from typing import Iterator, Optional
 
 # Agregar el root del proyecto al path
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -31,6 +28,7 @@ sys.path.insert(0, PROJECT_ROOT)
 
 from core.base_sniffer import BaseSniffer, Product, Glitch
 from core.http_client import HttpClient
+from core.database import Database
 
 logger = logging.getLogger(__name__)
 
@@ -140,62 +138,22 @@ class CetrogarSniffer(BaseSniffer):
     BASE_URL = "https://www.cetrogar.com.ar"
     API_URL = "https://www.cetrogar.com.ar/graphql"
     
-    PAGE_SIZE = 50  # Magento max
+    PAGE_SIZE_BOUNDS = (10, 50)  # Magento max 50 (el auto-tuner ajusta por debajo)
     
-    def __init__(self, db_path: Optional[str] = None):
-        super().__init__(db_path or "cetrogar_monitor.db")
+    def __init__(self, ledger: Optional[Database] = None):
+        super().__init__(ledger=ledger)
         
         self.client = HttpClient(
             stealth_mode=True,
             rotate_browser=True,
             retry_count=3,
             delay_range=(1.0, 3.0),
+            tuner=self.tuner,
         )
-        
-        self._init_db()
-    
-    def _init_db(self):
-        """Crear tablas si no existen."""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id TEXT PRIMARY KEY,
-                name TEXT,
-                brand TEXT,
-                category TEXT,
-                last_price REAL,
-                list_price REAL,
-                discount_pct REAL DEFAULT 0,
-                url TEXT,
-                image_url TEXT,
-                sku TEXT,
-                stock_status TEXT DEFAULT 'IN_STOCK',
-                first_seen TEXT,
-                last_seen TEXT,
-                price_history TEXT DEFAULT '[]',
-                source TEXT DEFAULT 'cetrogar'
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS alerts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                product_id TEXT,
-                product_name TEXT,
-                alert_type TEXT,
-                old_price REAL,
-                new_price REAL,
-                discount_pct REAL,
-                timestamp TEXT,
-                details TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
-        self.logger.info(f"DB inicializada: {self.db_path}")
     
-    def fetch_products(self, category: str, size: int = 500, **kwargs) -> list[dict]:
+    def iter_product_pages(self, category: str, size: int = 500, **kwargs) -> Iterator[list[dict]]:
         """
-        Fetch via Magento 2 GraphQL.
+        Fetch via Magento 2 GraphQL, una pagina por vez (generador).
         Usa search term ya que el filtro por category_url_key no esta disponible en este server.
         """
         cat_config = CETROGAR_CATEGORIES.get(category, {"search": category, "url_key": None})
@@ -204,16 +162,17 @@ class CetrogarSniffer(BaseSniffer):
         # Warm session
         self.client.warm_session(self.BASE_URL)
         
-        all_items = []
+        fetched = 0
         current_page = 1
+        page_size = self.page_size
         # Calcular cuantas paginas necesitamos para llegar al size
-        max_pages = (size + self.PAGE_SIZE - 1) // self.PAGE_SIZE
+        max_pages = (size + page_size - 1) // page_size
         
         while current_page <= max_pages:
             try:
                 variables = {
                     "search": search_term,
-                    "pageSize": self.PAGE_SIZE,
+                    "pageSize": page_size,
                     "currentPage": current_page,
                 }
                 payload = {"query": PRODUCTS_QUERY, "variables": variables}
@@ -251,15 +210,17 @@ class CetrogarSniffer(BaseSniffer):
                 if not items:
                     break
                 
-                all_items.extend(items)
+                items = items[:size - fetched]
+                fetched += len(items)
                 total_pages = page_info.get("total_pages", 1)
                 
                 self.logger.info(
                     f"   Cetrogar {category}: pag {current_page}/{total_pages}, "
-                    f"+{len(items)} (total: {len(all_items)}/{total_count})"
+                    f"+{len(items)} (total: {fetched}/{total_count})"
                 )
+                yield items
                 
-                if current_page >= total_pages or len(all_items) >= size:
+                if current_page >= total_pages or fetched >= size:
                     break
                 
                 current_page += 1
@@ -267,8 +228,6 @@ class CetrogarSniffer(BaseSniffer):
             except Exception as e:
                 self.logger.error(f"   Error fetch {category} pag {current_page}: {e}")
                 break
-        
-        return all_items[:size]
     
     def parse_product(self, raw: dict) -> Product:
         """Convertir producto Magento GraphQL -> Product normalizado."""
@@ -323,89 +282,20 @@ class CetrogarSniffer(BaseSniffer):
             raw_data={"sku": sku, "stock_status": stock_status},
         )
     
-    def save_products(self, products: list[Product]) -> None:
-        """Guardar productos en SQLite."""
-        conn = sqlite3.connect(self.db_path)
-        now = datetime.now().isoformat()
-        saved = 0
-        
-        for p in products:
-            if p.current_price <= 0:
-                continue
-            
-            try:
-                existing = conn.execute(
-                    "SELECT last_price, price_history FROM products WHERE id = ?",
-                    (p.id,)
-                ).fetchone()
-                
-                sku = p.raw_data.get("sku", "")
-                stock_status = p.raw_data.get("stock_status", "IN_STOCK")
-                
-                if existing:
-                    old_price = existing[0]
-                    history = existing[1] or "[]"
-                    
-                    if abs(old_price - p.current_price) > 0.01:
-                        hist = json.loads(history)
-                        hist.append({"price": p.current_price, "date": now})
-                        hist = hist[-100:]
-                        history = json.dumps(hist)
-                        
-                        if old_price > 0:
-                            change_pct = ((p.current_price - old_price) / old_price) * 100
-                            if change_pct < -5:
-                                conn.execute("""
-                                    INSERT INTO alerts (product_id, product_name, alert_type,
-                                        old_price, new_price, discount_pct, timestamp, details)
-                                    VALUES (?, ?, 'price_drop', ?, ?, ?, ?, ?)
-                                """, (p.id, p.name, old_price, p.current_price,
-                                      abs(change_pct), now, f"Bajo {abs(change_pct):.1f}%"))
-                    
-                    conn.execute("""
-                        UPDATE products SET
-                            name=?, brand=?, category=?, last_price=?, list_price=?,
-                            discount_pct=?, url=?, image_url=?, sku=?, stock_status=?,
-                            last_seen=?, price_history=?
-                        WHERE id=?
-                    """, (p.name, p.brand, p.category, p.current_price, p.list_price,
-                          p.discount_pct, p.url, p.image_url, sku, stock_status,
-                          now, history, p.id))
-                else:
-                    history = json.dumps([{"price": p.current_price, "date": now}])
-                    conn.execute("""
-                        INSERT INTO products (id, name, brand, category, last_price, list_price,
-                            discount_pct, url, image_url, sku, stock_status, first_seen, last_seen,
-                            price_history, source)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'cetrogar')
-                    """, (p.id, p.name, p.brand, p.category, p.current_price, p.list_price,
-                          p.discount_pct, p.url, p.image_url, sku, stock_status,
-                          now, now, history))
-                
-                saved += 1
-            except Exception as e:
-                self.logger.error(f"   Error guardando {p.name[:30]}: {e}")
-        
-        conn.commit()
-        conn.close()
-        self.logger.info(f"   {saved}/{len(products)} productos guardados en {self.db_path}")
-    
-    def close(self):
-        """Cerrar recursos."""
-        self.client.close()
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Cetrogar Price Sniffer")
     parser.add_argument("--daemon", action="store_true", help="Correr en loop infinito")
-    parser.add_argument("--interval", type=int, default=120, help="Segundos entre ciclos")
+    parser.add_argument("--interval", type=int, default=120, help="Segundos entre scans de una categoría volátil (las estáticas: 1h)")
     parser.add_argument("--categories", nargs="+", help="Categorías específicas")
+    parser.add_argument("--concurrency", type=int, default=1, help="Categorías en paralelo por ciclo")
     args = parser.parse_args()
     
     cats = args.categories or list(CETROGAR_CATEGORIES.keys())
     sniffer = CetrogarSniffer()
     
     if args.daemon:
-        sniffer.run_forever(cats, interval=args.interval)
+        sniffer.run_forever(cats, interval=args.interval, concurrency=args.concurrency)
     else:
-        sniffer.run_cycle(cats)
+        sniffer.run_cycle(cats, concurrency=args.concurrency)
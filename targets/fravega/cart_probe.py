@@ -1,9 +1,16 @@
 
 import requests
 import json
+import os
 import sqlite3
+import sys
 import time
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database import Database
+
 # --- CONFIGURACIÓN DE ATAQUE ---
 TARGET_URL_TEMPLATE = "https://www.fravega.com/chk-api/api/v1/checkout/{checkout_id}/item"
 CHECKOUT_ID = "354b50474a524442b25ecdf9f747186f" # Capturado de tu cURL
@@ -63,16 +70,20 @@ def scan_database_for_hidden_discounts():
     Recorre los productos en la DB y busca discrepancias entre el 'precio visible' y el 'precio carrito'.
     """
     print("🚀 Iniciando Cart Sniper (Buscador de Descuentos Ocultos)...")
-    path = "fravega_monitor.db"
+    path = Database.shared().db_path
     
     with sqlite3.connect(path) as conn:
         conn.row_factory = sqlite3.Row
-        products = conn.execute("SELECT * FROM products WHERE sku_code IS NOT NULL ORDER BY last_seen DESC LIMIT 50").fetchall()
+        products = conn.execute("""
+            SELECT name AS title, current_price, sku FROM products
+            WHERE source = 'fravega' AND sku IS NOT NULL AND sku != ''
+            ORDER BY last_seen DESC LIMIT 50
+        """).fetchall()
         
     for p in products:
-        sku = p['sku_code']
-        visible_price = p['last_price']
-        seller = p['seller_name'] if p['seller_name'] else "fravega" # Default to 'fravega' if unknown
+        sku = p['sku']
+        visible_price = p['current_price']
+        seller = "fravega" # El ledger no guarda el seller: probamos con Frávega
         
         # Si el vendedor es marketplace, a veces el ID del vendedor es distinto.
         # Por ahora probamos con 'fravega' o extraemos del campo seller_name si lo tuviéramos mapeado.
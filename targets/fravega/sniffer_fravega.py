@@ -14,7 +14,6 @@ import json
 import os
 import sys
 import logging
-from datetime import datetime
 from typing import Optional
 
 # Agregar el root del proyecto al path
@@ -23,6 +22,7 @@ sys.path.insert(0, PROJECT_ROOT)
 
 from core.http_client import HttpClient, WAFBlockedError, CircuitBreaker
 from core.base_sniffer import BaseSniffer, Product, Glitch
+from core.database import Database
 
 # Logging
 logging.basicConfig(
@@ -33,36 +33,6 @@ logging.basicConfig(
 logger = logging.getLogger("fravega")
 
 
-# ============================================================================
-# GLITCH DETECTION — Lógica de Élite (migrada del original)
-# ============================================================================
-
-def detect_price_glitch_fast(current_price, previous_price, list_price):
-    """
-    Función de Élite para detectar errores de carga (Glitches).
-    Retorna (es_glitch, razon)
-    """
-    if current_price <= 0:
-        return True, "Precio Inválido (0 o menor)"
-
-    if list_price and current_price > list_price * 1.5:
-        return True, "Precio Inflado Sospechoso"
-
-    if previous_price and previous_price > 0:
-        drop_percent = ((previous_price - current_price) / previous_price) * 100
-        if drop_percent > 85:
-            return True, f"Glitch probable: Caída del {drop_percent:.1f}%"
-
-        increase_percent = ((current_price - previous_price) / previous_price) * 100
-        if increase_percent > 400:
-            return True, f"Aumento masivo sospechoso: {increase_percent:.1f}%"
-
-    if current_price < 500 and list_price and list_price > 50000:
-        return True, "Precio ridículamente bajo respecto a lista"
-
-    return False, "Sano"
-
-
 # ============================================================================
 # FRAVEGA SNIFFER — Hereda de BaseSniffer
 # ============================================================================
@@ -82,6 +52,9 @@ class FravegaSniffer(BaseSniffer):
     BASE_URL = "https://www.fravega.com"
     API_URL = "https://www.fravega.com/api/v1"
     
+    # Items por request: los ajusta el auto-tuner dentro de estos límites
+    PAGE_SIZE_BOUNDS = (20, 50)
+    
     GRAPHQL_QUERY = """
     query listProducts($size: PositiveInt!, $offset: Int, $sorting: [SortOption!], $filtering: ItemFilteringInputType) {
       items(filtering: $filtering) {
@@ -115,11 +88,8 @@ class FravegaSniffer(BaseSniffer):
     }
     """
     
-    def __init__(self, db_path: Optional[str] = None):
-        # DB en el mismo directorio que el script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        default_db = os.path.join(script_dir, "fravega_monitor.db")
-        super().__init__(db_path=db_path or default_db)
+    def __init__(self, ledger: Optional[Database] = None):
+        super().__init__(ledger=ledger)
         
         # Cliente HTTP con curl_cffi
         self.client = HttpClient(
@@ -133,13 +103,11 @@ class FravegaSniffer(BaseSniffer):
             extra_headers={
                 "Referer": "https://www.fravega.com/",
             },
+            tuner=self.tuner,
         )
         
         # Primer request al home para obtener cookies
         self._warm_session()
-        
-        # DB legacy (mantenemos la estructura original por compatibilidad)
-        self._init_legacy_db()
     
     def _warm_session(self) -> None:
         """Visitar homepage para obtener cookies (simular navegación real)."""
@@ -149,50 +117,18 @@ class FravegaSniffer(BaseSniffer):
         except Exception as e:
             self.logger.warning(f"⚠️ No se pudo calentar session: {e}")
     
-    def _init_legacy_db(self) -> None:
-        """Crear tablas de la DB original (compatibilidad)."""
-        import sqlite3
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS products (
-                    id TEXT PRIMARY KEY,
-                    name TEXT,
-                    title TEXT,  -- Legacy
-                    brand TEXT,
-                    brand_name TEXT, -- Legacy
-                    category TEXT,
-                    last_price REAL,
-                    list_price REAL,
-                    lowest_price REAL,
-                    discount_pct REAL DEFAULT 0,
-                    url TEXT,
-                    slug TEXT, -- Legacy
-                    image_url TEXT,
-                    source TEXT DEFAULT 'fravega',
-                    last_seen DATETIME
-                )
-            """)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS alerts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id TEXT,
-                    old_price REAL,
-                    new_price REAL,
-                    timestamp DATETIME
-                )
-            """)
-    
     # --- Implementación de métodos abstractos de BaseSniffer ---
     
-    def fetch_products(self, category: str, size: int = 50, **kwargs) -> list[dict]:
+    def fetch_products(self, category: str, size: Optional[int] = None, **kwargs) -> list[dict]:
         """
         Fetch productos via GraphQL API de Frávega.
         USA curl_cffi con impersonación Chrome → bypass WAF.
+        `size` default: tamaño de página del auto-tuner.
         """
         sorting = kwargs.get("sorting", "TOTAL_SALES_IN_LAST_30_DAYS")
         
         variables = {
-            "size": size,
+            "size": size or self.page_size,
             "offset": 0,
             "sorting": sorting,
             "filtering": {
@@ -303,96 +239,38 @@ class FravegaSniffer(BaseSniffer):
             raw_data={"sku_code": sku_code, "slug": slug},
         )
     
-    def detect_glitch(self, product: Product, previous_price: float = 0.0) -> Optional[Glitch]:
+    def ledger_extras(self, product: Product) -> dict:
+        """Adapter Frávega → ledger (sku_code se guarda como sku)."""
+        return {"sku": product.raw_data.get("sku_code"), "slug": product.raw_data.get("slug")}
+    
+    def save_products(self, products: list[Product]) -> None:
         """
-        Usar la detección de glitches original de élite + la del BaseSniffer.
+        Guardar en el ledger, registrando una alerta por cualquier caída de
+        precio (no solo > 5%). Los agotados se guardan con in_stock=0: así
+        dejan de contar como referencia de mercado y en las brechas.
         """
-        # Primero la detección legacy
-        is_glitch, reason = detect_price_glitch_fast(
-            product.current_price,
-            previous_price,
-            product.list_price,
+        diff = self.ledger.save_products(
+            products,
+            extras_of=self.ledger_extras,
+            alert_drop_pct=0.0,
         )
         
-        if is_glitch:
-            severity = "critical" if "ridículo" in reason.lower() else "high"
-            return Glitch(
-                product=product,
-                reason=reason,
-                severity=severity,
-                previous_price=previous_price,
-            )
-        
-        # Fallback al detector del BaseSniffer
-        return super().detect_glitch(product, previous_price)
-    
-    def save_products(self, products: list[Product]) -> None:
-        """Guardar en la DB legacy (compatible con el esquema original)."""
-        import sqlite3
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            for p in products:
-                if not p.in_stock:
-                    continue
-                
-                # Verificar precio anterior
-                cursor.execute("SELECT last_price, lowest_price FROM products WHERE id = ?", (p.id,))
-                row = cursor.fetchone()
+        for p, last_price in diff.changed:
+            # Detectar caída
+            if p.in_stock and p.current_price < last_price:
+                drop = last_price - p.current_price
+                percent = (drop / last_price) * 100 if last_price else 0.0
                 
-                if row:
-                    last_price, lowest_price = row
-                    
-                    # Detectar caída
-                    if p.current_price < last_price:
-                        diff = last_price - p.current_price
-                        percent = (diff / last_price) * 100
-                        
-                        glitch = self.detect_glitch(p, last_price)
-                        if glitch:
-                            tag = "⚡ BUG/GLITCH"
-                        else:
-                            tag = "🔥 ALERT"
-                        
-                        self.logger.info(
-                            f"[{tag}] {p.name[:50]} bajó ${diff:,.0f} ({percent:.1f}%) "
-                            f"→ ${p.current_price:,.0f}"
-                        )
-                        
-                        # Guardar alerta
-                        conn.execute(
-                            "INSERT INTO alerts (product_id, old_price, new_price, timestamp) "
-                            "VALUES (?, ?, ?, ?)",
-                            (p.id, last_price, p.current_price, datetime.now()),
-                        )
-                    
-                    # Update
-                    new_lowest = min(p.current_price, (lowest_price or p.current_price))
-                    cursor.execute("""
-                        UPDATE products 
-                        SET last_price = ?, list_price = ?, lowest_price = ?, last_seen = ?,
-                            category = ?, image_url = ?, brand = ?, brand_name = ?, 
-                            name = ?, title = ?, url = ?, slug = ?, discount_pct = ?
-                        WHERE id = ?
-                    """, (
-                        p.current_price, p.list_price, new_lowest, datetime.now(),
-                        p.category, p.image_url, p.brand, p.brand,
-                        p.name, p.name, p.url, p.raw_data.get("slug", ""), p.discount_pct,
-                        p.id,
-                    ))
+                glitch = self.detect_glitch(p, last_price)
+                if glitch:
+                    tag = "⚡ BUG/GLITCH"
                 else:
-                    # Insert nuevo
-                    cursor.execute("""
-                        INSERT INTO products (id, name, title, brand, brand_name, category, 
-                                            last_price, list_price, lowest_price, discount_pct,
-                                            url, slug, image_url, source, last_seen)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        p.id, p.name, p.name, p.brand, p.brand, p.category,
-                        p.current_price, p.list_price, p.current_price, p.discount_pct,
-                        p.url, p.raw_data.get("slug", ""), p.image_url, "fravega", datetime.now(),
-                    ))
+                    tag = "🔥 ALERT"
+                
+                self.logger.info(
+                    f"[{tag}] {p.name[:50]} bajó ${drop:,.0f} ({percent:.1f}%) "
+                    f"→ ${p.current_price:,.0f}"
+                )
     
     def on_glitch_found(self, glitch: Glitch) -> None:
         """Log de glitches detectados."""
@@ -406,25 +284,29 @@ class FravegaSniffer(BaseSniffer):
 # MAIN
 # ============================================================================
 
-if __name__ == "__main__":
-    # Cargar categorías
-    data_dir = os.path.join(PROJECT_ROOT, "data")
-    json_path = os.path.join(data_dir, "clean_categories.json")
+def load_categories() -> list[str]:
+    """Categorías de data/clean_categories.json (o un set por defecto)."""
+    json_path = os.path.join(PROJECT_ROOT, "data", "clean_categories.json")
     
     if os.path.exists(json_path):
         with open(json_path, "r") as f:
             raw_categories = json.load(f)
         target_categories = [c.strip("/") for c in raw_categories if c.strip("/")]
         logger.info(f"📦 Loaded {len(target_categories)} categories from {json_path}")
-    else:
-        logger.info(f"[!] {json_path} not found. Using defaults.")
-        target_categories = [
-            "celulares-y-smartphones/celulares-y-smartphones",
-            "audio/auriculares",
-            "tv-y-video/tv",
-            "gaming/consolas",
-            "computacion/notebooks",
-        ]
+        return target_categories
+    
+    logger.info(f"[!] {json_path} not found. Using defaults.")
+    return [
+        "celulares-y-smartphones/celulares-y-smartphones",
+        "audio/auriculares",
+        "tv-y-video/tv",
+        "gaming/consolas",
+        "computacion/notebooks",
+    ]
+
+
+if __name__ == "__main__":
+    target_categories = load_categories()
     
     sniffer = FravegaSniffer()
     
@@ -432,16 +314,17 @@ if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Frávega Price Sniffer")
     parser.add_argument("--daemon", action="store_true", help="Correr en loop infinito")
-    parser.add_argument("--interval", type=int, default=60, help="Segundos entre ciclos")
+    parser.add_argument("--interval", type=int, default=60, help="Segundos entre scans de una categoría volátil (las estáticas: 1h)")
     parser.add_argument("--categories", nargs="+", help="Categorías específicas")
+    parser.add_argument("--concurrency", type=int, default=1, help="Categorías en paralelo por ciclo")
     args = parser.parse_args()
     
     cats = args.categories or target_categories
     
     if args.daemon:
-        sniffer.run_forever(cats, interval=args.interval)
+        sniffer.run_forever(cats, interval=args.interval, concurrency=args.concurrency)
     else:
-        results = sniffer.run_cycle(cats)
+        results = sniffer.run_cycle(cats, concurrency=args.concurrency)
         
         # Resumen
         total_products = sum(r.products_found for r in results)
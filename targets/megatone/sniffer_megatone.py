@@ -14,16 +14,15 @@ Descubierto en recon del 2026-02-21:
 import os
 import sys
 import logging
-import sqlite3
 import json
-from datetime import datetime
-from typing import Optional
+from typing import Iterator, Optional
 
 # Agregar el root del proyecto al path
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, PROJECT_ROOT)
 
 from core.base_sniffer import BaseSniffer, Product, Glitch
+from core.database import Database
 from core.http_client import HttpClient
 
 logger = logging.getLogger(__name__)
@@ -61,10 +60,13 @@ class MegatoneSniffer(BaseSniffer):
     TARGET_NAME = "megatone"
     BASE_URL = "https://www.megatone.net"
     
-    def __init__(self, db_path: Optional[str] = None):
-        super().__init__(db_path or "megatone_monitor.db")
+    # Results per page de Doofinder (el auto-tuner ajusta dentro de estos límites)
+    PAGE_SIZE_BOUNDS = (20, 100)
+    
+    def __init__(self, ledger: Optional[Database] = None):
+        super().__init__(ledger=ledger)
         
-        self.client = HttpClient(stealth_mode=True)
+        self.client = HttpClient(stealth_mode=True, tuner=self.tuner)
         
         # Headers necesarios para que Doofinder no nos rebote
         self.headers = {
@@ -74,42 +76,19 @@ class MegatoneSniffer(BaseSniffer):
             'referer': 'https://www.megatone.net/',
             'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36'
         }
-        
-        self._init_db()
-
-    def _init_db(self):
-        """Crear tablas si no existen."""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id TEXT PRIMARY KEY,
-                name TEXT,
-                brand TEXT,
-                category TEXT,
-                last_price REAL,
-                list_price REAL,
-                discount_pct REAL DEFAULT 0,
-                url TEXT,
-                image_url TEXT,
-                source TEXT DEFAULT 'megatone',
-                last_seen TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
 
-    def fetch_products(self, category: str, size: int = 200, **kwargs) -> list[dict]:
+    def iter_product_pages(self, category: str, size: int = 200, **kwargs) -> Iterator[list[dict]]:
         """
-        Fetch productos desde Doofinder.
+        Fetch productos desde Doofinder, una página por vez (generador).
         """
         query_term = MEGATONE_CATEGORIES.get(category, category)
-        all_products = []
+        fetched = 0
         
         # Doofinder permite paginar con 'page'
         page = 1
-        rpp = 100 # Results per page (max recomendado)
+        rpp = self.page_size  # Results per page (auto-tuner, máx 100)
         
-        while len(all_products) < size:
+        while fetched < size:
             url = f"{DOOFINDER_URL}?page={page}&rpp={rpp}&query={query_term}"
             self.logger.info(f"📡 Fetching Megatone via Doofinder (pag {page}): {query_term}")
             
@@ -127,11 +106,13 @@ class MegatoneSniffer(BaseSniffer):
                 if not results:
                     break
                 
-                all_products.extend(results)
+                results = results[:size - fetched]
+                fetched += len(results)
+                yield results
                 
                 # Ver si hay más páginas (total es el total de items encontrados)
                 total = data.get('total', 0)
-                if len(all_products) >= total or len(results) < rpp:
+                if fetched >= total or len(results) < rpp:
                     break
                 
                 page += 1
@@ -139,8 +120,6 @@ class MegatoneSniffer(BaseSniffer):
             except Exception as e:
                 self.logger.error(f"💥 Error en fetch Megatone: {e}")
                 break
-                
-        return all_products[:size]
 
     def parse_product(self, raw: dict) -> Product:
         """Convertir JSON Doofinder -> Product normalizado."""
@@ -167,34 +146,19 @@ class MegatoneSniffer(BaseSniffer):
             in_stock=(raw.get('availability', '').lower() == 'in stock')
         )
 
-    def save_products(self, products: list[Product]) -> None:
-        """Guardar en SQLite."""
-        conn = sqlite3.connect(self.db_path)
-        now = datetime.now().isoformat()
-        for p in products:
-            conn.execute("""
-                INSERT OR REPLACE INTO products 
-                (id, name, brand, category, last_price, list_price, discount_pct, url, image_url, last_seen)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (p.id, p.name, p.brand, p.category, p.current_price, p.list_price, p.discount_pct, p.url, p.image_url, now))
-        conn.commit()
-        conn.close()
-
-    def close(self):
-        self.client.close()
-
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Megatone Price Sniffer")
     parser.add_argument("--daemon", action="store_true", help="Correr en loop infinito")
-    parser.add_argument("--interval", type=int, default=120, help="Segundos entre ciclos")
+    parser.add_argument("--interval", type=int, default=120, help="Segundos entre scans de una categoría volátil (las estáticas: 1h)")
     parser.add_argument("--categories", nargs="+", help="Categorías específicas")
+    parser.add_argument("--concurrency", type=int, default=1, help="Categorías en paralelo por ciclo")
     args = parser.parse_args()
     
     cats = args.categories or list(MEGATONE_CATEGORIES.keys())
     sniffer = MegatoneSniffer()
     
     if args.daemon:
-        sniffer.run_forever(cats, interval=args.interval)
+        sniffer.run_forever(cats, interval=args.interval, concurrency=args.concurrency)
     else:
-        sniffer.run_cycle(cats)
+        sniffer.run_cycle(cats, concurrency=args.concurrency)
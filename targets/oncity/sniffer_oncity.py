@@ -21,11 +21,9 @@ from __future__ import annotations
 import os
 import sys
 import logging
-import sqlite3
 import time
 import random
-from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 # Agregar el root del proyecto al path
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -33,6 +31,7 @@ sys.path.insert(0, PROJECT_ROOT)
 
 from core.base_sniffer import BaseSniffer, Product, Glitch
 from core.http_client import HttpClient
+from core.database import Database
 
 logger = logging.getLogger(__name__)
 
@@ -98,11 +97,11 @@ class OnCitySniffer(BaseSniffer):
     API_URL = "https://www.oncity.com/api/catalog_system/pub/products/search"
     CATEGORIES_URL = "https://www.oncity.com/api/catalog_system/pub/category/tree/3"
     
-    # VTEX pagina de a 50 productos máximo
-    PAGE_SIZE = 50
+    # VTEX pagina de a 50 productos máximo (el auto-tuner ajusta por debajo)
+    PAGE_SIZE_BOUNDS = (10, 50)
     
-    def __init__(self, db_path: Optional[str] = None):
-        super().__init__(db_path or "oncity_monitor.db")
+    def __init__(self, ledger: Optional[Database] = None):
+        super().__init__(ledger=ledger)
         
         # HttpClient con stealth activado
         self.client = HttpClient(
@@ -110,58 +109,18 @@ class OnCitySniffer(BaseSniffer):
             rotate_browser=True,
             retry_count=3,
             delay_range=(1.0, 3.0),  # Un poco más conservador
+            tuner=self.tuner,
         )
-        
-        # Inicializar DB
-        self._init_db()
-    
-    def _init_db(self):
-        """Crear tablas si no existen."""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id TEXT PRIMARY KEY,
-                name TEXT,
-                brand TEXT,
-                category TEXT,
-                last_price REAL,
-                list_price REAL,
-                discount_pct REAL DEFAULT 0,
-                url TEXT,
-                image_url TEXT,
-                ean TEXT,
-                stock INTEGER DEFAULT 0,
-                first_seen TEXT,
-                last_seen TEXT,
-                price_history TEXT DEFAULT '[]',
-                source TEXT DEFAULT 'oncity'
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS alerts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                product_id TEXT,
-                product_name TEXT,
-                alert_type TEXT,
-                old_price REAL,
-                new_price REAL,
-                discount_pct REAL,
-                timestamp TEXT,
-                details TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
-        self.logger.info(f"💾 DB inicializada: {self.db_path}")
     
     # --- Implementación de métodos abstractos ---
     
-    def fetch_products(self, category: str, size: int = 200, **kwargs) -> list[dict]:
+    def iter_product_pages(self, category: str, size: int = 200, **kwargs) -> Iterator[list[dict]]:
         """
-        Fetch productos via VTEX REST API con paginación.
+        Fetch productos via VTEX REST API, una página por vez (generador).
         
-        La API VTEX retorna máximo 50 productos por request.
+        La API VTEX retorna máximo 50 productos por request (página del tuner).
         Paginamos automáticamente hasta obtener `size` productos.
+        fetch_products() (heredado) junta todas las páginas en una lista.
         
         Args:
             category: Nombre corto de categoría (e.g., "celulares")
@@ -173,11 +132,12 @@ class OnCitySniffer(BaseSniffer):
         # Warm session
         self.client.warm_session(self.BASE_URL)
         
-        all_products = []
+        fetched = 0
         offset = 0
+        page_size = self.page_size
         
         while offset < size:
-            end = min(offset + self.PAGE_SIZE - 1, size - 1)
+            end = min(offset + page_size - 1, size - 1)
             
             # Construir URL
             if cat_path:
@@ -194,17 +154,18 @@ class OnCitySniffer(BaseSniffer):
                     if not products or not isinstance(products, list):
                         break
                     
-                    all_products.extend(products)
+                    fetched += len(products)
                     self.logger.info(
-                        f"   📦 {category}: página {offset//self.PAGE_SIZE + 1}, "
-                        f"+{len(products)} productos (total: {len(all_products)})"
+                        f"   📦 {category}: página {offset//page_size + 1}, "
+                        f"+{len(products)} productos (total: {fetched})"
                     )
+                    yield products
                     
-                    # Si devolvió menos de PAGE_SIZE, no hay más
-                    if len(products) < self.PAGE_SIZE:
+                    # Si devolvió menos de una página, no hay más
+                    if len(products) < page_size:
                         break
                     
-                    offset += self.PAGE_SIZE
+                    offset += page_size
                 else:
                     self.logger.warning(f"   ⚠️ Status {response.status_code} para {cat_path}")
                     break
@@ -212,8 +173,6 @@ class OnCitySniffer(BaseSniffer):
             except Exception as e:
                 self.logger.error(f"   ❌ Error fetch {category} offset {offset}: {e}")
                 break
-        
-        return all_products
     
     def parse_product(self, raw: dict) -> Product:
         """
@@ -277,101 +236,25 @@ class OnCitySniffer(BaseSniffer):
             raw_data={"ean": ean, "stock": stock},
         )
     
-    def save_products(self, products: list[Product]) -> None:
-        """Guardar productos en SQLite."""
-        conn = sqlite3.connect(self.db_path)
-        now = datetime.now().isoformat()
-        saved = 0
-        
-        for p in products:
-            if p.current_price <= 0:
-                continue
-            
-            try:
-                # Verificar si existe
-                existing = conn.execute(
-                    "SELECT last_price, price_history FROM products WHERE id = ?",
-                    (p.id,)
-                ).fetchone()
-                
-                ean = p.raw_data.get("ean", "")
-                stock = p.raw_data.get("stock", 0)
-                
-                if existing:
-                    old_price = existing[0]
-                    history = existing[1] or "[]"
-                    
-                    # Agregar al historial si cambió el precio
-                    if abs(old_price - p.current_price) > 0.01:
-                        import json
-                        hist = json.loads(history)
-                        hist.append({"price": p.current_price, "date": now})
-                        # Mantener últimos 100 registros
-                        hist = hist[-100:]
-                        history = json.dumps(hist)
-                        
-                        # Registrar alerta si bajó más de 5%
-                        if old_price > 0:
-                            change_pct = ((p.current_price - old_price) / old_price) * 100
-                            if change_pct < -5:
-                                conn.execute("""
-                                    INSERT INTO alerts (product_id, product_name, alert_type,
-                                        old_price, new_price, discount_pct, timestamp, details)
-                                    VALUES (?, ?, 'price_drop', ?, ?, ?, ?, ?)
-                                """, (p.id, p.name, old_price, p.current_price, 
-                                      abs(change_pct), now, f"Bajó {abs(change_pct):.1f}%"))
-                    
-                    conn.execute("""
-                        UPDATE products SET
-                            name=?, brand=?, category=?, last_price=?, list_price=?,
-                            discount_pct=?, url=?, image_url=?, ean=?, stock=?,
-                            last_seen=?, price_history=?
-                        WHERE id=?
-                    """, (p.name, p.brand, p.category, p.current_price, p.list_price,
-                          p.discount_pct, p.url, p.image_url, ean, stock,
-                          now, history, p.id))
-                else:
-                    import json
-                    history = json.dumps([{"price": p.current_price, "date": now}])
-                    
-                    conn.execute("""
-                        INSERT INTO products (id, name, brand, category, last_price, list_price,
-                            discount_pct, url, image_url, ean, stock, first_seen, last_seen,
-                            price_history, source)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'oncity')
-                    """, (p.id, p.name, p.brand, p.category, p.current_price, p.list_price,
-                          p.discount_pct, p.url, p.image_url, ean, stock,
-                          now, now, history))
-                
-                saved += 1
-            except Exception as e:
-                self.logger.error(f"   ❌ Error guardando {p.name[:30]}: {e}")
-        
-        conn.commit()
-        conn.close()
-        self.logger.info(f"   💾 {saved}/{len(products)} productos guardados en {self.db_path}")
-    
     def get_all_categories(self) -> list[dict]:
         """Obtener árbol completo de categorías de On City."""
         self.client.warm_session(self.BASE_URL)
         return self.client.get_json(self.CATEGORIES_URL)
     
-    def close(self):
-        """Cerrar recursos."""
-        self.client.close()
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="OnCity Price Sniffer")
     parser.add_argument("--daemon", action="store_true", help="Correr en loop infinito")
-    parser.add_argument("--interval", type=int, default=120, help="Segundos entre ciclos")
+    parser.add_argument("--interval", type=int, default=120, help="Segundos entre scans de una categoría volátil (las estáticas: 1h)")
     parser.add_argument("--categories", nargs="+", help="Categorías específicas")
+    parser.add_argument("--concurrency", type=int, default=1, help="Categorías en paralelo por ciclo")
     args = parser.parse_args()
     
     cats = args.categories or list(ONCITY_CATEGORIES.keys())
     sniffer = OnCitySniffer()
     
     if args.daemon:
-        sniffer.run_forever(cats, interval=args.interval)
+        sniffer.run_forever(cats, interval=args.interval, concurrency=args.concurrency)
     else:
-        sniffer.run_cycle(cats)
+        sniffer.run_cycle(cats, concurrency=args.concurrency)
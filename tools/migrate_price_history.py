@@ -0,0 +1,112 @@
+"""
+Migración one-shot: historial JSON (products.price_history) → tabla price_history
+
+OnCity y Cetrogar guardaban el historial como un JSON en cada fila de
+products (truncado a 100 puntos). Este script lo pasa a la tabla
+normalizada de core/database.py (centavos + epoch seconds) y vacía la
+columna vieja. También convierte tablas price_history con el formato
+viejo de core.Database (price REAL, recorded_at TIMESTAMP).
+
+Es idempotente: correrlo dos veces no duplica puntos.
+
+Uso:
+    python tools/migrate_price_history.py                 # busca *_monitor.db
+    python tools/migrate_price_history.py data/databases/oncity_monitor.db
+    python tools/migrate_price_history.py --keep-json     # no vaciar la columna
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database import append_price_history, ensure_price_history
+
+
+def find_databases() -> list[str]:
+    patterns = [
+        os.path.join(PROJECT_ROOT, "data", "databases", "*_monitor.db"),
+        os.path.join(PROJECT_ROOT, "targets", "*", "*_monitor.db"),
+        os.path.join(PROJECT_ROOT, "*_monitor.db"),
+    ]
+    return sorted({path for pattern in patterns for path in glob.glob(pattern)})
+
+
+def migrate(db_path: str, keep_json: bool = False) -> int:
+    """Migrar una DB. Retorna cantidad de puntos de historial escritos."""
+    default_source = os.path.basename(db_path).replace("_monitor.db", "")
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_price_history(conn)
+
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(products)")}
+        if "price_history" not in columns:
+            conn.commit()
+            print(f"  ⏭️  {db_path}: sin columna JSON")
+            return 0
+
+        has_source = "source" in columns
+        rows = conn.execute(
+            f"SELECT id, {'source' if has_source else 'NULL'}, price_history "
+            "FROM products WHERE price_history IS NOT NULL AND price_history != '[]'"
+        ).fetchall()
+
+        points = []
+        skipped = 0
+        for product_id, source, blob in rows:
+            try:
+                history = json.loads(blob)
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
+            for entry in history:
+                if entry.get("price") is None or not entry.get("date"):
+                    skipped += 1
+                    continue
+                points.append((product_id, source or default_source, entry["price"], entry["date"]))
+
+        written = append_price_history(conn, points)
+        if not keep_json:
+            conn.execute("UPDATE products SET price_history = '[]'")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    print(f"  ✅ {db_path}: {written} puntos de {len(rows)} productos ({skipped} inválidos)")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrar historial JSON a price_history")
+    parser.add_argument("databases", nargs="*", help="DBs a migrar (default: todas las *_monitor.db)")
+    parser.add_argument("--keep-json", action="store_true", help="No vaciar products.price_history")
+    args = parser.parse_args()
+
+    databases = args.databases or find_databases()
+    if not databases:
+        print("❌ No se encontraron DBs para migrar")
+        sys.exit(1)
+
+    print(f"🚀 MIGRANDO HISTORIAL DE PRECIOS ({len(databases)} DBs)...")
+    total = 0
+    for db_path in databases:
+        try:
+            total += migrate(db_path, keep_json=args.keep_json)
+        except Exception as e:
+            print(f"  ❌ ERROR en {db_path}: {e}")
+            sys.exit(1)
+
+    print(f"\n✨ MIGRACIÓN OK: {total} puntos de historial.")
+
+
+if __name__ == "__main__":
+    main()
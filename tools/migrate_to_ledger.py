@@ -0,0 +1,258 @@
+"""
+Migración one-shot: DBs por tienda (*_monitor.db) → Unified Ledger
+
+Cada target tenía su propio esquema (last_price vs current_price, title vs
+name, brand_name vs brand...). Este script lee cada DB vieja con un
+adapter por esquema y vuelca todo en data/databases/ledger.db:
+
+- products       → products (PK source + product_id; gana el last_seen más nuevo)
+- price_history  → price_history (tabla compacta y/o JSON viejo en products)
+- alerts         → alerts
+
+Es idempotente: correrlo dos veces no duplica productos ni historial
+(las alertas se copian solo si la DB no fue migrada antes).
+
+Uso:
+    python tools/migrate_to_ledger.py                      # busca las DBs conocidas
+    python tools/migrate_to_ledger.py --ledger /tmp/ledger.db
+    python tools/migrate_to_ledger.py oncity=viejo/oncity_monitor.db
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database import Database, append_price_history
+
+# Dónde buscaba cada tienda su DB (mismos paths que web/lib/db.ts)
+KNOWN_DATABASES = {
+    "fravega": [
+        "targets/fravega/fravega_monitor.db",
+        "targets/fravega/fravega_monitor_v2.db",
+        "data/databases/fravega_monitor.db",
+    ],
+    "oncity": ["oncity_monitor.db", "data/databases/oncity_monitor.db"],
+    "cetrogar": ["cetrogar_monitor.db", "data/databases/cetrogar_monitor.db"],
+    "megatone": ["megatone_monitor.db", "data/databases/megatone_monitor.db"],
+    "newsan": ["newsan_monitor.db", "data/databases/newsan_monitor.db"],
+    "casadelaudio": ["casadelaudio_monitor.db", "data/databases/casadelaudio_monitor.db"],
+}
+
+# Adapter de esquema: columna del ledger → candidatas en las DBs viejas (en orden)
+COLUMN_ALIASES = {
+    "name": ["name", "title"],
+    "brand": ["brand", "brand_name"],
+    "category": ["category"],
+    "current_price": ["current_price", "last_price"],
+    "list_price": ["list_price"],
+    "lowest_price": ["lowest_price"],
+    "discount_pct": ["discount_pct"],
+    "url": ["url", "link"],
+    "image_url": ["image_url", "image", "img"],
+    "ean": ["ean"],
+    "sku": ["sku", "sku_code"],
+    "slug": ["slug"],
+    "stock": ["stock"],
+    "stock_status": ["stock_status"],
+    "first_seen": ["first_seen"],
+    "last_seen": ["last_seen"],
+}
+
+ALERT_ALIASES = {
+    "product_name": ["product_name"],
+    "alert_type": ["alert_type"],
+    "old_price": ["old_price"],
+    "new_price": ["new_price"],
+    "discount_pct": ["discount_pct"],
+    "message": ["message", "details"],
+    "timestamp": ["timestamp"],
+}
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _select_list(aliases: dict, available: set) -> str:
+    """SELECT con alias al nombre del ledger (NULL si la DB no tiene la columna)."""
+    parts = []
+    for target, candidates in aliases.items():
+        found = next((c for c in candidates if c in available), None)
+        parts.append(f"{found} AS {target}" if found else f"NULL AS {target}")
+    return ", ".join(parts)
+
+
+def _iso(value) -> str:
+    """Normalizar timestamps viejos ('2026-01-01 10:00:00' → ISO con 'T')."""
+    if not value:
+        return datetime.now().isoformat()
+    return str(value).replace(" ", "T", 1)
+
+
+def migrate_store(ledger: sqlite3.Connection, source: str, db_path: str) -> dict:
+    """Volcar una DB vieja al ledger. Retorna conteos."""
+    counts = {"products": 0, "history": 0, "alerts": 0}
+    old = sqlite3.connect(db_path)
+    old.row_factory = sqlite3.Row
+    try:
+        product_cols = _columns(old, "products")
+        if not product_cols:
+            return counts
+        id_col = "product_id" if "product_id" in product_cols else "id"
+
+        rows = old.execute(
+            f"SELECT {id_col} AS product_id, {_select_list(COLUMN_ALIASES, product_cols)}"
+            f"{', price_history AS history_json' if 'price_history' in product_cols else ''} "
+            "FROM products"
+        ).fetchall()
+
+        history = []
+        for r in rows:
+            price = r["current_price"] or 0
+            if price <= 0:
+                continue
+            ledger.execute("""
+                INSERT INTO products
+                (source, product_id, name, brand, category, current_price, list_price,
+                 lowest_price, discount_pct, url, image_url, in_stock, ean, sku, slug,
+                 stock, stock_status, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(source, product_id) DO UPDATE SET
+                    name = excluded.name, brand = excluded.brand,
+                    category = COALESCE(NULLIF(excluded.category, ''), category),
+                    current_price = excluded.current_price, list_price = excluded.list_price,
+                    lowest_price = MIN(COALESCE(lowest_price, excluded.lowest_price),
+                                       excluded.lowest_price),
+                    discount_pct = excluded.discount_pct, url = excluded.url,
+                    image_url = excluded.image_url,
+                    ean = COALESCE(excluded.ean, ean), sku = COALESCE(excluded.sku, sku),
+                    slug = COALESCE(excluded.slug, slug),
+                    stock = COALESCE(excluded.stock, stock),
+                    stock_status = COALESCE(excluded.stock_status, stock_status),
+                    first_seen = MIN(first_seen, excluded.first_seen),
+                    last_seen = excluded.last_seen
+                WHERE excluded.last_seen >= products.last_seen
+            """, (
+                source, str(r["product_id"]), r["name"] or "Sin nombre", r["brand"] or "",
+                r["category"] or "", price, r["list_price"] or 0,
+                r["lowest_price"] or price, r["discount_pct"] or 0,
+                r["url"] or "", r["image_url"] or "",
+                r["ean"], r["sku"], r["slug"], r["stock"], r["stock_status"],
+                _iso(r["first_seen"] or r["last_seen"]), _iso(r["last_seen"]),
+            ))
+            counts["products"] += 1
+
+            # Historial viejo en JSON (si no se corrió migrate_price_history.py)
+            blob = r["history_json"] if "history_json" in r.keys() else None
+            if blob and blob != "[]":
+                try:
+                    for entry in json.loads(blob):
+                        if entry.get("price") is not None and entry.get("date"):
+                            history.append((r["product_id"], source, entry["price"], entry["date"]))
+                except (TypeError, ValueError):
+                    pass
+
+        # Historial ya normalizado (formato compacto de core/database.py)
+        if "price_cents" in _columns(old, "price_history"):
+            history.extend(
+                (pid, source, cents / 100, ts)
+                for pid, cents, ts in old.execute(
+                    "SELECT product_id, price_cents, recorded_at FROM price_history"
+                )
+            )
+        counts["history"] = append_price_history(ledger, history)
+
+        # Alertas (solo la primera vez que se migra esta DB)
+        alert_cols = _columns(old, "alerts")
+        already = ledger.execute(
+            "SELECT 1 FROM _ledger_migrations WHERE db_path = ?", (os.path.abspath(db_path),)
+        ).fetchone()
+        if alert_cols and not already:
+            alerts = old.execute(
+                f"SELECT product_id, {_select_list(ALERT_ALIASES, alert_cols)} FROM alerts"
+            ).fetchall()
+            ledger.executemany("""
+                INSERT INTO alerts (source, product_id, product_name, alert_type,
+                    old_price, new_price, discount_pct, message, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (source, str(a["product_id"]), a["product_name"] or "",
+                 a["alert_type"] or "price_drop", a["old_price"], a["new_price"],
+                 a["discount_pct"], a["message"] or "", _iso(a["timestamp"]))
+                for a in alerts
+            ])
+            counts["alerts"] = len(alerts)
+
+        ledger.execute(
+            "INSERT OR REPLACE INTO _ledger_migrations (db_path, migrated_at) VALUES (?, ?)",
+            (os.path.abspath(db_path), datetime.now().isoformat()),
+        )
+    finally:
+        old.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrar DBs por tienda al Unified Ledger")
+    parser.add_argument("databases", nargs="*", help="source=path (default: paths conocidos)")
+    parser.add_argument("--ledger", help="Path del ledger (default: data/databases/ledger.db)")
+    args = parser.parse_args()
+
+    if args.databases:
+        targets = [tuple(spec.split("=", 1)) for spec in args.databases]
+    else:
+        targets = [
+            (source, os.path.join(PROJECT_ROOT, rel))
+            for source, paths in KNOWN_DATABASES.items()
+            for rel in paths
+            if os.path.exists(os.path.join(PROJECT_ROOT, rel))
+        ]
+
+    if not targets:
+        print("❌ No se encontraron DBs para migrar")
+        sys.exit(1)
+
+    db = Database.shared(args.ledger)
+    print(f"🚀 MIGRANDO {len(targets)} DBs → {db.db_path}")
+
+    conn = sqlite3.connect(db.db_path, timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS _ledger_migrations (
+            db_path TEXT PRIMARY KEY,
+            migrated_at TEXT
+        )
+    """)
+    totals = {"products": 0, "history": 0, "alerts": 0}
+    try:
+        for source, path in targets:
+            try:
+                counts = migrate_store(conn, source, path)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"  ❌ ERROR en {path}: {e}")
+                sys.exit(1)
+            print(
+                f"  ✅ {source:12s} {path}: {counts['products']} productos, "
+                f"{counts['history']} puntos de historial, {counts['alerts']} alertas"
+            )
+            for key in totals:
+                totals[key] += counts[key]
+    finally:
+        conn.close()
+
+    print(
+        f"\n✨ MIGRACIÓN OK: {totals['products']} productos, "
+        f"{totals['history']} puntos de historial, {totals['alerts']} alertas."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -26,7 +26,34 @@ else
     echo "✅ TEST TELEGRAM PASADO"
 fi
 
-# 2. Test Stripe (TS)
+# 2. Tests unitarios (Python, reloj falso, sin red)
+for TEST in \
+    tools/test_rate_limiter.py \
+    tools/test_shared_state.py \
+    tools/test_autotuner.py \
+    tools/test_database.py \
+    tools/test_glitch_detector.py \
+    tools/test_glitch_rules.py \
+    tools/test_baselines.py \
+    tools/test_matching.py \
+    tools/test_fravega_crawl.py \
+    tools/test_cart_probe.py \
+    tools/test_scheduler.py \
+    tools/test_runner.py \
+    tools/test_validation_cache.py \
+    tools/test_notifier.py
+do
+    echo ""
+    python "$TEST"
+    if [ $? -ne 0 ]; then
+        echo "❌ $TEST FALLIDO"
+        FAILED=$((FAILED + 1))
+    else
+        echo "✅ $TEST PASADO"
+    fi
+done
+
+# 3. Test Stripe (TS)
 echo ""
 npx tsx web/tests/stripe.test.ts
 STATUS=$?
@@ -37,7 +64,7 @@ else
     FAILED=$((FAILED + 1))
 fi
 
-# 3. Test Auth (TS)
+# 4. Test Auth (TS)
 echo ""
 npx tsx web/tests/auth.test.ts
 STATUS=$?
@@ -48,7 +75,7 @@ else
     FAILED=$((FAILED + 1))
 fi
 
-# 4. Test Landing (TS)
+# 5. Test Landing (TS)
 echo ""
 npx tsx web/tests/landing.test.ts
 STATUS=$?
@@ -59,6 +86,17 @@ else
     FAILED=$((FAILED + 1))
 fi
 
+# 6. Test Ledger (TS contra un ledger de core/database.py)
+echo ""
+npx tsx web/tests/ledger.test.ts
+STATUS=$?
+if [ $STATUS -eq 0 ]; then
+    echo "✅ TEST LEDGER PASADO"
+else
+    echo "❌ TEST LEDGER FALLIDO (Code: $STATUS)"
+    FAILED=$((FAILED + 1))
+fi
+
 echo ""
 echo "=================================="
 if [ $FAILED -eq 0 ]; then
@@ -0,0 +1,126 @@
+"""
+Tests del auto-tuner AIMD (core/autotuner.py): ajuste por ventana de
+requests, techo de concurrencia tras 429/403, tope de bytes por respuesta
+y persistencia en el SharedStateStore.
+
+    python tools/test_autotuner.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+import core.autotuner as autotuner
+from core.autotuner import MAX_RESPONSE_BYTES, AutoTuner
+from core.shared_state import SharedStateStore
+
+
+def tuner(**kwargs) -> AutoTuner:
+    kwargs.setdefault("page_bounds", (20, 100))
+    kwargs.setdefault("concurrency_bounds", (1, 4))
+    kwargs.setdefault("window", 10)
+    return AutoTuner("test", **kwargs)
+
+
+def window(t: AutoTuner, status: int = 200, latency: float = 0.5, nbytes: int = 0, count: int = None):
+    """Cerrar una ventana entera con el mismo request."""
+    for _ in range(count or t.window_size):
+        t.record(status, latency, nbytes)
+
+
+def test_adjusts_only_when_window_closes():
+    t = tuner(page_size=40)
+    window(t, count=9)
+    assert (t.page_size, t.concurrency) == (40, 1)
+    t.record(200, 0.5)
+    assert (t.page_size, t.concurrency) == (50, 2)
+
+
+def test_additive_increase_up_to_bounds():
+    t = tuner(page_size=20)
+    for _ in range(20):
+        window(t)
+    assert (t.page_size, t.concurrency) == (100, 4)
+
+
+def test_throttling_halves_concurrency_and_remembers_ceiling():
+    t = tuner(concurrency=4, page_size=60)
+    window(t, count=9)
+    t.record(429, 0.5)
+    # Un solo 429 en la ventana alcanza; la página no se toca
+    assert (t.page_size, t.concurrency, t.ceiling) == (60, 2, 4)
+
+    for _ in range(5):
+        window(t)
+    assert t.concurrency == 3
+
+    # Vencido el techo, vuelve a subir hasta el máximo
+    t.ceiling_at = time.time() - autotuner.CEILING_TTL - 1
+    window(t)
+    assert t.concurrency == 4 and t.ceiling is None
+
+
+def test_errors_or_slow_windows_shrink_multiplicatively():
+    t = tuner(concurrency=3, page_size=100)
+    window(t, status=503, count=2)
+    window(t, count=8)
+    assert (t.page_size, t.concurrency) == (75, 2)
+
+    window(t, latency=autotuner.LATENCY_SLOW + 1)
+    assert (t.page_size, t.concurrency) == (56, 1)
+    for _ in range(10):
+        window(t, status=0)
+    assert (t.page_size, t.concurrency) == (20, 1)
+
+
+def test_tolerated_errors_and_middle_latency_hold():
+    t = tuner(concurrency=2, page_size=50)
+    # 10% de errores no alcanza para achicar; latencia entre target y slow no crece
+    window(t, status=500, count=1)
+    window(t, latency=2.0, count=9)
+    assert (t.page_size, t.concurrency) == (50, 2)
+
+
+def test_page_growth_capped_by_response_bytes():
+    t = tuner(page_size=20, page_bounds=(10, 500))
+    per_item = 40_000
+    t.record_items(20 * t.window_size)
+    window(t, nbytes=20 * per_item)
+    assert t.bytes_per_item == per_item
+    for _ in range(20):
+        window(t)
+    assert t.page_size == MAX_RESPONSE_BYTES // per_item
+
+
+def test_unpaginated_target_tunes_only_concurrency():
+    t = tuner(page_bounds=None)
+    window(t)
+    assert (t.page_size, t.concurrency) == (None, 2)
+    window(t, status=500)
+    assert (t.page_size, t.concurrency) == (None, 1)
+
+
+def test_learned_tuning_persists_in_shared_state():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SharedStateStore(os.path.join(tmp, "state.db"))
+        t = tuner(page_size=40, concurrency=3, store=store)
+        window(t)
+        window(t, status=429)
+        # Otro proceso del mismo target arranca donde quedó (y respeta el techo)
+        other = tuner(store=SharedStateStore(os.path.join(tmp, "state.db")))
+        assert (other.page_size, other.concurrency, other.ceiling) == (50, 2, 4)
+        window(other)
+        assert other.concurrency == 3
+        window(other)
+        assert other.concurrency == 3
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,126 @@
+"""
+Tests de las baselines en streaming (core/baselines.py) y su persistencia
+en el ledger (price_baselines).
+
+    python tools/test_baselines.py
+"""
+
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+from core.base_sniffer import Product
+from core.baselines import MIN_SAMPLES, Baseline, BaselineStore
+from core.database import Database
+
+MEDIAN = 200_000
+SIGMA = 0.3
+
+
+def lognormal_prices(seed: int, count: int, median: float = MEDIAN) -> list[float]:
+    rng = random.Random(seed)
+    return [math.exp(rng.gauss(math.log(median), SIGMA)) for _ in range(count)]
+
+
+def observed(prices) -> Baseline:
+    baseline = Baseline("c", "")
+    for price in prices:
+        baseline.observe(price)
+    return baseline
+
+
+def product(pid: str, price: float, brand: str = "Samsung", category: str = "celulares") -> Product:
+    return Product(id=pid, name=f"Producto {pid}", brand=brand, current_price=price,
+                   list_price=price, category=category, source="test")
+
+
+def test_converges_to_batch_median_and_mad():
+    prices = lognormal_prices(3, 3000)
+    baseline = observed(prices)
+    logs = [math.log(p) for p in prices]
+    median = statistics.median(logs)
+    mad = statistics.median(abs(x - median) for x in logs)
+    assert abs(baseline.median / math.exp(median) - 1) < 0.05
+    assert abs(baseline.log_mad / mad - 1) < 0.25
+
+
+def test_scale_invariant():
+    """En log-precio: ×1000 corre la mediana, no cambia el MAD ni los z."""
+    prices = lognormal_prices(4, 500)
+    a, b = observed(prices), observed(p * 1000 for p in prices)
+    assert abs(b.log_median - a.log_median - math.log(1000)) < 1e-9
+    assert abs(b.log_mad - a.log_mad) < 1e-9
+    assert abs(a.score(prices[0]) - b.score(prices[0] * 1000)) < 1e-9
+
+
+def test_single_outlier_moves_median_one_step():
+    baseline = observed(lognormal_prices(5, 1000))
+    before = baseline.log_median
+    baseline.observe(1.0)
+    assert before - baseline.log_median <= max(1 / math.sqrt(baseline.n), 0.02) * baseline.log_mad + 1e-12
+    assert baseline.score(1.0) < -10
+
+
+def test_follows_drift():
+    """Con el piso de paso, sigue a la inflación aun con n grande."""
+    baseline = observed(lognormal_prices(6, 5000))
+    for price in lognormal_prices(7, 2000, median=MEDIAN * 1.3):
+        baseline.observe(price)
+    assert abs(baseline.median / (MEDIAN * 1.3) - 1) < 0.05
+
+
+def test_non_positive_prices_ignored():
+    baseline = observed([0, -5, 100])
+    assert baseline.n == 1 and abs(baseline.median - 100) < 1e-9
+
+
+def test_stage_does_not_touch_store_until_apply():
+    store = BaselineStore()
+    staged = store.stage("s", [product(str(i), 1000.0 + i) for i in range(MIN_SAMPLES)])
+    assert store.lookup("s", "celulares", "Samsung") is None
+    assert staged[("celulares", "samsung")].n == MIN_SAMPLES
+    assert staged[("celulares", "")].n == MIN_SAMPLES
+    store.apply("s", staged)
+    assert store.lookup("s", "celulares", "SAMSUNG ").brand == "samsung"
+
+
+def test_lookup_falls_back_to_category_until_brand_is_mature():
+    store = BaselineStore()
+    store.apply("s", store.stage("s", [product(str(i), 1000.0, brand="LG") for i in range(MIN_SAMPLES)]))
+    store.apply("s", store.stage("s", [product("x", 1000.0, brand="Samsung")]))
+    assert store.lookup("s", "celulares", "Samsung").brand == ""
+    assert store.lookup("s", "celulares", "LG").brand == "lg"
+    assert store.lookup("s", "tv", "LG") is None
+    assert store.lookup("otro", "celulares", "LG") is None
+
+
+def test_ledger_persists_baselines_and_observes_only_new_prices():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ledger.db")
+        prices = lognormal_prices(8, MIN_SAMPLES)
+        products = [product(str(i), price) for i, price in enumerate(prices)]
+        db = Database(path)
+        db.save_products(products)
+        # Sin cambios de precio: no se vuelven a observar
+        db.save_products(products)
+        baseline = db.get_baselines("test", products[:1])["0"]
+        assert baseline.n == MIN_SAMPLES and baseline.brand == "samsung"
+
+        # Otro proceso (o un reinicio) lee lo mismo de price_baselines
+        reloaded = Database(path).get_baselines("test", products[:1])["0"]
+        assert (reloaded.n, reloaded.log_median, reloaded.log_mad) == (
+            baseline.n, baseline.log_median, baseline.log_mad,
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,114 @@
+"""
+Tests del tier HTTP del validador de Frávega v2 (CartProbe) con un
+HttpClient falso: qué errores pasan al siguiente seller y la limpieza
+del checkout.
+
+    python tools/test_cart_probe.py
+"""
+
+import importlib.util
+import os
+import sys
+import unittest
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+from core.http_client import ClientError, NetworkError, RateLimitError
+
+# El v2 hace sys.exit() al importarse sin Playwright
+if importlib.util.find_spec("playwright") is None:
+    if __name__ == "__main__":
+        print("⏭️ Playwright no instalado: tests salteados")
+        sys.exit(0)
+    raise unittest.SkipTest("Playwright no instalado")
+
+from targets.fravega.sniffer_fravega_v2 import PROBE_SELLERS, CartProbe
+
+SKU = "123"
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        if isinstance(self.data, Exception):
+            raise self.data
+        return self.data
+
+
+class FakeCheckoutClient:
+    """put() contesta según el seller; registra cada (seller, quantity)."""
+
+    def __init__(self, by_seller: dict):
+        self.by_seller = by_seller
+        self.puts: list[tuple[str, int]] = []
+
+    def put(self, url, json=None, cookies=None):
+        item = json["orderItems"][0]
+        self.puts.append((item["seller"], item["quantity"]))
+        if item["quantity"] == 0:
+            return FakeResponse({"items": []})
+        reply = self.by_seller.get(item["seller"], ClientError("Error 400", status_code=400))
+        if isinstance(reply, (ClientError, RateLimitError, NetworkError)):
+            raise reply
+        return FakeResponse(reply)
+
+
+def in_cart(price: float, availability: str = "available") -> dict:
+    return {"items": [{"id": SKU, "sellingPrice": int(price * 100), "availability": availability}]}
+
+
+def test_wrong_seller_tries_next_and_item_is_removed():
+    fravega = PROBE_SELLERS[1]
+    client = FakeCheckoutClient({fravega: in_cart(1000)})
+    probe = CartProbe(client, checkout_id="chk")
+    check = probe.check(SKU, expected_price=1000)
+    assert (check.ok, check.razon, check.price) == (True, "validado_ok", 1000)
+    assert client.puts == [(PROBE_SELLERS[0], 1), (fravega, 1), (fravega, 0)]
+    # El seller que funcionó se prueba primero la próxima vez
+    client.puts.clear()
+    probe.check(SKU, expected_price=1000)
+    assert client.puts == [(fravega, 1), (fravega, 0)]
+
+
+def test_sold_out_is_conclusive_and_removed():
+    client = FakeCheckoutClient({PROBE_SELLERS[0]: in_cart(1000, availability="withoutStock")})
+    check = CartProbe(client, checkout_id="chk").check(SKU)
+    assert (check.ok, check.razon) == (False, "stock_agotado")
+    assert client.puts[-1] == (PROBE_SELLERS[0], 0)
+
+
+def test_broken_payload_tries_next_seller():
+    client = FakeCheckoutClient({
+        PROBE_SELLERS[0]: ValueError("no es JSON"),
+        PROBE_SELLERS[1]: ["no", "es", "un", "dict"],
+        PROBE_SELLERS[2]: in_cart(500),
+    })
+    check = CartProbe(client, checkout_id="chk").check(SKU, expected_price=400)
+    assert (check.ok, check.razon) == (False, "precio_carrito_mayor")
+    assert [seller for seller, _ in client.puts] == list(PROBE_SELLERS) + [PROBE_SELLERS[2]]
+
+
+def test_rate_limit_and_network_errors_stop_the_probe():
+    """Regresión: un 429 o un error de red seguía con los otros sellers."""
+    for error in (RateLimitError("429", retry_after=30), NetworkError("timeout")):
+        client = FakeCheckoutClient({PROBE_SELLERS[0]: error, PROBE_SELLERS[1]: in_cart(1000)})
+        check = CartProbe(client, checkout_id="chk").check(SKU)
+        assert check.ok is None and check.razon.startswith("error")
+        assert client.puts == [(PROBE_SELLERS[0], 1)]
+
+
+def test_item_not_added_leaves_checkout_untouched():
+    client = FakeCheckoutClient({seller: {"items": []} for seller in PROBE_SELLERS})
+    check = CartProbe(client, checkout_id="chk").check(SKU)
+    assert (check.ok, check.razon) == (None, "item_no_agregado")
+    assert all(quantity == 1 for _, quantity in client.puts)
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,155 @@
+"""
+Tests del ledger (core/database.py) sobre un SQLite temporal.
+
+    python tools/test_database.py
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+from core.base_sniffer import Product
+from core.database import Database
+
+
+def product(source: str, pid: str, price: float, name: str = "Celular Samsung Galaxy A54 128GB",
+            **kwargs) -> Product:
+    return Product(id=pid, name=name, brand="Samsung", current_price=price,
+                   list_price=kwargs.pop("list_price", price), category="celulares",
+                   source=source, **kwargs)
+
+
+def test_market_refs_do_not_wait_for_writers():
+    """Regresión: get_market_refs matcheaba cada producto con el lock de escritura tomado."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "ledger.db"))
+        db.save_products([product("cetrogar", "c1", 500_000), product("oncity", "o1", 520_000)])
+        db.refresh_market(force=True)
+
+        refs = {}
+        with db._write_lock:
+            reader = threading.Thread(
+                target=lambda: refs.update(db.get_market_refs("fravega", [product("fravega", "f1", 300_000)]))
+            )
+            reader.start()
+            reader.join(timeout=5)
+            assert not reader.is_alive()
+
+        ref = refs["f1"]
+        assert ref.min_price == 500_000 and ref.min_source == "cetrogar"
+        assert ref.median_price == 510_000 and ref.sources == 2
+
+
+def test_sold_out_leaves_market_refs_and_gaps():
+    """Regresión: los agotados no se guardaban y el mercado seguía viendo su precio viejo."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "ledger.db"))
+        db.save_products([product("fravega", "f1", 400_000), product("cetrogar", "c1", 500_000)])
+        assert [gap["min_source"] for gap in db.find_arbitrage()] == ["fravega"]
+
+        db.save_products([product("fravega", "f1", 400_000, in_stock=False)])
+        assert db.find_arbitrage() == []
+        db.refresh_market(force=True)
+        ref = db.get_market_refs("oncity", [product("oncity", "o1", 450_000)])["o1"]
+        assert (ref.min_source, ref.sources) == ("cetrogar", 1)
+
+
+def test_sold_out_without_price_keeps_last_price():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "ledger.db"))
+        db.save_products([product("fravega", "f1", 400_000), product("cetrogar", "c1", 500_000)])
+        # Sin stock y sin precio publicado; un producto nunca visto se ignora
+        db.save_products([product("fravega", "f1", 0.0, in_stock=False),
+                          product("fravega", "f2", 0.0, in_stock=False)])
+        with db._connect() as conn:
+            rows = conn.execute(
+                "SELECT product_id, current_price, in_stock FROM products WHERE source = 'fravega'"
+            ).fetchall()
+        assert [tuple(row) for row in rows] == [("f1", 400_000, 0)]
+        assert db.find_arbitrage() == []
+
+
+def full_gaps(db: Database) -> dict[str, tuple]:
+    """Brechas recalculadas de cero desde products + product_matches (oráculo)."""
+    best: dict[str, dict[str, float]] = {}
+    with db._connect() as conn:
+        for key, source, price in conn.execute("""
+            SELECT m.match_key, p.source, p.current_price
+            FROM products p JOIN product_matches m
+              ON m.source = p.source AND m.product_id = p.product_id
+            WHERE p.in_stock = 1 AND p.current_price > 0
+        """):
+            by_source = best.setdefault(key, {})
+            by_source[source] = min(price, by_source.get(source, price))
+    gaps = {}
+    for key, by_source in best.items():
+        low, high = min(by_source, key=by_source.get), max(by_source, key=by_source.get)
+        if len(by_source) > 1 and by_source[high] > by_source[low]:
+            gaps[key] = (by_source[low], low, by_source[high], high, len(by_source))
+    return gaps
+
+
+def stored_gaps(db: Database) -> dict[str, tuple]:
+    with db._connect() as conn:
+        return {
+            row["match_key"]: (row["min_price"], row["min_source"], row["max_price"],
+                               row["max_source"], row["sources"])
+            for row in conn.execute("SELECT * FROM arbitrage_gaps")
+        }
+
+
+def test_incremental_gaps_match_full_recompute():
+    """Cada save toca solo los grupos afectados; el resultado es el de recalcular todo."""
+    rng = random.Random(16)
+    stores = ["fravega", "cetrogar", "oncity"]
+    catalog = {
+        (store, f"{store}-{i}"): product(store, f"{store}-{i}", 0, name=f"Motorola Moto G{10 + i % 8} 128GB")
+        for store in stores for i in range(12)
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "ledger.db"))
+        for _ in range(15):
+            for store in stores:
+                page = []
+                for (source, _), p in catalog.items():
+                    if source != store or rng.random() < 0.4:
+                        continue
+                    roll = rng.random()
+                    if roll < 0.5 or not p.current_price:
+                        p.current_price = round(rng.uniform(100_000, 900_000), 2)
+                    elif roll < 0.7:
+                        p.in_stock = not p.in_stock
+                    elif roll < 0.8:
+                        # Cambia de grupo: el grupo viejo también se recalcula
+                        p.name = f"Motorola Moto G{rng.randrange(10, 18)} 128GB"
+                    page.append(p)
+                db.save_products(page)
+            assert stored_gaps(db) == full_gaps(db)
+        assert len(full_gaps(db)) > 3
+
+
+def test_gaps_backfilled_once_for_old_ledgers():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ledger.db")
+        db = Database(path)
+        db.save_products([product("fravega", "f1", 400_000)])
+        db.save_products([product("cetrogar", "c1", 500_000)])
+        expected = stored_gaps(db)
+        with db._connect() as conn:
+            conn.execute("DELETE FROM arbitrage_gaps")
+            conn.commit()
+
+        assert [gap["gap_pct"] for gap in Database(path).find_arbitrage()] == [25.0]
+        assert stored_gaps(db) == expected
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
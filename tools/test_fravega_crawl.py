@@ -0,0 +1,117 @@
+"""
+Tests de la paginación adaptativa de Frávega v2 (iter_product_pages):
+cursor de la cola en items con page_size variable y cesión de la cabeza
+vía on_page_scanned.
+
+    python tools/test_fravega_crawl.py
+"""
+
+import importlib.util
+import logging
+import os
+import random
+import sys
+import unittest
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+from core.base_sniffer import Product
+
+# El v2 hace sys.exit() al importarse sin Playwright
+if importlib.util.find_spec("playwright") is None:
+    if __name__ == "__main__":
+        print("⏭️ Playwright no instalado: tests salteados")
+        sys.exit(0)
+    raise unittest.SkipTest("Playwright no instalado")
+
+from targets.fravega.sniffer_fravega_v2 import FravegaSnifferV2
+
+CATEGORY = "celulares"
+
+
+class CatalogSniffer(FravegaSnifferV2):
+    """Solo el estado de la paginación: catálogo sintético, page_size a mano."""
+    
+    page_size = 20
+    
+    def __init__(self, total: int):
+        self.logger = logging.getLogger("test_fravega_crawl")
+        self.catalog = [{"id": str(i)} for i in range(total)]
+        self.offsets: list[int] = []
+        self._cursors, self._totals, self._head_streak, self._last_offsets = {}, {}, {}, {}
+    
+    def _fetch_page(self, category, offset, size, sorting):
+        self.offsets.append(offset)
+        return self.catalog[offset:offset + size], len(self.catalog)
+    
+    def cycle(self, head_unchanged: bool = False) -> list[dict]:
+        pages = list(self.iter_product_pages(CATEGORY))
+        assert len(pages) == 1
+        products = [Product(id=raw["id"], name=raw["id"], current_price=100) for raw in pages[0]]
+        previous = {p.id: p.current_price if head_unchanged else 90 for p in products}
+        self.on_page_scanned(CATEGORY, products, previous)
+        return pages[0]
+
+
+def test_tail_sweep_covers_catalog_with_drifting_page_size():
+    """El auto-tuner cambia page_size entre ciclos: la cola no saltea ni repite items."""
+    rng = random.Random(17)
+    sniffer = CatalogSniffer(total=437)
+    seen: list[str] = []
+    for _ in range(200):
+        sniffer.page_size = rng.choice([20, 30, 50])
+        page = sniffer.cycle()
+        if sniffer._last_offsets[CATEGORY]:
+            seen.extend(raw["id"] for raw in page)
+        if sniffer._cursors.get(CATEGORY, 0) >= 437:
+            break
+    ids = [int(pid) for pid in seen]
+    # En orden, sin repetir; lo que quedó atrás del cursor estaba en la cabeza
+    assert ids == sorted(set(ids))
+    assert set(range(50, 437)) <= set(ids)
+
+
+def test_head_yields_to_tail_every_max_streak_cycles():
+    sniffer = CatalogSniffer(total=100)
+    for _ in range(2 * (FravegaSnifferV2.MAX_HEAD_STREAK + 1)):
+        sniffer.cycle()
+    streak = [0] * FravegaSnifferV2.MAX_HEAD_STREAK
+    assert sniffer.offsets == streak + [20] + streak + [40]
+
+
+def test_unchanged_head_sends_next_cycle_to_tail():
+    sniffer = CatalogSniffer(total=100)
+    sniffer.cycle(head_unchanged=True)
+    sniffer.cycle()
+    sniffer.cycle(head_unchanged=True)
+    sniffer.cycle()
+    assert sniffer.offsets == [0, 20, 0, 40]
+
+
+def test_cursor_resets_when_past_total_or_inside_head():
+    sniffer = CatalogSniffer(total=60)
+    for _ in range(3):
+        sniffer.cycle(head_unchanged=True)
+        sniffer.cycle()
+    assert sniffer.offsets == [0, 20, 0, 40, 0, 20]
+    # La cabeza crece hasta tapar el cursor (60): vuelve al final de la cabeza
+    sniffer.page_size = 50
+    sniffer._cursors[CATEGORY] = 40
+    sniffer.cycle(head_unchanged=True)
+    sniffer.cycle()
+    assert sniffer.offsets[-2:] == [0, 50]
+
+
+def test_small_catalog_stays_on_head():
+    sniffer = CatalogSniffer(total=15)
+    for _ in range(5):
+        sniffer.cycle(head_unchanged=True)
+    assert sniffer.offsets == [0] * 5
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,122 @@
+"""
+Tests de la detección vectorizada (core/glitch_detector.py + candidates()
+de core/glitch_rules.py): mismo resultado que el detect_glitch() escalar
+sobre páginas aleatorias con precios en los bordes de cada regla.
+
+    python tools/test_glitch_detector.py
+"""
+
+import math
+import os
+import random
+import sys
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+from core.base_sniffer import BaseSniffer, Product
+from core.baselines import Baseline
+from core.database import Database
+from core.glitch_detector import PriceColumns
+from core.glitch_rules import DEFAULT_RULES_PATH, GlitchRuleEngine
+
+CATEGORIES = ("celulares", "computacion/notebooks", "pequenos-electro")
+# Descuentos / caídas justo en los umbrales del JSON (y a ±redondeo)
+EDGE_PCTS = (40, 60, 50, 85, 39.95, 40.05, 59.949, 49.999999, 85.0000001)
+SEEDS = range(20)
+PAGE = 500
+
+
+class Sniffer(BaseSniffer):
+    def parse_product(self, raw: dict) -> Product:
+        raise NotImplementedError
+
+
+def make_sniffer(target: str) -> Sniffer:
+    sniffer = type(f"{target}Sniffer", (Sniffer,), {"TARGET_NAME": target})
+    return sniffer(ledger=Database(":memory:"), rules=GlitchRuleEngine(DEFAULT_RULES_PATH))
+
+
+def random_page(rng: random.Random) -> tuple[list[Product], dict[str, float], dict[str, Baseline]]:
+    products, previous, baselines = [], {}, {}
+    for i in range(PAGE):
+        pct = rng.choice(EDGE_PCTS) if rng.random() < 0.5 else rng.uniform(-20, 99)
+        list_price = rng.choice([0.0, 0.0, rng.uniform(100, 3_000_000), 50_000.0, 1000.0])
+        if list_price > 0:
+            current = list_price * (1 - pct / 100)
+        else:
+            current = rng.choice([rng.uniform(-10, 2_000_000), 999.99, 1000.0, 499.0, 0.0])
+        current = rng.choice([current, round(current), round(current, 2)])
+        pid = f"p{i}"
+        products.append(Product(
+            id=pid, name=f"Producto {i}", brand=rng.choice(["Samsung", "", "LG"]),
+            current_price=current, list_price=list_price,
+            discount_pct=rng.choice([0.0, round(pct, 1)]),
+            category=rng.choice(CATEGORIES), source="test",
+        ))
+        roll = rng.random()
+        if roll < 0.4 and current > 0:
+            drop = rng.choice(EDGE_PCTS + (rng.uniform(-500, 99),))
+            previous[pid] = current / (1 - drop / 100) if drop < 100 else current * 5
+        elif roll < 0.5:
+            previous[pid] = rng.choice([0.0, rng.uniform(1, 1_000_000)])
+        if rng.random() < 0.3 and current > 0:
+            log_mad = rng.uniform(0.005, 0.5)
+            z = rng.choice([-4.0, -4.0000001, -3.9999999, rng.uniform(-10, 3)])
+            scale = Baseline("c", "b", log_mad=log_mad).scale
+            baselines[pid] = Baseline(
+                products[-1].category, "", n=50,
+                log_median=math.log(current) - z * scale, log_mad=log_mad,
+            )
+    return products, previous, baselines
+
+
+def scalar(sniffer, products, previous, baselines):
+    glitches = [
+        sniffer.detect_glitch(p, previous.get(p.id, 0.0), baselines.get(p.id)) for p in products
+    ]
+    return [glitch for glitch in glitches if glitch]
+
+
+def signature(glitches) -> list[tuple]:
+    return [(g.product.id, g.reason, g.severity, g.drop_pct) for g in glitches]
+
+
+def check_equivalence(target: str) -> int:
+    sniffer = make_sniffer(target)
+    hits = 0
+    for seed in SEEDS:
+        products, previous, baselines = random_page(random.Random(seed))
+        expected = scalar(sniffer, products, previous, baselines)
+        assert signature(sniffer.detect_glitches(products, previous, baselines)) == signature(expected), seed
+        hits += len(expected)
+    return hits
+
+
+def test_default_rules_match_scalar_path():
+    assert check_equivalence("tienda-sin-perfil") > 0
+
+
+def test_fravega_prepend_rules_match_scalar_path():
+    assert check_equivalence("fravega") > 0
+
+
+def test_each_rule_mask_is_a_superset_of_its_hits():
+    """La máscara de cada regla (no solo el OR) cubre todos sus hits escalares."""
+    engine = GlitchRuleEngine(DEFAULT_RULES_PATH)
+    products, previous, baselines = random_page(random.Random(1234))
+    products = [p for p in products if p.category == "celulares"]
+    cols = PriceColumns.from_products(products, previous, baselines)
+    for profile in ("default", "fravega"):
+        for rule in engine.ruleset(profile, "celulares").rules:
+            mask = rule.candidates(cols)
+            for i, p in enumerate(products):
+                if rule.check(p, previous.get(p.id, 0.0), baselines.get(p.id)):
+                    assert mask[i], (profile, rule.name, p)
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
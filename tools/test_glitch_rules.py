@@ -0,0 +1,190 @@
+"""
+Tests del motor de reglas (core/glitch_rules.py): hot reload del JSON,
+overrides por categoría y la migración de las heurísticas hardcodeadas
+de Frávega al perfil "fravega" (prepend) de data/glitch_rules.json.
+
+    python tools/test_glitch_rules.py
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+from core.base_sniffer import Product
+from core.glitch_rules import DEFAULT_RULES_PATH, GlitchRuleEngine
+
+
+# --- Heurísticas anteriores a data/glitch_rules.json (oráculo) ---
+
+def legacy_fravega(current_price, previous_price, list_price):
+    """detect_price_glitch_fast() de sniffer_fravega.py, tal cual."""
+    if current_price <= 0:
+        return True, "Precio Inválido (0 o menor)"
+    if list_price and current_price > list_price * 1.5:
+        return True, "Precio Inflado Sospechoso"
+    if previous_price and previous_price > 0:
+        drop_percent = ((previous_price - current_price) / previous_price) * 100
+        if drop_percent > 85:
+            return True, f"Glitch probable: Caída del {drop_percent:.1f}%"
+        increase_percent = ((current_price - previous_price) / previous_price) * 100
+        if increase_percent > 400:
+            return True, f"Aumento masivo sospechoso: {increase_percent:.1f}%"
+    if current_price < 500 and list_price and list_price > 50000:
+        return True, "Precio ridículamente bajo respecto a lista"
+    return False, "Sano"
+
+
+def legacy_base(product, previous_price):
+    """BaseSniffer.detect_glitch() anterior: (razón, severidad) o None."""
+    if product.list_price > 0:
+        discount = product.calculated_discount
+        if discount >= 40:
+            return (f"Descuento extremo: {discount}% off (lista: ${product.list_price:,.0f})",
+                    "high" if discount >= 60 else "medium")
+    if 0 < product.current_price < 1000:
+        return f"Precio sospechosamente bajo: ${product.current_price:,.0f}", "critical"
+    if previous_price > 0 and product.current_price > 0:
+        drop = (1 - product.current_price / previous_price) * 100
+        if drop >= 50:
+            return f"Caída del {drop:.0f}% vs precio anterior (${previous_price:,.0f})", "high"
+    return None
+
+
+def legacy_fravega_sniffer(product, previous_price):
+    """FravegaSniffer.detect_glitch() anterior: legacy primero, después el base."""
+    is_glitch, reason = legacy_fravega(product.current_price, previous_price, product.list_price)
+    if is_glitch:
+        # El chequeo original ("ridículo" in reason) nunca matcheaba: ahora es critical
+        return reason, "critical" if reason.startswith("Precio ridículamente") else "high"
+    return legacy_base(product, previous_price)
+
+
+def random_product(rng: random.Random, i: int) -> tuple[Product, float]:
+    list_price = rng.choice([0.0, rng.uniform(100, 3_000_000), rng.uniform(50_001, 80_000)])
+    current = rng.choice([
+        rng.uniform(-100, 2_000_000), rng.uniform(1, 1200), rng.uniform(1, 600),
+        list_price * rng.uniform(0.1, 2.0),
+    ])
+    previous = rng.choice([0.0, current * rng.uniform(0.1, 8), current / rng.uniform(0.01, 1)])
+    return Product(id=f"p{i}", name=f"Producto {i}", current_price=current,
+                   list_price=list_price, category="celulares", source="fravega"), previous
+
+
+def write_rules(path: str, config: dict, mtime: float) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    os.utime(path, (mtime, mtime))
+
+
+def rules_config(min_pct: float, categories: dict = None) -> dict:
+    return {
+        "default": {"rules": [
+            {"name": "descuento", "type": "discount", "min_pct": min_pct, "severity": "medium"},
+        ]},
+        "targets": {"t": {"categories": categories or {}}},
+    }
+
+
+def test_fravega_profile_reproduces_legacy_heuristics():
+    engine = GlitchRuleEngine(DEFAULT_RULES_PATH)
+    rules = engine.ruleset("fravega", "celulares")
+    rng = random.Random(7)
+    hits = 0
+    for i in range(5000):
+        product, previous = random_product(rng, i)
+        glitch = rules.evaluate(product, previous)
+        expected = legacy_fravega_sniffer(product, previous)
+        assert (glitch.reason, glitch.severity) == expected if glitch else expected is None, (
+            product, previous, glitch, expected,
+        )
+        hits += glitch is not None
+    assert 0 < hits < 5000
+
+
+def test_default_profile_reproduces_legacy_base_detector():
+    engine = GlitchRuleEngine(DEFAULT_RULES_PATH)
+    rules = engine.ruleset("otra-tienda", "celulares")
+    rng = random.Random(8)
+    for i in range(5000):
+        product, previous = random_product(rng, i)
+        glitch = rules.evaluate(product, previous)
+        expected = legacy_base(product, previous)
+        assert (glitch.reason, glitch.severity) == expected if glitch else expected is None
+
+
+def test_hot_reload_on_mtime_change():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules.json")
+        write_rules(path, rules_config(40), mtime=1000)
+        engine = GlitchRuleEngine(path, reload_interval=0)
+        product = Product(id="a", name="a", current_price=55, list_price=100)
+        assert engine.ruleset("t").evaluate(product) is not None
+
+        write_rules(path, rules_config(50), mtime=2000)
+        assert engine.ruleset("t").evaluate(product) is None
+        assert engine.ruleset("t").rules[0].min_pct == 50
+
+
+def test_invalid_file_keeps_previous_rules():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules.json")
+        write_rules(path, rules_config(40), mtime=1000)
+        engine = GlitchRuleEngine(path, reload_interval=0)
+        engine.ruleset("t").evaluate(Product(id="a", name="a", current_price=50, list_price=100))
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"default": {"rules": [{"name": "x", "type": "no-existe"}]}}')
+        os.utime(path, (2000, 2000))
+        assert not engine.reload()
+        assert engine.ruleset("t").rules[0].min_pct == 40
+        # Las stats sobreviven a los (intentos de) reload
+        assert engine.stats("t")[0]["hits"] == 1
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{no es json")
+        os.utime(path, (3000, 3000))
+        assert engine.ruleset("t").rules[0].min_pct == 40
+
+
+def test_invalid_file_fails_at_startup():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules.json")
+        write_rules(path, {"default": {"rules": [{"type": "discount"}]}}, mtime=1000)
+        try:
+            GlitchRuleEngine(path)
+            raise AssertionError("se esperaba ValueError")
+        except ValueError:
+            pass
+
+
+def test_category_override_longest_prefix_wins():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules.json")
+        write_rules(path, rules_config(40, {
+            "computacion": {"rules": {"descuento": {"min_pct": 50}}},
+            "computacion/notebooks": {"rules": {"descuento": {"min_pct": 60}}},
+        }), mtime=1000)
+        engine = GlitchRuleEngine(path)
+        assert engine.ruleset("t", "computacion/monitores").rules[0].min_pct == 50
+        assert engine.ruleset("t", "computacion/notebooks/gamer").rules[0].min_pct == 60
+        # Prefijo de categoría, no de string
+        assert engine.ruleset("t", "computacionales").rules[0].min_pct == 40
+
+
+def test_missing_file_uses_default_rules():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = GlitchRuleEngine(os.path.join(tmp, "no-existe.json"))
+        names = [rule.name for rule in engine.ruleset("fravega").rules]
+        assert names == ["descuento_extremo", "precio_absurdo", "caida_vs_anterior", "fuera_de_baseline"]
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,139 @@
+"""
+Tests del matching cross-store (core/matching.py): normalización, EAN,
+blocking y vetos, y su persistencia en product_matches.
+
+    python tools/test_matching.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+import core.matching as matching
+from core.base_sniffer import Product
+from core.database import Database
+from core.matching import ProductMatcher, tokenize
+
+
+def indexed(matcher: ProductMatcher, source: str, pid: str, name: str, brand: str = "", ean=None):
+    record = matcher.match(source, pid, name, brand, ean, now=1)
+    matcher.add(record)
+    return record
+
+
+def test_tokenize_drops_noise_and_joins_units():
+    assert tokenize('Smart TV Samsung 55" UHD 4K') == {"samsung", "55", "uhd", "4k"}
+    assert tokenize("Celular Motorola G34 128 GB Azul") == {"motorola", "g34", "128gb"}
+    assert tokenize("Heladera Drean 277 Lts") == {"heladera", "drean", "277lts"}
+
+
+def test_ean_wins_over_names():
+    matcher = ProductMatcher()
+    a = indexed(matcher, "fravega", "1", "Celular Samsung A54", ean="07791234567890")
+    b = indexed(matcher, "cetrogar", "9", "Samsung Galaxy A-54 negro", ean="7791234567890")
+    assert a.match_key == b.match_key == "ean:7791234567890"
+    assert a.method == b.method == "ean"
+    # EAN corto o no numérico: no cuenta
+    assert indexed(matcher, "oncity", "x", "Celular Samsung A54", ean="123").method != "ean"
+
+
+def test_fuzzy_match_across_stores():
+    matcher = ProductMatcher()
+    a = indexed(matcher, "fravega", "1", 'Notebook Lenovo IdeaPad 3 15.6" I5 8GB 512GB', "Lenovo")
+    b = indexed(matcher, "cetrogar", "2", "NOTEBOOK LENOVO IDEAPAD 3 15.6 I5 8 GB 512 GB")
+    assert a.method == "new" and b.method == "fuzzy"
+    assert b.match_key == a.match_key
+
+
+def test_fuzzy_prefers_ean_group_on_ties():
+    matcher = ProductMatcher()
+    indexed(matcher, "fravega", "1", "Motorola Moto G34 128GB")
+    ean = indexed(matcher, "oncity", "2", "Motorola Moto G34 128GB", ean="7790000000001")
+    assert indexed(matcher, "cetrogar", "3", "Motorola Moto G34 128GB").match_key == ean.match_key
+
+
+def test_vetoes_on_different_model_or_size():
+    """Regresión: A34 matcheaba con A54 (y 256GB con 128GB) por compartir la capacidad."""
+    matcher = ProductMatcher()
+    indexed(matcher, "fravega", "1", "Smart TV Samsung 55 UHD 4K Crystal", "Samsung")
+    indexed(matcher, "fravega", "2", "Celular Samsung Galaxy A54 128GB", "Samsung")
+    assert indexed(matcher, "cetrogar", "3", "Smart TV Samsung 50 UHD 4K Crystal", "Samsung").method == "new"
+    assert indexed(matcher, "cetrogar", "4", "Celular Samsung Galaxy A34 128GB", "Samsung").method == "new"
+    assert indexed(matcher, "cetrogar", "5", "Celular Samsung Galaxy A54 256GB", "Samsung").method == "new"
+    # Una medida que falta de un lado no veta: comparten 512gb
+    indexed(matcher, "fravega", "6", "Notebook Lenovo V15 I5 8GB 512GB", "Lenovo")
+    assert indexed(matcher, "cetrogar", "7", "Notebook Lenovo V15 I5 512GB SSD", "Lenovo").method == "fuzzy"
+
+
+def test_same_store_never_matches():
+    matcher = ProductMatcher()
+    a = indexed(matcher, "fravega", "1", "Motorola Moto G34 128GB")
+    b = indexed(matcher, "fravega", "2", "Motorola Moto G34 128GB")
+    assert b.method == "new" and b.product_id != a.product_id
+
+
+def test_blocking_compares_only_shared_blocks():
+    """Un producto se compara con su marca+modelo, no con el catálogo entero."""
+    matcher = ProductMatcher()
+    for i in range(50):
+        indexed(matcher, "fravega", f"m{i}", f"Motorola Moto G{i + 10} 128GB")
+        indexed(matcher, "fravega", f"s{i}", f"Samsung Galaxy A{i + 10} 64GB")
+
+    calls = []
+    real_similarity = matching.similarity
+    matching.similarity = lambda *args: calls.append(args) or real_similarity(*args)
+    try:
+        record = indexed(matcher, "cetrogar", "x", "Motorola Moto G34 256GB")
+    finally:
+        matching.similarity = real_similarity
+    # Bloques motorola|g34 (1 producto) y motorola|256gb (vacío): 1 de 100
+    assert len(calls) == 1
+    assert record.method == "new"
+
+
+def test_generic_blocks_are_skipped():
+    matcher = ProductMatcher(max_block_size=10)
+    for i in range(11):
+        indexed(matcher, "fravega", str(i), f"Cargador Genérico 20W Modelo{i}")
+    assert indexed(matcher, "cetrogar", "x", "Cargador Genérico 20W").method == "new"
+
+
+def test_ledger_persists_matches_and_reuses_them():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ledger.db")
+        products = [
+            Product(id="f1", name="Motorola Moto G34 128GB", current_price=300_000, source="fravega"),
+            Product(id="c1", name="MOTOROLA MOTO G34 128 GB", current_price=320_000, source="cetrogar"),
+        ]
+        db = Database(path)
+        # Un save por tienda, como los sniffers
+        db.save_products(products[:1])
+        db.save_products(products[1:])
+        with db._connect() as conn:
+            rows = conn.execute(
+                "SELECT source, match_key, method, seq FROM product_matches ORDER BY source"
+            ).fetchall()
+        assert [row["method"] for row in rows] == ["fuzzy", "new"]
+        assert rows[0]["match_key"] == rows[1]["match_key"]
+
+        # Precio nuevo, mismo nombre: no se reescribe la asignación
+        products[0].current_price = 290_000
+        db.save_products(products[:1])
+        with db._connect() as conn:
+            seqs = [row[0] for row in conn.execute("SELECT seq FROM product_matches ORDER BY source")]
+        assert seqs == [row["seq"] for row in rows]
+
+        # Otro proceso arranca con el índice de la tabla
+        other = Database(path)
+        other.refresh_market(force=True)
+        assert other.matcher.get("fravega", "f1").match_key == rows[0]["match_key"]
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
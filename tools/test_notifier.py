@@ -0,0 +1,200 @@
+"""
+Tests del TelegramNotifier (core/notifier.py) con reloj falso y un
+Telegram de mentira (sin red).
+
+    python tools/test_notifier.py
+"""
+
+import asyncio
+import os
+import sys
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+import core.notifier as notifier_module
+from core.http_client import ClientError, NetworkError, RateLimitError, ServerError
+from core.notifier import (
+    CHAT_INTERVAL, GROUP_INTERVAL, MAX_ATTEMPTS, MAX_MESSAGE_CHARS, TelegramNotifier,
+)
+
+
+class FakeClock:
+    """time.monotonic + asyncio.sleep: dormir solo adelanta el reloj."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += max(0.0, seconds)
+        await _real_sleep(0)
+
+
+class FakeAsyncio:
+    """El módulo asyncio, con sleep() del reloj falso."""
+
+    def __init__(self, clock: FakeClock):
+        self.sleep = clock.sleep
+
+    def __getattr__(self, name):
+        return getattr(asyncio, name)
+
+
+class FakeTelegram:
+    """Client que registra (t, texto) y lanza los errores programados."""
+
+    def __init__(self, clock: FakeClock, errors=()):
+        self.clock = clock
+        self.errors = list(errors)
+        self.calls: list[tuple[float, str]] = []
+        self.delivered: list[tuple[float, str]] = []
+
+    async def post(self, url, json):
+        self.calls.append((self.clock.now, json["text"]))
+        if self.errors:
+            error = self.errors.pop(0)
+            if error is not None:
+                raise error
+        self.delivered.append((self.clock.now, json["text"]))
+
+    async def close(self):
+        pass
+
+
+_real_sleep = asyncio.sleep
+
+
+def run(chat_id: str, scenario, errors=()):
+    """Correr `scenario(notifier)` con reloj falso. Retorna (notifier, telegram)."""
+    clock = FakeClock()
+    notifier_module.time = clock
+    notifier_module.asyncio = FakeAsyncio(clock)
+    try:
+        notifier = TelegramNotifier(token="123:test", chat_id=chat_id)
+        telegram = notifier.client = FakeTelegram(clock, errors)
+
+        async def main():
+            await scenario(notifier)
+            await notifier.close(timeout=5)
+
+        asyncio.run(main())
+        return notifier, telegram
+    finally:
+        notifier_module.time = __import__("time")
+        notifier_module.asyncio = asyncio
+
+
+def opportunity(n: int, name_len: int = 60, url_len: int = 160) -> dict:
+    return {
+        "name": f"Producto {n} " + "x" * name_len,
+        "current_price": 1_234_567 + n,
+        "gap_teorico": 35.5,
+        "margen_odiseo": 30.0 - n / 100,
+        "url": "https://www.fravega.com/p/" + "a" * url_len + f"-{n}",
+        "store": "Frávega",
+    }
+
+
+async def send_texts(notifier, texts):
+    for text in texts:
+        await notifier.send_message(text)
+
+
+def test_private_chat_pacing():
+    _, telegram = run("123", lambda n: send_texts(n, ["a", "b", "c"]))
+    assert [t for t, _ in telegram.delivered] == [0.0, CHAT_INTERVAL, 2 * CHAT_INTERVAL]
+
+
+def test_group_chat_pacing():
+    _, telegram = run("-100123", lambda n: send_texts(n, ["a", "b", "c"]))
+    assert [t for t, _ in telegram.delivered] == [0.0, GROUP_INTERVAL, 2 * GROUP_INTERVAL]
+
+
+def test_429_requeues_in_order_after_retry_after():
+    notifier, telegram = run(
+        "123", lambda n: send_texts(n, ["a", "b"]),
+        errors=[RateLimitError("429", retry_after=10)],
+    )
+    assert telegram.delivered == [(10.0, "a"), (11.0, "b")]
+    assert notifier.stats["rate_limited"] == 1
+    assert notifier.stats["sent"] == 2 and notifier.stats["failed"] == 0
+
+
+def test_4xx_is_dropped_without_retry():
+    """Regresión: un 400/401 se reintentaba MAX_ATTEMPTS veces frenando la cola."""
+    notifier, telegram = run(
+        "123", lambda n: send_texts(n, ["malo", "bueno"]),
+        errors=[ClientError("400 Bad Request", status_code=400)],
+    )
+    assert [text for _, text in telegram.calls] == ["malo", "bueno"]
+    assert telegram.delivered == [(CHAT_INTERVAL, "bueno")]
+    assert notifier.stats["failed"] == 1
+
+
+def test_network_and_5xx_retry_with_backoff():
+    notifier, telegram = run(
+        "123", lambda n: send_texts(n, ["a"]),
+        errors=[NetworkError("timeout"), ServerError("502")],
+    )
+    assert [t for t, _ in telegram.calls] == [0.0, 2.0, 6.0]
+    assert telegram.delivered == [(6.0, "a")]
+    assert notifier.stats["failed"] == 0
+
+
+def test_network_errors_give_up_after_max_attempts():
+    notifier, telegram = run(
+        "123", lambda n: send_texts(n, ["a"]),
+        errors=[NetworkError("timeout")] * MAX_ATTEMPTS,
+    )
+    assert len(telegram.calls) == MAX_ATTEMPTS
+    assert not telegram.delivered
+    assert notifier.stats["failed"] == 1
+
+
+async def send_opportunities(notifier, count, **kwargs):
+    for n in range(count):
+        await notifier.send_opportunity(opportunity(n, **kwargs), group="celulares")
+
+
+def test_single_opportunity_is_a_full_alert():
+    _, telegram = run("123", lambda n: send_opportunities(n, 1))
+    assert len(telegram.delivered) == 1
+    assert "OPORTUNIDAD CONFIRMADA" in telegram.delivered[0][1]
+
+
+def test_digest_chunks_fit_telegram_limit():
+    """Regresión: 15 items con URLs largas medían 4344 caracteres (y se cortaba el HTML)."""
+    notifier, telegram = run("123", lambda n: send_opportunities(n, 15))
+    texts = [text for _, text in telegram.delivered]
+    assert len(texts) > 1
+    assert all(len(text) <= MAX_MESSAGE_CHARS for text in texts)
+    assert all(text.endswith("</i>") for text in texts)
+    assert sum(text.count("<a href=") for text in texts) == 15
+    assert f"(1/{len(texts)})" in texts[0]
+    assert notifier.stats["digests"] == len(texts)
+
+
+def test_digest_packs_short_items_in_one_message():
+    _, telegram = run("123", lambda n: send_opportunities(n, 20, name_len=5, url_len=10))
+    assert len(telegram.delivered) == 1
+    assert telegram.delivered[0][1].count("<a href=") == 20
+
+
+def test_long_message_split_on_lines():
+    lines = [f"<b>línea {i}</b> " + "y" * 90 for i in range(100)]
+    text = "\n".join(lines)
+    _, telegram = run("123", lambda n: send_texts(n, [text]))
+    parts = [part for _, part in telegram.delivered]
+    assert len(parts) > 1
+    assert all(len(part) <= MAX_MESSAGE_CHARS for part in parts)
+    assert "\n".join(parts) == text
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
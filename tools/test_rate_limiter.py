@@ -0,0 +1,154 @@
+"""
+Tests del token bucket (core/rate_limiter.py) con reloj falso.
+
+    python tools/test_rate_limiter.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+from core.http_client import HttpClient, RateLimitError
+from core.rate_limiter import DomainRateLimiter, TokenBucket
+from core.shared_state import SharedDomainRateLimiter, SharedStateStore
+
+
+def test_burst_then_wait():
+    """Arranca lleno: `capacity` requests seguidos, el siguiente espera 1/rate."""
+    bucket = TokenBucket(rate=0.5, capacity=3, updated_at=0.0)
+    assert [bucket.try_consume(now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_consume(now=0.0) == 2.0
+    # Una espera no consume nada
+    assert bucket.try_consume(now=0.0) == 2.0
+
+
+def test_refill_over_time():
+    bucket = TokenBucket(rate=0.5, capacity=3, updated_at=0.0)
+    for _ in range(3):
+        bucket.try_consume(now=0.0)
+    assert bucket.try_consume(now=1.0) == 1.0
+    assert bucket.try_consume(now=2.0) == 0.0
+    assert bucket.try_consume(now=2.0) == 2.0
+
+
+def test_refill_capped_at_capacity():
+    """Una hora quieto no acumula más que el burst."""
+    bucket = TokenBucket(rate=0.5, capacity=3, updated_at=0.0)
+    for _ in range(3):
+        bucket.try_consume(now=0.0)
+    assert bucket.time_until(3, now=3600.0) == 0.0
+    assert bucket.tokens == 3
+    for _ in range(3):
+        assert bucket.try_consume(now=3600.0) == 0.0
+    assert bucket.try_consume(now=3600.0) > 0
+
+
+def test_clock_going_back_does_not_refill():
+    bucket = TokenBucket(rate=1.0, capacity=1, updated_at=10.0)
+    bucket.try_consume(now=10.0)
+    assert bucket.try_consume(now=5.0) > 0
+
+
+def test_zero_rate_never_ready():
+    bucket = TokenBucket(rate=0.0, capacity=1, updated_at=0.0)
+    bucket.try_consume(now=0.0)
+    assert bucket.time_until(now=1e9) == float("inf")
+
+
+def test_domain_limiter_buckets_are_independent():
+    limiter = DomainRateLimiter(max_requests_per_hour=1, burst=2)
+    assert limiter.try_acquire("a.com") == 0.0
+    assert limiter.try_acquire("a.com") == 0.0
+    assert limiter.try_acquire("a.com") > 0
+    assert limiter.time_until_ready("b.com") == 0.0
+    assert limiter.try_acquire("b.com") == 0.0
+
+
+def test_acquire_gives_up_past_timeout():
+    limiter = DomainRateLimiter(max_requests_per_hour=1, burst=1)
+    assert limiter.acquire("a.com", timeout=0)
+    assert not limiter.acquire("a.com", timeout=1)
+
+
+def test_shared_limiter_burst_and_peek():
+    """El presupuesto vive en el archivo; time_until_ready no consume."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SharedStateStore(os.path.join(tmp, "state.db"))
+        a = SharedDomainRateLimiter(store, max_requests_per_hour=1, burst=2)
+        b = SharedDomainRateLimiter(store, max_requests_per_hour=1, burst=2)
+        for _ in range(5):
+            assert a.time_until_ready("a.com") == 0.0
+        assert a.try_acquire("a.com") == 0.0
+        assert b.try_acquire("a.com") == 0.0
+        assert a.try_acquire("a.com") > 0
+        assert b.time_until_ready("a.com") > 3000
+
+
+class FakeResponse:
+    status_code = 200
+    headers: dict = {}
+    content = b"{}"
+
+
+class ThrottledResponse(FakeResponse):
+    status_code = 429
+    headers = {"Retry-After": "0"}
+
+
+class FakeSession:
+    def __init__(self, responses=()):
+        self.calls = 0
+        self.responses = list(responses)
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0) if self.responses else FakeResponse()
+
+
+def test_http_client_fails_fast_when_budget_is_exhausted():
+    """Sin cupo, HttpClient no duerme: RateLimitError con los segundos que faltan."""
+    limiter = DomainRateLimiter(max_requests_per_hour=1, burst=1)
+    client = HttpClient(rate_limiter=limiter, delay_range=(0, 0), retry_count=0)
+    session = FakeSession()
+    client._ensure_session = lambda: session
+    client.get("https://www.fravega.com/a")
+    started = time.monotonic()
+    try:
+        client.get("https://www.fravega.com/b")
+        raise AssertionError("se esperaba RateLimitError")
+    except RateLimitError as e:
+        assert e.retry_after > 3000
+    assert time.monotonic() - started < 1
+    assert session.calls == 1
+
+
+
+def test_http_client_raises_rate_limit_error_on_429():
+    """Regresión: el cliente sync dormía el Retry-After y el 429 salía como NetworkError."""
+    client = HttpClient(delay_range=(0, 0), retry_count=0)
+    session = FakeSession([ThrottledResponse()])
+    client._ensure_session = lambda: session
+    try:
+        client.get("https://www.fravega.com/a")
+        raise AssertionError("se esperaba RateLimitError")
+    except RateLimitError as e:
+        assert e.retry_after == 0
+    assert session.calls == 1
+
+    # Con retries: espera el Retry-After y reintenta
+    client = HttpClient(delay_range=(0, 0), retry_count=1)
+    session = FakeSession([ThrottledResponse()])
+    client._ensure_session = lambda: session
+    assert client.get("https://www.fravega.com/a").status_code == 200
+    assert session.calls == 2
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,86 @@
+"""
+Tests del runner multi-target (core/runner.py) con un sniffer falso:
+once respeta el scheduler y un ciclo cortado no pierde lo ya scrapeado.
+
+    python tools/test_runner.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+from core.base_sniffer import ScrapeResult
+from core.runner import TargetRunner
+from core.scheduler import CategoryScheduler
+
+
+class FakeSniffer:
+    """run_cycle() que scrapea hasta `fail_after` categorías y después explota."""
+
+    def __init__(self, fail_after: int = None):
+        self.fail_after = fail_after
+        self.scanned: list[str] = []
+
+    def run_cycle(self, categories, concurrency=1, on_result=None):
+        results = []
+        for category in categories:
+            if self.fail_after is not None and len(results) == self.fail_after:
+                raise RuntimeError("pool caído")
+            self.scanned.append(category)
+            result = ScrapeResult(target_name="fake", category=category, products_found=10, pages=1)
+            if on_result is not None:
+                on_result(result)
+            results.append(result)
+        return results
+
+
+def target(sniffer: FakeSniffer, categories: list[str]) -> TargetRunner:
+    runner = TargetRunner("fake", categories)
+    runner.sniffer = sniffer
+    runner.scheduler = CategoryScheduler(categories, min_interval=300, max_interval=3600)
+    return runner
+
+
+def run_once(runner: TargetRunner) -> None:
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            await runner.run(executor, asyncio.Event(), once=True)
+    asyncio.run(main())
+
+
+def test_once_scans_only_due_categories():
+    sniffer = FakeSniffer()
+    runner = target(sniffer, ["a", "b", "c"])
+    runner.scheduler.observe("b", products=10, changed=0)
+    run_once(runner)
+    assert sniffer.scanned == ["a", "c"]
+    assert runner.status.products == 20 and runner.status.cycles == 1
+
+    # Nada vencido: once no scrapea
+    run_once(runner)
+    assert sniffer.scanned == ["a", "c"]
+
+
+def test_interrupted_cycle_records_partial_results():
+    """Regresión: si run_cycle explotaba, lo scrapeado no llegaba al scheduler."""
+    sniffer = FakeSniffer(fail_after=1)
+    runner = target(sniffer, ["a", "b"])
+    run_once(runner)
+    assert runner.status.state == "error" and runner.status.products == 10
+    stats = runner.scheduler.stats
+    # "a" actualiza su volatilidad; "b" (sin resultado) cuenta como fallido
+    assert (stats["a"].scans, stats["b"].scans) == (1, 0)
+    assert min(s.next_due for s in stats.values()) > time.time()
+    assert runner.scheduler.due() == []
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,102 @@
+"""
+Tests del CategoryScheduler (core/scheduler.py) con reloj falso.
+
+    python tools/test_scheduler.py
+"""
+
+import os
+import sys
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+from core.base_sniffer import ScrapeResult
+from core.scheduler import BUDGET_SHARE, CategoryScheduler
+
+
+def demand(scheduler: CategoryScheduler) -> float:
+    return sum(s.requests * 3600 / s.interval for s in scheduler.stats.values())
+
+
+def test_new_categories_are_due_first():
+    scheduler = CategoryScheduler(["a", "b"], min_interval=300, max_interval=3600)
+    assert scheduler.due(now=0.0) == ["a", "b"]
+    scheduler.observe("a", products=100, changed=0, now=0.0)
+    assert scheduler.due(now=1.0) == ["b"]
+
+
+def test_volatile_gets_min_interval_static_gets_max():
+    scheduler = CategoryScheduler(
+        ["hot", "cold"], min_interval=300, max_interval=3600, budget_per_hour=10_000
+    )
+    scheduler.observe("hot", products=100, changed=50, glitches=2, avg_discount=60, now=0.0)
+    scheduler.observe("cold", products=100, changed=0, now=0.0)
+    assert round(scheduler.stats["hot"].interval) == 300
+    assert round(scheduler.stats["cold"].interval) == 3600
+    assert scheduler.due(now=301.0) == ["hot"]
+    assert round(scheduler.seconds_until_next(now=100.0)) == 200
+
+
+def test_interval_is_log_interpolated():
+    """Volatilidad v → max / (max/min) ** v."""
+    scheduler = CategoryScheduler(["c"], min_interval=100, max_interval=10_000, budget_per_hour=1e9)
+    # 2.5% de cambios = la mitad de HOT_CHANGE_RATE → 0.6 * 0.5 = 0.3
+    scheduler.observe("c", products=1000, changed=25, now=0.0)
+    stats = scheduler.stats["c"]
+    assert abs(stats.volatility - 0.3) < 1e-9
+    assert abs(stats.interval - 10_000 / 100 ** 0.3) < 1e-6
+
+
+def test_ewma_smooths_a_single_spike():
+    scheduler = CategoryScheduler(["c"], min_interval=300, max_interval=3600, budget_per_hour=1e9)
+    scheduler.observe("c", products=100, changed=0, now=0.0)
+    scheduler.observe("c", products=100, changed=50, now=3600.0)
+    stats = scheduler.stats["c"]
+    assert 300 < stats.interval < 3600
+    assert abs(stats.change_rate - 0.15) < 1e-9
+
+
+def test_budget_stretches_all_intervals_proportionally():
+    categories = [f"c{i}" for i in range(20)]
+    scheduler = CategoryScheduler(categories, min_interval=300, max_interval=3600, budget_per_hour=100)
+    for c in categories:
+        scheduler.observe(c, products=100, changed=50, requests=2, now=0.0)
+    budget = 100 * BUDGET_SHARE
+    assert abs(demand(scheduler) - budget) < 1e-6
+    # Sin presupuesto serían 300s; 20 categorías × 2 requests × 12/h = 480 req/h
+    assert abs(scheduler.stats["c0"].interval - 300 * 480 / budget) < 1e-6
+
+
+def test_within_budget_is_not_stretched():
+    scheduler = CategoryScheduler(["c"], min_interval=300, max_interval=3600, budget_per_hour=300)
+    scheduler.observe("c", products=100, changed=50, glitches=1, avg_discount=40, now=0.0)
+    assert round(scheduler.stats["c"].interval) == 300
+
+
+def test_failed_scan_keeps_interval():
+    scheduler = CategoryScheduler(["c"], min_interval=300, max_interval=3600, budget_per_hour=1e9)
+    scheduler.observe("c", products=100, changed=50, now=0.0)
+    stats = scheduler.stats["c"]
+    interval = stats.interval
+    scheduler.observe("c", products=0, changed=0, failed=True, now=1000.0)
+    assert stats.scans == 1
+    assert stats.interval == interval
+    assert stats.next_due == 1000.0 + interval
+
+
+def test_record_reads_scrape_result_counters():
+    scheduler = CategoryScheduler(["c"], min_interval=300, max_interval=3600, budget_per_hour=1e9)
+    result = ScrapeResult("t", "c", products_found=10, prices_changed=5, pages=3,
+                          discount_sum=90.0, discounted=3)
+    scheduler.record(result, now=0.0)
+    stats = scheduler.stats["c"]
+    assert stats.discount == 30.0
+    assert stats.requests == 3.0
+    assert stats.next_due == stats.interval
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
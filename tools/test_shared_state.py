@@ -0,0 +1,102 @@
+"""
+Tests del estado compartido entre procesos (core/shared_state.py):
+circuit breaker bindeado al store.
+
+    python tools/test_shared_state.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+from core.http_client import AsyncHttpClient, CircuitBreaker, CircuitState
+from core.shared_state import SharedStateStore
+
+
+def bound_breaker(store: SharedStateStore, **kwargs) -> CircuitBreaker:
+    breaker = CircuitBreaker(**kwargs)
+    breaker.bind(store, "breaker:test")
+    return breaker
+
+
+def count_transactions(store: SharedStateStore) -> list:
+    """Contar las transacciones de escritura abiertas en `store`."""
+    opened = []
+    original = store.transaction
+
+    def transaction():
+        opened.append(1)
+        return original()
+
+    store.transaction = transaction
+    return opened
+
+
+def test_closed_breaker_does_not_write():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SharedStateStore(os.path.join(tmp, "state.db"))
+        breaker = bound_breaker(store)
+        writes = count_transactions(store)
+        for _ in range(10):
+            assert breaker.can_execute()
+            breaker.record_success()
+        assert writes == []
+        assert store.reader().execute("SELECT COUNT(*) FROM circuit_breakers").fetchone()[0] == 0
+
+
+def test_failures_open_the_breaker_for_every_process():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SharedStateStore(os.path.join(tmp, "state.db"))
+        a = bound_breaker(store, failure_threshold=3)
+        b = bound_breaker(store, failure_threshold=3)
+        a.record_failure()
+        b.record_failure()
+        a.record_failure()
+        assert a.state == CircuitState.OPEN
+        assert not b.can_execute()
+        assert b.state == CircuitState.OPEN
+
+
+def test_success_after_failures_resets_the_count():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SharedStateStore(os.path.join(tmp, "state.db"))
+        breaker = bound_breaker(store, failure_threshold=3)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.can_execute()
+        assert breaker.failure_count == 1
+        other = bound_breaker(store)
+        assert other.can_execute() and other.failure_count == 1
+
+
+def test_async_client_calls_bound_breaker_off_the_loop():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SharedStateStore(os.path.join(tmp, "state.db"))
+        client = AsyncHttpClient(shared_state=store)
+        client.circuit_breaker.bind(store, "breaker:test")
+        threads = []
+
+        def call():
+            threads.append(threading.get_ident())
+            return True
+
+        async def main():
+            assert await client._breaker(call)
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(main())
+        assert threads and threads[0] != loop_thread
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
@@ -51,7 +51,9 @@ async def test_send_alert(token, chat_id):
         "store": "Fravega (Test)"
     }
     logger.info("📡 Enviando alerta de prueba...")
-    success = await notifier.send_opportunity(opp)
+    # send_opportunity solo encola: flush() espera la entrega
+    success = await notifier.send_opportunity(opp) and await notifier.flush(timeout=30)
+    await notifier.close()
     if success:
         logger.info("✅ Alerta enviada correctamente.")
     else:
@@ -0,0 +1,106 @@
+"""
+Tests del ValidationCache (core/validation_cache.py) con reloj falso.
+
+    python tools/test_validation_cache.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Agregar root al path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from testkit import run_tests
+
+from core.shared_state import SharedStateStore
+from core.validation_cache import ValidationCache
+
+TTL = 100
+NEGATIVE_TTL = 1000
+
+
+def make_cache(store=None) -> ValidationCache:
+    return ValidationCache("test", ttl=TTL, negative_ttl=NEGATIVE_TTL, store=store)
+
+
+def test_positive_lives_ttl():
+    cache = make_cache()
+    assert cache.put("sku", 999.0, True, "validado_ok", "http", now=0.0)
+    assert cache.get("sku", 999.0, now=TTL - 1).ok
+    assert cache.get("sku", 999.0, now=TTL) is None
+
+
+def test_stable_negatives_live_negative_ttl():
+    cache = make_cache()
+    assert cache.put("a", 10.0, False, "stock_agotado", "http", now=0.0)
+    assert cache.put("b", 10.0, False, "precio_carrito_mayor", "browser", now=0.0)
+    for sku in ("a", "b"):
+        hit = cache.get(sku, 10.0, now=NEGATIVE_TTL - 1)
+        assert hit is not None and not hit.ok
+        assert cache.get(sku, 10.0, now=NEGATIVE_TTL) is None
+
+
+def test_errors_and_inconclusive_are_not_cached():
+    cache = make_cache()
+    assert not cache.put("a", 10.0, False, "error: timeout", "browser", now=0.0)
+    assert not cache.put("b", 10.0, False, "boton_no_encontrado", "browser", now=0.0)
+    assert cache.get("a", 10.0, now=1.0) is None
+    assert cache.get("b", 10.0, now=1.0) is None
+    assert len(cache) == 0
+
+
+def test_price_change_is_a_miss():
+    cache = make_cache()
+    cache.put("sku", 999.0, True, "validado_ok", "http", now=0.0)
+    assert cache.get("sku", 899.0, now=1.0) is None
+    # La entrada vieja se descarta: volver al precio anterior también es miss
+    assert cache.get("sku", 999.0, now=2.0) is None
+
+
+def test_price_compared_at_cents():
+    cache = make_cache()
+    cache.put("sku", 999.004, True, "validado_ok", "http", now=0.0)
+    assert cache.get("sku", 999.0, now=1.0) is not None
+
+
+def test_invalidate_and_hit_rate():
+    cache = make_cache()
+    cache.put("a", 10.0, True, "validado_ok", "http", now=0.0)
+    cache.put("b", 10.0, True, "validado_ok", "http", now=0.0)
+    assert cache.get("a", 10.0, now=1.0) is not None
+    assert cache.invalidate(["a", "zzz"]) == 1
+    assert cache.get("a", 10.0, now=1.0) is None
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_persists_through_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SharedStateStore(os.path.join(tmp, "state.db"))
+        cache = make_cache(store)
+        cache.put("a", 10.0, True, "validado_ok", "http")
+        cache.put("b", 10.0, False, "stock_agotado", "http")
+        cache.put("c", 10.0, True, "validado_ok", "http")
+        cache.invalidate(["c"])
+
+        reloaded = make_cache(store)
+        assert len(reloaded) == 2
+        assert reloaded.get("a", 10.0).ok
+        assert not reloaded.get("b", 10.0).ok
+        assert reloaded.get("c", 10.0) is None
+
+
+def test_for_source_stays_in_memory_without_shared_state():
+    previous = os.environ.pop("ODISEO_SHARED_STATE", None)
+    try:
+        ValidationCache._instances.pop("test-memory", None)
+        assert ValidationCache.for_source("test-memory").store is None
+    finally:
+        ValidationCache._instances.pop("test-memory", None)
+        if previous is not None:
+            os.environ["ODISEO_SHARED_STATE"] = previous
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests(globals()))
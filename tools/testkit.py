@@ -0,0 +1,29 @@
+"""
+Runner mínimo para los tests de tools/ (sin pytest: `python tools/test_x.py`).
+
+    if __name__ == "__main__":
+        sys.exit(run_tests(globals()))
+
+Corre cada función test_* del módulo en orden; una excepción inesperada
+cuenta como fallo de ese test (con traceback) y sigue con el resto.
+"""
+
+import traceback
+
+
+def run_tests(namespace: dict) -> int:
+    """Correr los test_* de `namespace`. Retorna el exit code (0 = todo OK)."""
+    tests = [(name, fn) for name, fn in namespace.items() if name.startswith("test_") and callable(fn)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {name}: {e!r}")
+        except Exception:
+            failed += 1
+            print(f"💥 {name}:\n{traceback.format_exc()}")
+    print(f"{len(tests) - failed}/{len(tests)} tests OK")
+    return 1 if failed else 0
@@ -7,9 +7,13 @@ Cambios vs V1:
 - SSE actualizado para opportunities
 - Health check para cada sniffer
 
+- Rate limits y circuit breakers compartidos entre todos los subprocesos
+  (core/shared_state.py, vía ODISEO_SHARED_STATE)
+
 Uso:
     python web/bridge_v2.py --sniffers fravega
     python web/bridge_v2.py --sniffers fravega,megatone,cetrogar
+    python web/bridge_v2.py --sniffers fravega --shared-state ""   # sin estado compartido
 """
 
 import subprocess
@@ -32,14 +36,27 @@ logger = logging.getLogger("bridge-v2")
 API_URL = "http://localhost:3001/api/events"
 HEALTH_CHECK_INTERVAL = 30  # segundos
 
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Archivo de estado compartido (presupuestos por dominio + breakers)
+SHARED_STATE_ENV = "ODISEO_SHARED_STATE"
+DEFAULT_SHARED_STATE = os.path.join(ROOT_DIR, "data", "shared_state.db")
+
 
 class SnifferProcess:
     """Gestiona un proceso de sniffer (V1 o V2)."""
     
-    def __init__(self, script_path: str, provider: str, version: str = "v1"):
+    def __init__(
+        self,
+        script_path: str,
+        provider: str,
+        version: str = "v1",
+        shared_state_path: Optional[str] = None,
+    ):
         self.script_path = script_path
         self.provider = provider
         self.version = version
+        self.shared_state_path = shared_state_path
         self.process: Optional[subprocess.Popen] = None
         self.is_running = False
         self.last_heartbeat = None
@@ -52,19 +69,24 @@ class SnifferProcess:
             logger.warning(f"{self.provider}: Ya está corriendo")
             return
         
-        ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         abs_script = os.path.join(ROOT_DIR, self.script_path)
         
         if not os.path.exists(abs_script):
             logger.error(f"{self.provider}: Script no encontrado: {abs_script}")
             return
         
+        # Todos los sniffers comparten presupuesto y breakers vía este archivo
+        env = dict(os.environ)
+        if self.shared_state_path:
+            env[SHARED_STATE_ENV] = self.shared_state_path
+        
         try:
             self.process = subprocess.Popen(
                 [sys.executable, abs_script, "--daemon"],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 cwd=ROOT_DIR,
+                env=env,
                 text=True,
                 bufsize=1,
             )
@@ -191,13 +213,14 @@ class SnifferProcess:
 class Bridge:
     """Orquestador principal."""
     
-    def __init__(self):
+    def __init__(self, shared_state_path: Optional[str] = DEFAULT_SHARED_STATE):
         self.sniffers: dict[str, SnifferProcess] = {}
         self.running = False
+        self.shared_state_path = shared_state_path
     
     def add_sniffer(self, name: str, script_path: str, version: str = "v1"):
         """Agregar sniffer al pool."""
-        sniffer = SnifferProcess(script_path, name, version)
+        sniffer = SnifferProcess(script_path, name, version, self.shared_state_path)
         self.sniffers[name] = sniffer
         logger.info(f"✅ Sniffer registrado: {name} ({version})")
     
@@ -266,6 +289,12 @@ def main():
         default="v2,v2,v2",
         help="Versión de cada sniffer (v1 o v2)"
     )
+    parser.add_argument(
+        "--shared-state",
+        type=str,
+        default=DEFAULT_SHARED_STATE,
+        help="Archivo SQLite de rate limits/breakers compartidos (\"\" para desactivar)"
+    )
     
     args = parser.parse_args()
     
@@ -304,7 +333,9 @@ def main():
     }
     
     # Crear bridge
-    bridge = Bridge()
+    bridge = Bridge(shared_state_path=args.shared_state or None)
+    if bridge.shared_state_path:
+        logger.info(f"🔗 Estado compartido: {bridge.shared_state_path}")
     
     # Registrar sniffers
     for name, version in zip(sniffer_names, sniffer_versions):
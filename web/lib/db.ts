@@ -1,11 +1,16 @@
 import Database from "better-sqlite3";
 import path from "path";
 import fs from "fs";
+import { logger } from "./logger";
 
 // Mapeo de bases de datos
 const CWD = process.cwd();
 const ROOT_DIR = CWD.endsWith('web') ? path.resolve(CWD, "..") : CWD;
 const DB_DIR = path.join(ROOT_DIR, "data", "databases");
+// Unified Ledger (core/database.py): todas las tiendas en una sola DB
+const LEDGER_PATH = process.env.ODISEO_LEDGER
+    ? path.resolve(ROOT_DIR, process.env.ODISEO_LEDGER)
+    : path.join(DB_DIR, "ledger.db");
 
 const STORES = {
     fravega: {
@@ -77,11 +82,78 @@ function makeSemanticKey(name: string) {
     return modelParts.sort().join("");
 }
 
+/**
+ * Lee todas las tiendas del Unified Ledger con una sola query.
+ * Retorna null si el ledger no existe o no se pudo leer (se cae al modo
+ * una-DB-por-tienda). Los agotados (in_stock = 0) no cuentan.
+ */
+export function loadLedgerRows(category: string | null, search: string): any[] | null {
+    if (!fs.existsSync(LEDGER_PATH)) return null;
+
+    try {
+        const db = new Database(LEDGER_PATH, { readonly: true });
+        const storeCase = Object.entries(STORES)
+            .map(([id, config]) => `WHEN '${id}' THEN '${(config as any).name}'`)
+            .join(" ");
+
+        // product_matches también tiene brand: todas las columnas calificadas
+        let query = `
+            SELECT 
+                p.name, 
+                p.current_price as price, 
+                p.list_price, 
+                p.discount_pct, 
+                p.brand, 
+                p.image_url as img, 
+                p.url, 
+                p.category,
+                CASE p.source ${storeCase} ELSE p.source END as store,
+                m.match_key as ledger_match_key
+            FROM products p
+            LEFT JOIN product_matches m
+              ON m.source = p.source AND m.product_id = p.product_id
+            WHERE p.current_price > 500 AND p.in_stock = 1
+        `;
+        const params: any[] = [];
+
+        if (category && category !== "all") {
+            query += ` AND (p.category LIKE ? OR p.name LIKE ?)`;
+            params.push(`%${category}%`, `%${category}%`);
+        }
+
+        if (search) {
+            query += ` AND (p.name LIKE ? OR p.brand LIKE ?)`;
+            params.push(`%${search}%`, `%${search}%`);
+        }
+
+        const rows = db.prepare(query).all(...params) as any[];
+        db.close();
+        return rows.length > 0 ? rows : null;
+    } catch (e: any) {
+        logger.error('LEDGER', `No se pudo leer ${LEDGER_PATH}, se usan las DBs por tienda: ${e.message}`);
+        return null;
+    }
+}
+
 export function getUnifiedProducts(category = null, search = "", limit = 500, offset = 0, isGlitchRadar = false) {
     const allProducts: any[] = [];
     const marketMap: Record<string, any[]> = {};
 
-    for (const [id, config] of Object.entries(STORES)) {
+    const ledgerRows = loadLedgerRows(category, search);
+    if (ledgerRows) {
+        ledgerRows.forEach(r => {
+            // match_key del matching del ledger (core/matching.py); fallback semántico
+            const key = r.ledger_match_key || makeSemanticKey(r.name);
+            const productWithId = { ...r, match_key: key };
+
+            if (!marketMap[key]) marketMap[key] = [];
+            marketMap[key].push(productWithId);
+            allProducts.push(productWithId);
+        });
+    }
+
+    // Fallback: DBs por tienda (instalaciones sin migrar al ledger)
+    for (const [id, config] of (ledgerRows ? [] : Object.entries(STORES))) {
         let dbPath = "";
 
         // Buscar el primer path que exista
@@ -0,0 +1,74 @@
+/**
+ * TEST: LEDGER (web/lib/db.ts)
+ * Corre la query del dashboard contra un ledger armado por core.database.Database.
+ */
+
+import { execFileSync } from "child_process";
+import fs from "fs";
+import os from "os";
+import path from "path";
+
+const ROOT_DIR = path.resolve(__dirname, "..", "..");
+
+// Dos tiendas con el mismo EAN (mismo match_key) + un agotado
+const BUILD_LEDGER = `
+import sys
+from core.base_sniffer import Product
+from core.database import Database
+
+def product(source, pid, price, **kwargs):
+    return Product(id=pid, name="Celular Samsung Galaxy A54 128GB", brand="Samsung",
+                   current_price=price, list_price=price, category="celulares",
+                   source=source, raw_data={"ean": "7791234567890"}, **kwargs)
+
+Database(sys.argv[1]).save_products([
+    product("fravega", "f1", 400000),
+    product("cetrogar", "c1", 500000),
+    product("oncity", "o1", 450000, in_stock=False),
+])
+`;
+
+function buildLedger(): string {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), "odiseo-ledger-"));
+    const ledger = path.join(dir, "ledger.db");
+    execFileSync("python", ["-c", BUILD_LEDGER, ledger], { cwd: ROOT_DIR, stdio: "inherit" });
+    return ledger;
+}
+
+async function testLedgerQuery() {
+    console.log('📡 Testing ledger query (products ⟕ product_matches)...');
+    // LEDGER_PATH se resuelve al importar el módulo
+    process.env.ODISEO_LEDGER = buildLedger();
+    const { loadLedgerRows } = await import("../lib/db");
+
+    const rows = loadLedgerRows(null, "samsung");
+    if (!rows || rows.length !== 2) {
+        console.log(`❌ Se esperaban 2 filas con stock, hubo: ${JSON.stringify(rows)}`);
+        return false;
+    }
+    const stores = rows.map(r => r.store).sort().join(",");
+    const keys = new Set(rows.map(r => r.ledger_match_key));
+    if (stores !== "Cetrogar,Fravega" || keys.size !== 1 || !keys.has("ean:7791234567890")) {
+        console.log(`❌ Filas inesperadas: ${JSON.stringify(rows)}`);
+        return false;
+    }
+    if (loadLedgerRows("celulares", "") === null || loadLedgerRows("tvs", "") !== null) {
+        console.log('❌ Filtro de categoría roto');
+        return false;
+    }
+    console.log('✅ Query del ledger OK.');
+    return true;
+}
+
+async function runTests() {
+    console.log('\n🧪 --- TEST SUITE: LEDGER ---');
+    const queryOk = await testLedgerQuery();
+
+    console.log('\n📊 RESULTADOS:');
+    console.log(`- Ledger Query: ${queryOk ? '✅ PASS' : '❌ FAIL'}`);
+
+    if (queryOk) process.exit(0);
+    else process.exit(1);
+}
+
+runTests();